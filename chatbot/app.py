@@ -1,295 +1,99 @@
 import gradio as gr
-import requests
 from openai import OpenAI
 import json
 from datetime import datetime
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from geometry import decode_polyline_cached, level_of_detail
+from mcp_client import mcp_client
+from place_matcher import Mention, PlaceMatcher
+import sys
+from pathlib import Path
+
+# The gazetteer is shared with the MCP servers and lives at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scotland_common import get_gazetteer, get_geocoder
+
+GAZETTEER = get_gazetteer()
+GEOCODER = get_geocoder()  # None until the offline index is built
 
 # Your MCP server URLs
 WEATHER_MCP_URL = "https://emma-ctrl--scotland-weather-mcp-fastapi-app.modal.run/mcp"
 DAYLIGHT_MCP_URL = "https://emma-ctrl--scotland-daylight-mcp-fastapi-app.modal.run/mcp"
 DRIVING_MCP_URL = "https://emma-ctrl--scottish-driving-mcp-fastapi-app.modal.run/mcp"
 
+# Upstream calls for one chat turn run in parallel and must all finish within this budget
+TURN_DEADLINE_SECONDS = 20
+mcp_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="mcp")
+
 # Initialize Nebius AI Studio client
 client = OpenAI(
     api_key="NEBIUS_API_KEY",
     base_url="https://api.studio.nebius.ai/v1"
 )
 
-def call_mcp_server(server_url, tool_name, arguments):
+def call_mcp_server(server_url, tool_name, arguments, timeout=30):
     """Call any MCP server with Scottish location validation"""
     
-    # Define Scottish clarifications dictionary once for all uses
-    scottish_clarifications = {
-        # Major cities that exist elsewhere
-        "aberdeen": "Aberdeen, Scotland, UK",
-        "dundee": "Dundee, Scotland, UK", 
-        "perth": "Perth, Scotland, UK",
-        "hamilton": "Hamilton, Scotland, UK",
-        "glasgow": "Glasgow, Scotland, UK",
-        "edinburgh": "Edinburgh, Scotland, UK",
-        "stirling": "Stirling, Scotland, UK",
-        "inverness": "Inverness, Scotland, UK",
-        "paisley": "Paisley, Scotland, UK",
-        "greenock": "Greenock, Scotland, UK",
-        "ayr": "Ayr, Scotland, UK",
-        "kilmarnock": "Kilmarnock, Scotland, UK",
-        "dumfries": "Dumfries, Scotland, UK",
-        "falkirk": "Falkirk, Scotland, UK",
-        "livingston": "Livingston, Scotland, UK",
-        "kirkcaldy": "Kirkcaldy, Scotland, UK",
-        "dunfermline": "Dunfermline, Scotland, UK",
-        
-        # Islands (very commonly confused)
-        "mull": "Isle of Mull, Scotland, UK",
-        "isle of mull": "Isle of Mull, Scotland, UK",
-        "skye": "Isle of Skye, Scotland, UK", 
-        "isle of skye": "Isle of Skye, Scotland, UK",
-        "arran": "Isle of Arran, Scotland, UK",
-        "isle of arran": "Isle of Arran, Scotland, UK",
-        "harris": "Isle of Harris, Scotland, UK",
-        "isle of harris": "Isle of Harris, Scotland, UK",
-        "lewis": "Isle of Lewis, Scotland, UK",
-        "isle of lewis": "Isle of Lewis, Scotland, UK",
-        "orkney": "Orkney Islands, Scotland, UK",
-        "orkney islands": "Orkney Islands, Scotland, UK",
-        "shetland": "Shetland Islands, Scotland, UK",
-        "shetland islands": "Shetland Islands, Scotland, UK",
-        "islay": "Isle of Islay, Scotland, UK",
-        "isle of islay": "Isle of Islay, Scotland, UK",
-        "jura": "Isle of Jura, Scotland, UK",
-        "isle of jura": "Isle of Jura, Scotland, UK",
-        "bute": "Isle of Bute, Scotland, UK",
-        "isle of bute": "Isle of Bute, Scotland, UK",
-        "iona": "Isle of Iona, Scotland, UK",
-        "isle of iona": "Isle of Iona, Scotland, UK",
-        "tiree": "Isle of Tiree, Scotland, UK",
-        "isle of tiree": "Isle of Tiree, Scotland, UK",
-        "coll": "Isle of Coll, Scotland, UK",
-        "isle of coll": "Isle of Coll, Scotland, UK",
-        "muck": "Isle of Muck, Scotland, UK",
-        "eigg": "Isle of Eigg, Scotland, UK",
-        "rum": "Isle of Rum, Scotland, UK",
-        "rhum": "Isle of Rum, Scotland, UK",
-        "canna": "Isle of Canna, Scotland, UK",
-        "staffa": "Isle of Staffa, Scotland, UK",
-        "ulva": "Isle of Ulva, Scotland, UK",
-        
-        # Highland towns/villages that could be confused
-        "fort william": "Fort William, Scotland, UK",
-        "aviemore": "Aviemore, Scotland, UK",
-        "oban": "Oban, Scotland, UK",
-        "pitlochry": "Pitlochry, Scotland, UK",
-        "callander": "Callander, Scotland, UK",
-        "balloch": "Balloch, Scotland, UK",
-        "helensburgh": "Helensburgh, Scotland, UK",
-        "mallaig": "Mallaig, Scotland, UK",
-        "kyle": "Kyle of Lochalsh, Scotland, UK",
-        "kyle of lochalsh": "Kyle of Lochalsh, Scotland, UK",
-        "portree": "Portree, Scotland, UK",
-        "tobermory": "Tobermory, Scotland, UK",
-        "tarbert": "Tarbert, Scotland, UK",
-        "campbeltown": "Campbeltown, Scotland, UK",
-        "stranraer": "Stranraer, Scotland, UK",
-        "thurso": "Thurso, Scotland, UK",
-        "wick": "Wick, Scotland, UK",
-        "dornoch": "Dornoch, Scotland, UK",
-        "golspie": "Golspie, Scotland, UK",
-        "brora": "Brora, Scotland, UK",
-        "ullapool": "Ullapool, Scotland, UK",
-        "gairloch": "Gairloch, Scotland, UK",
-        "kinlochewe": "Kinlochewe, Scotland, UK",
-        "torridon": "Torridon, Scotland, UK",
-        "applecross": "Applecross, Scotland, UK",
-        "plockton": "Plockton, Scotland, UK",
-        "lochinver": "Lochinver, Scotland, UK",
-        "durness": "Durness, Scotland, UK",
-        "tongue": "Tongue, Scotland, UK",
-        "bettyhill": "Bettyhill, Scotland, UK",
-        "john o groats": "John O'Groats, Scotland, UK",
-        "john o'groats": "John O'Groats, Scotland, UK",
-        
-        # Border towns that exist elsewhere
-        "kelso": "Kelso, Scotland, UK",
-        "jedburgh": "Jedburgh, Scotland, UK",
-        "hawick": "Hawick, Scotland, UK",
-        "galashiels": "Galashiels, Scotland, UK",
-        "selkirk": "Selkirk, Scotland, UK",
-        "melrose": "Melrose, Scotland, UK",
-        "peebles": "Peebles, Scotland, UK",
-        "biggar": "Biggar, Scotland, UK",
-        "moffat": "Moffat, Scotland, UK",
-        "sanquhar": "Sanquhar, Scotland, UK",
-        "langholm": "Langholm, Scotland, UK",
-        "annan": "Annan, Scotland, UK",
-        "gretna": "Gretna, Scotland, UK",
-        "gretna green": "Gretna Green, Scotland, UK",
-        "lockerbie": "Lockerbie, Scotland, UK",
-        
-        # Eastern Scotland towns
-        "st andrews": "St Andrews, Scotland, UK",
-        "saint andrews": "St Andrews, Scotland, UK",
-        "cupar": "Cupar, Scotland, UK",
-        "anstruther": "Anstruther, Scotland, UK",
-        "crail": "Crail, Scotland, UK",
-        "elie": "Elie, Scotland, UK",
-        "pittenweem": "Pittenweem, Scotland, UK",
-        "north berwick": "North Berwick, Scotland, UK",
-        "dunbar": "Dunbar, Scotland, UK",
-        "haddington": "Haddington, Scotland, UK",
-        "linlithgow": "Linlithgow, Scotland, UK",
-        "bathgate": "Bathgate, Scotland, UK",
-        "armadale": "Armadale, Scotland, UK",
-        "stonehaven": "Stonehaven, Scotland, UK",
-        "montrose": "Montrose, Scotland, UK",
-        "arbroath": "Arbroath, Scotland, UK",
-        "carnoustie": "Carnoustie, Scotland, UK",
-        "forfar": "Forfar, Scotland, UK",
-        "brechin": "Brechin, Scotland, UK",
-        "kirriemuir": "Kirriemuir, Scotland, UK",
-        "blairgowrie": "Blairgowrie, Scotland, UK",
-        "crieff": "Crieff, Scotland, UK",
-        "aberfeldy": "Aberfeldy, Scotland, UK",
-        "dunkeld": "Dunkeld, Scotland, UK",
-        "birnam": "Birnam, Scotland, UK",
-        
-        # Western Scotland and Argyll
-        "rothesay": "Rothesay, Scotland, UK",
-        "dunoon": "Dunoon, Scotland, UK",
-        "inveraray": "Inveraray, Scotland, UK",
-        "lochgilphead": "Lochgilphead, Scotland, UK",
-        "ardrishaig": "Ardrishaig, Scotland, UK",
-        "crinan": "Crinan, Scotland, UK",
-        "kilmartin": "Kilmartin, Scotland, UK",
-        "dalmally": "Dalmally, Scotland, UK",
-        "tyndrum": "Tyndrum, Scotland, UK",
-        "crianlarich": "Crianlarich, Scotland, UK",
-        "killin": "Killin, Scotland, UK",
-        "lochearnhead": "Lochearnhead, Scotland, UK",
-        "st fillans": "St Fillans, Scotland, UK",
-        "comrie": "Comrie, Scotland, UK",
-        "auchterarder": "Auchterarder, Scotland, UK",
-        "gleneagles": "Gleneagles, Scotland, UK",
-        
-        # Central Scotland
-        "bridge of allan": "Bridge of Allan, Scotland, UK",
-        "alloa": "Alloa, Scotland, UK",
-        "clackmannan": "Clackmannan, Scotland, UK",
-        "tillicoultry": "Tillicoultry, Scotland, UK",
-        "dollar": "Dollar, Scotland, UK",
-        "alva": "Alva, Scotland, UK",
-        "menstrie": "Menstrie, Scotland, UK",
-        "denny": "Denny, Scotland, UK",
-        "bonnybridge": "Bonnybridge, Scotland, UK",
-        "larbert": "Larbert, Scotland, UK",
-        "stenhousemuir": "Stenhousemuir, Scotland, UK",
-        "grangemouth": "Grangemouth, Scotland, UK",
-        "bo'ness": "Bo'ness, Scotland, UK",
-        "blackness": "Blackness, Scotland, UK",
-        "queensferry": "South Queensferry, Scotland, UK",
-        "south queensferry": "South Queensferry, Scotland, UK",
-        
-        # Famous landmarks and areas
-        "ben nevis": "Ben Nevis, Scotland, UK",
-        "ben lomond": "Ben Lomond, Scotland, UK",
-        "ben more": "Ben More, Scotland, UK",
-        "cairngorms": "Cairngorms, Scotland, UK",
-        "glencoe": "Glencoe, Scotland, UK",
-        "glen coe": "Glencoe, Scotland, UK",
-        "loch lomond": "Loch Lomond, Scotland, UK",
-        "loch ness": "Loch Ness, Scotland, UK",
-        "loch katrine": "Loch Katrine, Scotland, UK",
-        "loch earn": "Loch Earn, Scotland, UK",
-        "loch tay": "Loch Tay, Scotland, UK",
-        "loch tummel": "Loch Tummel, Scotland, UK",
-        "loch rannoch": "Loch Rannoch, Scotland, UK",
-        "loch awe": "Loch Awe, Scotland, UK",
-        "loch fyne": "Loch Fyne, Scotland, UK",
-        "loch long": "Loch Long, Scotland, UK",
-        "loch goil": "Loch Goil, Scotland, UK",
-        "the trossachs": "The Trossachs, Scotland, UK",
-        "trossachs": "The Trossachs, Scotland, UK",
-        "queen elizabeth forest park": "Queen Elizabeth Forest Park, Scotland, UK",
-        "cairngorms national park": "Cairngorms National Park, Scotland, UK",
-        "loch lomond and trossachs national park": "Loch Lomond and Trossachs National Park, Scotland, UK",
-        
-        # Northern Scotland - abbreviated for space
-        "elgin": "Elgin, Scotland, UK",
-        "forres": "Forres, Scotland, UK",
-        "nairn": "Nairn, Scotland, UK",
-        "grantown": "Grantown-on-Spey, Scotland, UK",
-        "kingussie": "Kingussie, Scotland, UK",
-        "newtonmore": "Newtonmore, Scotland, UK",
-        "dalwhinnie": "Dalwhinnie, Scotland, UK",
-        "carrbridge": "Carrbridge, Scotland, UK",
-        "boat of garten": "Boat of Garten, Scotland, UK",
-        "tomintoul": "Tomintoul, Scotland, UK",
-        "aberlour": "Aberlour, Scotland, UK",
-        "dufftown": "Dufftown, Scotland, UK",
-        "keith": "Keith, Scotland, UK",
-        "huntly": "Huntly, Scotland, UK",
-        "inverurie": "Inverurie, Scotland, UK",
-        "banff": "Banff, Scotland, UK",
-        "fraserburgh": "Fraserburgh, Scotland, UK",
-        "peterhead": "Peterhead, Scotland, UK",
-        "lairg": "Lairg, Scotland, UK",
-        "dornoch": "Dornoch, Scotland, UK",
-        "helmsdale": "Helmsdale, Scotland, UK",
-        "bettyhill": "Bettyhill, Scotland, UK",
-        "tongue": "Tongue, Scotland, UK",
-        
-        # Common abbreviations and variations
-        "fort bill": "Fort William, Scotland, UK",
-        "the fort": "Fort William, Scotland, UK",
-        "malky": "Mallaig, Scotland, UK",
-        "toby": "Tobermory, Scotland, UK",
-    }
-    
-    # Handle single location field
-    if "location" in arguments:
-        location = arguments["location"].lower().strip()
-        if location in scottish_clarifications:
-            arguments["location"] = scottish_clarifications[location]
-        elif not any(keyword in location for keyword in ["scotland", "uk", "united kingdom"]):
-            arguments["location"] = f"{arguments['location']}, Scotland, UK"
-    
-    # Handle multiple location fields for driving
-    for field in ["from_location", "to_location", "start_location"]:
-        if field in arguments:
-            location = arguments[field].lower().strip()
-            if location in scottish_clarifications:
-                arguments[field] = scottish_clarifications[location]
-            elif not any(keyword in location for keyword in ["scotland", "uk", "united kingdom"]):
-                arguments[field] = f"{arguments[field]}, Scotland, UK"
+    # Known places get their canonical "Name, Scotland, UK" form; anything else is pinned to Scotland
+    for field in ["location", "from_location", "to_location", "start_location", "end_location"]:
+        if isinstance(arguments.get(field), str):
+            arguments[field] = GAZETTEER.clarify(arguments[field].strip(), fuzzy=GAZETTEER.fuzzy_first)
     
     # Handle locations array for road trips
     if "locations" in arguments and isinstance(arguments["locations"], list):
-        clarified_locations = []
-        for location in arguments["locations"]:
-            location_lower = location.lower().strip()
-            if location_lower in scottish_clarifications:
-                clarified_locations.append(scottish_clarifications[location_lower])
-            elif not any(keyword in location_lower for keyword in ["scotland", "uk", "united kingdom"]):
-                clarified_locations.append(f"{location}, Scotland, UK")
-            else:
-                clarified_locations.append(location)
-        arguments["locations"] = clarified_locations
-    
-    payload = {
-        "method": "tools/call",
-        "params": {
-            "name": tool_name,
-            "arguments": arguments
-        }
-    }
+        arguments["locations"] = [GAZETTEER.clarify(location.strip(), fuzzy=GAZETTEER.fuzzy_first) for location in arguments["locations"]]
     
     try:
-        response = requests.post(server_url, json=payload, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        return mcp_client.call_tool(server_url, tool_name, arguments, timeout=timeout)
     except Exception as e:
         return {"error": f"Failed to get data from {tool_name}: {str(e)}"}
 
+def iter_mcp_calls(plan, deadline):
+    """Run independent MCP calls concurrently, yielding (name, result) as each one finishes
+    
+    plan maps a name to (server_url, tool_name, arguments). Calls that miss the deadline come
+    back as errors, so the turn still answers with partial data.
+    """
+    futures = {}
+    for name, (server_url, tool_name, arguments) in plan.items():
+        timeout = max(1.0, deadline - time.monotonic())
+        futures[mcp_pool.submit(call_mcp_server, server_url, tool_name, arguments, timeout)] = name
+    
+    try:
+        for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+            name = futures.pop(future)
+            yield name, future.result()
+    except FuturesTimeoutError:
+        pass
+    
+    for future, name in futures.items():
+        future.cancel()
+        yield name, {"error": f"{name} missed the turn deadline"}
+
+def run_mcp_calls(plan, deadline):
+    """Run independent MCP calls concurrently and return whatever finished before the deadline"""
+    return dict(iter_mcp_calls(plan, deadline))
+
+def data_card(name, result):
+    """One-glance summary of a tool result, shown while the rest of the turn is still running"""
+    label = {"weather": "☀️ Weather", "daylight": "🌅 Daylight", "daylight_table": "🌅 Daylight"}.get(name, "🚗 Driving")
+    if "content" not in result:
+        return f"{label}: unavailable"
+    
+    key_markers = ("weather in", "°C", "Daylight", "Sunrise", "Sunset", "Driving Route", "Distance", "Estimated Time")
+    lines = []
+    for item in result["content"]:
+        text = item.get("text", "")
+        if text.startswith("❌"):
+            continue
+        lines.extend(
+            line.strip() for line in text.split("\n")
+            if any(marker in line for marker in key_markers) and not line.startswith("|")
+        )
+    return f"{label}\n" + "\n".join(lines[:6]) if lines else f"{label}: no data"
+
 def format_response(response, data_type="data"):
     """Format the response nicely"""
     if "error" in response:
@@ -302,85 +106,55 @@ def format_response(response, data_type="data"):
 
 # Replace the extract_locations_from_text function with this enhanced version:
 
+# Built once per process from the gazetteer's Scottish names and aliases; matching cost stays
+# flat however many places are added
+PLACE_MATCHER = PlaceMatcher((), aliases=GAZETTEER.spellings("scotland"))
+
+# Runs of capitalised words ("Fort Wiliam", "Kyle of Lochalch") that may be misspelt place names
+CAPITALISED_RUN = re.compile(r"\b[A-Z][\w']+(?:[ -](?:of|on|upon|[A-Z][\w']+))*")
+
+def fuzzy_mentions(text, mentions):
+    """Misspelt place names the exact matcher missed, resolved through the gazetteer's typo-tolerant lookup"""
+    found = []
+    for match in CAPITALISED_RUN.finditer(text):
+        if any(m.start < match.end() and match.start() < m.end for m in mentions):
+            continue
+        # The whole run first ("Kyle of Lochalch"), then its words one at a time
+        candidates = [match] + list(re.finditer(r"[A-Z][\w']+", match.group()))
+        for candidate in candidates:
+            place = GAZETTEER.spot(candidate.group())
+            if place and place.country == "scotland":
+                start = match.start() + (candidate.start() if candidate is not match else 0)
+                found.append(Mention(place.name, start, start + len(candidate.group())))
+                break
+    return found
+
 def extract_locations_from_text(text):
-    """Extract Scottish location names with better journey order detection"""
-    scottish_places = [
-        "Edinburgh", "Glasgow", "Aberdeen", "Dundee", "Stirling", "Inverness",
-        "Fort William", "Aviemore", "Perth", "Paisley", "Greenock", "Dunfermline",
-        "Kirkcaldy", "Ayr", "Kilmarnock", "Dumfries", "Oban", "Pitlochry",
-        "Callander", "Balloch", "Helensburgh", "Falkirk", "Livingston",
-        "Isle of Skye", "Skye", "Isle of Mull", "Mull", "Isle of Arran", "Arran", 
-        "Isle of Islay", "Islay", "Isle of Jura", "Jura", "Harris", "Lewis",
-        "Orkney", "Shetland", "Orkney Islands", "Shetland Islands",
-        "Ben Nevis", "Loch Lomond", "Loch Ness", "Cairngorms", "Glencoe",
-        "St Andrews", "Melrose", "Jedburgh", "Galashiels", "Hawick",
-        "Mallaig", "Kyle of Lochalsh", "Kyle", "Portree", "Tobermory",
-        "Tarbert", "Campbeltown", "Stranraer", "Thurso", "Wick",
-        "Ullapool", "Durness", "John O'Groats", "Lochinver", "Tongue",
-        "North Berwick", "Dunbar", "Stonehaven", "Montrose", "Arbroath",
-        "Dunkeld", "Crieff", "Aberfeldy", "Rothesay", "Dunoon", "Inveraray",
-        "Tyndrum", "Crianlarich", "Killin", "The Trossachs", "Trossachs"
-    ]
-    
-    # ENHANCED: Look for journey order keywords
-    text_lower = text.lower()
-    
-    # Check for journey order patterns
-    journey_patterns = [
-        r'start in (.*?) and then (?:go to |visit )(.*?) and then (.*?)(?:\.|$)',
-        r'from (.*?) to (.*?) (?:via |through |and then )(.*?)(?:\.|$)',
-        r'(.*?) to (.*?) to (.*?)(?:\.|$)',
-        r'(.*?) → (.*?) → (.*?)(?:\.|$)',
-        r'(.*?) then (.*?) then (.*?)(?:\.|$)'
-    ]
-    
-    # Try to extract ordered journey
-    for pattern in journey_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            ordered_locations = []
-            for group in match.groups():
-                group_clean = group.strip().replace(' and', '').replace(',', '')
-                # Find matching Scottish place
-                for place in scottish_places:
-                    if place.lower() in group_clean:
-                        if place not in ordered_locations:
-                            ordered_locations.append(place)
-                            break
-            
-            if len(ordered_locations) >= 2:
-                print(f"DEBUG: Found journey order: {ordered_locations}")
-                return ordered_locations
-    
-    # Fallback to original method if no journey pattern found
-    found_locations = []
-    text_upper = text.title()
-    
-    # Sort by length (descending) to match longer names first
-    sorted_places = sorted(scottish_places, key=len, reverse=True)
-    
-    for place in sorted_places:
-        if place in text_upper and place not in found_locations:
-            found_locations.append(place)
-    
-    # Try to reorder based on position in text for common journey words
+    """Extract Scottish location names in journey order with one pass of the place matcher"""
+    mentions = PLACE_MATCHER.find(text)
+    # Typos only cost a local lookup; de-duplicate against exact mentions of the same place
+    exact_names = {mention.name for mention in mentions}
+    mentions = sorted(
+        mentions + [m for m in fuzzy_mentions(text, mentions) if m.name not in exact_names],
+        key=lambda m: m.start
+    )
+    found_locations = [mention.name for mention in mentions]
+    
+    # Mentions come back in text order, which is journey order for "from A to B via C",
+    # "A then B then C" and "A → B → C"; only an explicit starting point needs moving
     if len(found_locations) >= 2:
-        journey_indicators = ['start', 'begin', 'first', 'then', 'next', 'finally', 'end']
-        
-        # Look for starting location
+        text_lower = text.lower()
         for indicator in ['start in', 'begin in', 'from']:
-            if indicator in text_lower:
-                for location in found_locations:
-                    location_pos = text_lower.find(location.lower())
-                    indicator_pos = text_lower.find(indicator)
-                    if location_pos > indicator_pos and location_pos - indicator_pos < 50:
-                        # Move this location to the front
-                        if location in found_locations:
-                            found_locations.remove(location)
-                            found_locations.insert(0, location)
-                        break
-    
-    print(f"DEBUG: Extracted locations (fallback): {found_locations}")
+            indicator_pos = text_lower.find(indicator)
+            if indicator_pos == -1:
+                continue
+            starting = next((m for m in mentions if 0 < m.start - indicator_pos < 50), None)
+            if starting:
+                found_locations.remove(starting.name)
+                found_locations.insert(0, starting.name)
+            break
+    
+    print(f"DEBUG: Extracted locations: {found_locations}")
     return found_locations
 
 def extract_date_from_text(text):
@@ -444,99 +218,23 @@ def should_get_driving_data(message):
     message_lower = message.lower()
     return any(keyword in message_lower for keyword in driving_keywords)
 
-def decode_polyline(polyline_str):
-    """Decode Google polyline string into lat/lon coordinates"""
-    try:
-        index = 0
-        lat = 0
-        lng = 0
-        coordinates = []
-        
-        while index < len(polyline_str):
-            # Decode latitude
-            shift = 0
-            result = 0
-            while True:
-                byte = ord(polyline_str[index]) - 63
-                index += 1
-                result |= (byte & 0x1f) << shift
-                shift += 5
-                if byte < 0x20:
-                    break
-            
-            dlat = ~(result >> 1) if result & 1 else result >> 1
-            lat += dlat
-            
-            # Decode longitude
-            shift = 0
-            result = 0
-            while True:
-                byte = ord(polyline_str[index]) - 63
-                index += 1
-                result |= (byte & 0x1f) << shift
-                shift += 5
-                if byte < 0x20:
-                    break
-            
-            dlng = ~(result >> 1) if result & 1 else result >> 1
-            lng += dlng
-            
-            coordinates.append([lat / 1e5, lng / 1e5])
-        
-        return coordinates
-    except Exception as e:
-        print(f"DEBUG: Polyline decode error: {e}")
-        return []
-
 def extract_route_geometry_from_mcp(mcp_response, locations):
-    """Extract real driving route coordinates from OpenRouteService API"""
+    """Decode the route geometry the driving MCP server returned with its result"""
     try:
-        if len(locations) >= 2:
-            start_lat = float(locations[0][1])
-            start_lon = float(locations[0][2]) 
-            end_lat = float(locations[1][1])
-            end_lon = float(locations[1][2])
-            
-            # Use your actual API key here
-            api_key = "MAP_API_KEY"  # ← Your real key
-            
-            url = "https://api.openrouteservice.org/v2/directions/driving-car"
-            headers = {
-                'Accept': 'application/json',
-                'Authorization': api_key
-            }
+        segments = mcp_response.get("structuredContent", {}).get("segments", [])
+        route_points = []
+        for segment in segments:
+            if not segment.get("geometry"):
+                # One leg without geometry: draw the whole route as straight lines
+                route_points = []
+                break
+            route_points.extend(decode_polyline_cached(segment["geometry"]).tolist())
+        
+        if route_points:
+            print(f"DEBUG: Decoded {len(route_points)} route points from {len(segments)} segment(s)")
+            return route_points
+        print("DEBUG: No route geometry in MCP response")
             
-            body = {
-                "coordinates": [[start_lon, start_lat], [end_lon, end_lat]],
-                "format": "geojson",
-                "radiuses": [5000, 5000]
-            }
-            
-            response = requests.post(url, headers=headers, json=body, timeout=10)
-            print(f"DEBUG: Got response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if 'routes' in data and len(data['routes']) > 0:
-                    route = data['routes'][0]
-                    
-                    if isinstance(route, dict) and 'geometry' in route:
-                        geometry = route['geometry']
-                        
-                        if isinstance(geometry, str):
-                            # It's an encoded polyline - decode it!
-                            print(f"DEBUG: Decoding polyline of length: {len(geometry)}")
-                            decoded_coords = decode_polyline(geometry)
-                            print(f"DEBUG: SUCCESS! Decoded {len(decoded_coords)} route points")
-                            return decoded_coords
-                        else:
-                            print(f"DEBUG: Geometry is not a string: {type(geometry)}")
-                    else:
-                        print(f"DEBUG: Route structure issue: {route}")
-                else:
-                    print(f"DEBUG: No routes in response")
-                    
     except Exception as e:
         print(f"DEBUG: Exception: {e}")
         import traceback
@@ -545,46 +243,6 @@ def extract_route_geometry_from_mcp(mcp_response, locations):
     # Fallback to straight line
     return [[locations[0][1], locations[0][2]], [locations[1][1], locations[1][2]]]
 
-def get_scottish_coordinates():
-    """Return coordinates for Scottish locations"""
-    return {
-        "edinburgh": [55.9533, -3.1883],
-        "glasgow": [55.8642, -4.2518],
-        "aberdeen": [57.1497, -2.0943],
-        "dundee": [56.4620, -2.9707],
-        "stirling": [56.1165, -3.9369],
-        "inverness": [57.4778, -4.2247],
-        "fort william": [56.8198, -5.1052],
-        "aviemore": [57.1952, -3.8263],
-        "perth": [56.3956, -3.4309],
-        "oban": [56.4154, -5.4713],
-        "pitlochry": [56.7028, -3.7340],
-        "isle of skye": [57.2740, -6.2149],
-        "skye": [57.2740, -6.2149],
-        "isle of mull": [56.4504, -5.8037],
-        "mull": [56.4504, -5.8037],
-        "isle of arran": [55.5836, -5.2489],
-        "arran": [55.5836, -5.2489],
-        "mallaig": [57.0067, -5.8283],
-        "portree": [57.4123, -6.1956],
-        "tobermory": [56.6229, -6.0679],
-        "glencoe": [56.6756, -5.1019],
-        "glen coe": [56.6756, -5.1019],
-        "ben nevis": [56.7969, -5.0037],
-        "st andrews": [56.3398, -2.7967],
-        "cairngorms": [57.0833, -3.6667],
-        "loch lomond": [56.1000, -4.6000],
-        "loch ness": [57.3229, -4.4244],
-        "kyle of lochalsh": [57.2785, -5.7127],
-        "kyle": [57.2785, -5.7127],
-        "thurso": [58.5944, -3.5267],
-        "wick": [58.4394, -3.0956],
-        "ullapool": [57.8952, -5.1587],
-        "durness": [58.5667, -4.7167],
-        "cairngorms": [57.0833, -3.6667],
-        "cairngorms national park": [57.1952, -3.8263]
-    }
-
 def create_map_html(locations=[], routes=[], center_lat=56.8, center_lon=-4.2, zoom=6):
     """Generate interactive map using Folium with real driving routes"""
     try:
@@ -613,6 +271,8 @@ def create_map_html(locations=[], routes=[], center_lat=56.8, center_lon=-4.2, z
         
         # Add actual driving route if available
         if routes and len(routes) > 1:
+            # Only the detail visible at the zoom the map will open at goes into the HTML
+            routes = level_of_detail(routes)
             folium.PolyLine(
                 routes,
                 color='red',
@@ -631,14 +291,15 @@ def create_map_html(locations=[], routes=[], center_lat=56.8, center_lon=-4.2, z
 
 def extract_locations_and_routes_from_conversation(message, locations_mentioned):
     """Extract locations and potential routes from current message and conversation context"""
-    coords_db = get_scottish_coordinates()
-    
     # Get coordinates for mentioned locations
     location_coords = []
     for location in locations_mentioned:
-        location_key = location.lower().strip()
-        if location_key in coords_db:
-            lat, lon = coords_db[location_key]
+        coords = GAZETTEER.coordinates(location)
+        if not coords and GEOCODER:
+            hit = GEOCODER.lookup(location)
+            coords = (hit.lat, hit.lon) if hit else None
+        if coords:
+            lat, lon = coords
             location_coords.append((location, lat, lon))
         else:
             print(f"DEBUG: Location '{location}' not found in coordinates database")
@@ -657,7 +318,14 @@ def extract_locations_and_routes_from_conversation(message, locations_mentioned)
 # Replace your intelligent_weather_chat function with this stabilized version
 
 def intelligent_weather_chat(message, history):
-    """Comprehensive chat with weather + daylight + driving data - STABILIZED VERSION"""
+    """Comprehensive chat with weather + daylight + driving data, streamed as it arrives
+    
+    Yields (history, textbox, map) updates: tool summaries as each call lands, then the
+    model's answer token by token, then the map once everything else is on screen.
+    """
+    history.append([message, "🔎 Looking that up..."])
+    yield history, "", gr.update()
+    
     try:
         # MAKE SURE THESE VARIABLES ARE INITIALIZED AT THE TOP
         locations = extract_locations_from_text(message)
@@ -684,25 +352,55 @@ def intelligent_weather_chat(message, history):
         daylight_data = {}
         driving_data = {}
         
-        # Fetch weather data for up to 2 locations (reduced from 3)
-        if get_weather:
-            for location in locations[:2]:
-                current_weather = call_mcp_server(WEATHER_MCP_URL, "get_weather", {"location": location})
-                if "content" in current_weather:
-                    weather_data[location] = format_response(current_weather, "weather")
-        
-        # Fetch daylight data for up to 2 locations
-        if get_daylight:
-            for location in locations[:2]:
-                daylight_args = {"location": location}
-                if date:
-                    daylight_args["date"] = date
-                
-                daylight_times = call_mcp_server(DAYLIGHT_MCP_URL, "get_daylight_times", daylight_args)
-                if "content" in daylight_times:
-                    daylight_data[location] = format_response(daylight_times, "daylight")
-        
-        # Fetch driving data for 2+ locations
+        # Plan every MCP call for this turn up front, then run them all at once
+        plan = {}
+        if get_weather and locations:
+            # One batched call for every location (one geocode pass + one forecast request)
+            plan["weather"] = (WEATHER_MCP_URL, "get_weather_batch", {"locations": list(locations)})
+        
+        # Daylight: full detail for one location, one table call for several
+        if get_daylight and len(locations) == 1:
+            daylight_args = {"location": locations[0]}
+            if date:
+                daylight_args["date"] = date
+            plan["daylight"] = (DAYLIGHT_MCP_URL, "get_daylight_times", daylight_args)
+        elif get_daylight and locations:
+            table_args = {"locations": list(locations), "days": 1}
+            if date:
+                table_args["start_date"] = date
+            plan["daylight_table"] = (DAYLIGHT_MCP_URL, "get_daylight_table", table_args)
+        
+        # Driving: one call per consecutive pair of locations
+        if get_driving and len(locations) >= 2:
+            for i in range(len(locations) - 1):
+                plan[f"driving_{i}"] = (
+                    DRIVING_MCP_URL,
+                    "get_driving_distance",
+                    {"from_location": locations[i], "to_location": locations[i + 1]}
+                )
+        
+        deadline = time.monotonic() + TURN_DEADLINE_SECONDS
+        results = {}
+        cards = []
+        for name, result in iter_mcp_calls(plan, deadline):
+            results[name] = result
+            cards.append(data_card(name, result))
+            history[-1][1] = "\n\n".join(cards) + "\n\n_Putting your plan together..._"
+            yield history, "", gr.update()
+        
+        if "content" in results.get("weather", {}):
+            for location, item in zip(locations, results["weather"]["content"]):
+                if not item.get("text", "").startswith("❌"):
+                    weather_data[location] = item["text"]
+        
+        if "content" in results.get("daylight", {}):
+            daylight_data[locations[0]] = format_response(results["daylight"], "daylight")
+        elif "content" in results.get("daylight_table", {}):
+            for location, item in zip(locations, results["daylight_table"]["content"]):
+                if not item.get("text", "").startswith("❌"):
+                    daylight_data[location] = item["text"]
+        
+        # Process driving data for 2+ locations
         if get_driving and len(locations) >= 2:
             try:
                 # GET LOCATION COORDINATES FIRST
@@ -710,15 +408,7 @@ def intelligent_weather_chat(message, history):
                 print(f"DEBUG: location_coords for route: {location_coords}")
                 
                 if len(locations) == 2:
-                    print(f"DEBUG: About to call driving MCP for {locations}")
-                    driving_result = call_mcp_server(
-                        DRIVING_MCP_URL, 
-                        "get_driving_distance", 
-                        {
-                            "from_location": locations[0],
-                            "to_location": locations[1]
-                        }
-                    )
+                    driving_result = results.get("driving_0", {})
                     if "content" in driving_result:
                         driving_data[f"{locations[0]} → {locations[1]}"] = format_response(driving_result, "driving")
                         # Extract route geometry
@@ -733,21 +423,11 @@ def intelligent_weather_chat(message, history):
                     all_route_points = []
                     driving_segments = []
                     
-                    # Create route segments between consecutive locations
+                    # Combine route segments between consecutive locations
                     for i in range(len(locations) - 1):
                         from_loc = locations[i]
                         to_loc = locations[i + 1]
-                        
-                        print(f"DEBUG: Getting segment {from_loc} → {to_loc}")
-                        
-                        driving_result = call_mcp_server(
-                            DRIVING_MCP_URL, 
-                            "get_driving_distance", 
-                            {
-                                "from_location": from_loc,
-                                "to_location": to_loc
-                            }
-                        )
+                        driving_result = results.get(f"driving_{i}", {})
                         
                         if "content" in driving_result:
                             segment_info = format_response(driving_result, "driving")
@@ -777,13 +457,12 @@ def intelligent_weather_chat(message, history):
                     # Combine driving info
                     if driving_segments:
                         driving_data["Multi-Stop Route"] = "\n\n".join(driving_segments)
-                    else:
-                        # Fallback to road trip planner
-                        driving_result = call_mcp_server(
-                            DRIVING_MCP_URL,
-                            "plan_road_trip",
-                            {"locations": locations[:4]}
-                        )
+                    elif time.monotonic() < deadline:
+                        # Fallback to road trip planner, within whatever is left of the turn budget
+                        driving_result = run_mcp_calls(
+                            {"road_trip": (DRIVING_MCP_URL, "plan_road_trip", {"locations": locations[:4]})},
+                            deadline
+                        ).get("road_trip", {})
                         if "content" in driving_result:
                             driving_data["Road Trip Plan"] = format_response(driving_result, "driving")
                             # Use straight lines as last resort
@@ -838,7 +517,8 @@ Give a helpful, natural response under 200 words focusing on their Scottish adve
         print(f"DEBUG: Context length: {len(user_message)} chars")
         
         # SEVERELY LIMIT conversation history to prevent token overflow
-        recent_history = history[-2:] if len(history) > 2 else history
+        # (the last entry is this turn's placeholder; the question itself goes in below)
+        recent_history = history[:-1][-2:]
         
         messages = [{"role": "system", "content": system_prompt}]
         
@@ -852,17 +532,24 @@ Give a helpful, natural response under 200 words focusing on their Scottish adve
         messages.append({"role": "user", "content": user_message})
         
         # STABILIZED AI PARAMETERS
-        response = client.chat.completions.create(
+        stream = client.chat.completions.create(
             model="deepseek-ai/DeepSeek-V3",
             messages=messages,
             max_tokens=300,  # Severely reduced
             temperature=0.1,  # Much more conservative
             top_p=0.9,       # Add top_p for stability
             frequency_penalty=0.3,  # Prevent repetition
-            presence_penalty=0.1
+            presence_penalty=0.1,
+            stream=True
         )
         
-        bot_response = response.choices[0].message.content
+        # Stream tokens into the chat as they arrive
+        bot_response = ""
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                bot_response += chunk.choices[0].delta.content
+                history[-1][1] = bot_response
+                yield history, "", gr.update()
         
         # RESPONSE VALIDATION - catch broken responses
         if (
@@ -896,6 +583,8 @@ Give a helpful, natural response under 200 words focusing on their Scottish adve
                 bot_response = "I can help you plan your Scottish adventure! Try asking about specific locations like 'weather in Edinburgh' or 'drive from Glasgow to Skye'."
         
         print(f"DEBUG: Final response length: {len(bot_response)} chars")
+        history[-1][1] = bot_response
+        yield history, "", gr.update()
         
         # ========== MAP UPDATE LOGIC ==========
         # Extract locations and routes for map
@@ -930,8 +619,8 @@ Give a helpful, natural response under 200 words focusing on their Scottish adve
         updated_map_html = create_map_html()
         location_coords = []  # ← ADD THIS LINE
     
-    history.append([message, bot_response])
-    return history, "", updated_map_html
+    history[-1][1] = bot_response
+    yield history, "", updated_map_html
 
 # Create the ultimate Scottish adventure planning interface
 with gr.Blocks(title="🏴󠁧󠁢󠁳󠁣󠁴󠁿 Scotland Adventure Planner", theme=gr.themes.Soft()) as app:
@@ -988,7 +677,7 @@ with gr.Blocks(title="🏴󠁧󠁢󠁳󠁣󠁴󠁿 Scotland Adventure Planner",
     example7.click(lambda: "Weather and driving route from Perth to Fort William", outputs=msg)
     example8.click(lambda: "Hiking weather around Ben Nevis area", outputs=msg)
     
-    gr.Markdown("*Powered by Open-Meteo weather data, Sunrise-Sunset API, OpenRouteService routing, custom MCP servers, and Nebius AI Studio*")
+    gr.Markdown("*Powered by Open-Meteo weather data, NOAA solar calculations, OpenRouteService routing, custom MCP servers, and Nebius AI Studio*")
 
 if __name__ == "__main__":
     app.launch(share=True)
@@ -0,0 +1,153 @@
+import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
+import hashlib
+import heapq
+import math
+
+# Web Mercator ground resolution at the equator, zoom 0 (metres per 256px tile pixel)
+EQUATOR_METRES_PER_PIXEL = 156543.03392
+
+def decode_polyline(encoded: str, precision: int = 5) -> np.ndarray:
+    """Decode an encoded polyline into an (n, 2) array of [lat, lon], without a per-character Python loop"""
+    if not encoded:
+        return np.empty((0, 2))
+    
+    chunks = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    # Each value is a run of 5-bit chunks; a chunk without the 0x20 continuation bit ends the run
+    is_last = chunks < 0x20
+    run_starts = np.concatenate(([0], np.flatnonzero(is_last)[:-1] + 1))
+    position = np.arange(len(chunks)) - np.repeat(run_starts, np.diff(np.append(run_starts, len(chunks))))
+    values = np.add.reduceat((chunks & 0x1F) << (5 * position), run_starts)
+    
+    # Zig-zag decode, then the deltas alternate lat, lon
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    if len(deltas) % 2:
+        raise ValueError("Truncated polyline")
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** precision
+
+@lru_cache(maxsize=256)
+def decode_polyline_cached(encoded: str) -> np.ndarray:
+    """Decoded legs are reused across chat turns; callers must not modify the result"""
+    return decode_polyline(encoded)
+
+def _project(points: np.ndarray) -> np.ndarray:
+    """Equirectangular projection to metres around the route's mean latitude (plenty for Scotland-sized routes)"""
+    lat0 = math.radians(float(points[:, 0].mean()))
+    metres_per_degree = 111_320.0
+    return np.column_stack((
+        points[:, 1] * metres_per_degree * math.cos(lat0),
+        points[:, 0] * metres_per_degree
+    ))
+
+def douglas_peucker(points: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """Indices of the vertices kept by Douglas-Peucker; distances for each span are computed in one vector op"""
+    n = len(points)
+    if n < 3:
+        return np.arange(n)
+    
+    xy = _project(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        
+        a, b = xy[start], xy[end]
+        span = xy[start + 1:end]
+        ab = b - a
+        length = math.hypot(ab[0], ab[1])
+        if length == 0:
+            distances = np.hypot(span[:, 0] - a[0], span[:, 1] - a[1])
+        else:
+            distances = np.abs(ab[0] * (span[:, 1] - a[1]) - ab[1] * (span[:, 0] - a[0])) / length
+        
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return np.flatnonzero(keep)
+
+def visvalingam(points: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """Indices kept by Visvalingam-Whyatt, dropping vertices whose triangle area is below tolerance_m squared"""
+    n = len(points)
+    if n < 3:
+        return np.arange(n)
+    
+    xy = _project(points)
+    
+    def area(i, j, k):
+        return abs((xy[j, 0] - xy[i, 0]) * (xy[k, 1] - xy[i, 1]) - (xy[k, 0] - xy[i, 0]) * (xy[j, 1] - xy[i, 1])) / 2
+    
+    previous = list(range(-1, n - 1))
+    following = list(range(1, n + 1))
+    removed = [False] * n
+    heap = [(area(i - 1, i, i + 1), i) for i in range(1, n - 1)]
+    heapq.heapify(heap)
+    threshold = tolerance_m ** 2
+    
+    while heap:
+        effective_area, i = heapq.heappop(heap)
+        if removed[i] or effective_area != area(previous[i], i, following[i]):
+            continue  # stale entry: a neighbour was removed since it was pushed
+        if effective_area >= threshold:
+            break
+        removed[i] = True
+        before, after = previous[i], following[i]
+        following[before], previous[after] = after, before
+        for j in (before, after):
+            if 0 < j < n - 1:
+                heapq.heappush(heap, (area(previous[j], j, following[j]), j))
+    return np.flatnonzero(~np.array(removed))
+
+def fit_zoom(points: np.ndarray, width_px: int = 800, height_px: int = 500, max_zoom: int = 18) -> int:
+    """The zoom level Leaflet's fitBounds picks for these points on a map of the given size"""
+    lat_min, lon_min = points.min(axis=0)
+    lat_max, lon_max = points.max(axis=0)
+    
+    def mercator_y(lat):
+        return math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+    
+    # Fraction of the world width/height the route spans
+    x_fraction = max((lon_max - lon_min) / 360, 1e-9)
+    y_fraction = max((mercator_y(lat_max) - mercator_y(lat_min)) / (2 * math.pi), 1e-9)
+    zoom = min(math.log2(width_px / 256 / x_fraction), math.log2(height_px / 256 / y_fraction))
+    return max(0, min(max_zoom, int(math.floor(zoom))))
+
+def tolerance_for_zoom(zoom: int, latitude: float, pixels: float = 1.0) -> float:
+    """Ground distance covered by `pixels` screen pixels at this zoom - detail below it is invisible"""
+    return EQUATOR_METRES_PER_PIXEL * math.cos(math.radians(latitude)) / 2 ** zoom * pixels
+
+_lod_cache: OrderedDict[Tuple[str, int, str], List[List[float]]] = OrderedDict()
+LOD_CACHE_SIZE = 128
+
+def level_of_detail(points, zoom: Optional[int] = None, method: str = "douglas_peucker", width_px: int = 800, height_px: int = 500) -> List[List[float]]:
+    """Simplify a route for display, at the zoom given or the one the map will fit it to
+    
+    Results are cached per (route, zoom), so redrawing the same trip on later turns is free.
+    Coordinates are rounded to 5 decimals (about 1 m) to keep the inlined HTML small.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) < 3:
+        return points.tolist()
+    
+    if zoom is None:
+        zoom = fit_zoom(points, width_px, height_px)
+    key = (hashlib.sha1(points.tobytes()).hexdigest(), zoom, method)
+    if key in _lod_cache:
+        _lod_cache.move_to_end(key)
+        return _lod_cache[key]
+    
+    tolerance = tolerance_for_zoom(zoom, float(points[:, 0].mean()))
+    simplify = visvalingam if method == "visvalingam" else douglas_peucker
+    simplified = np.round(points[simplify(points, tolerance)], 5).tolist()
+    
+    _lod_cache[key] = simplified
+    while len(_lod_cache) > LOD_CACHE_SIZE:
+        _lod_cache.popitem(last=False)
+    return simplified
@@ -0,0 +1,232 @@
+import requests
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo
+import copy
+import json
+import random
+import threading
+import time
+
+# Worth retrying: the server is overloaded, restarting or cold-starting a container
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+# How long a successful result stays fresh, per tool (seconds). Tools not listed are never cached.
+TOOL_TTLS = {
+    "get_weather": 10 * 60,
+    "get_weather_batch": 10 * 60,
+    "get_forecast": 30 * 60,
+    "get_daylight_times": 24 * 3600,
+    "get_daylight_table": 24 * 3600,
+    "get_driving_distance": 14 * 24 * 3600,
+    "plan_road_trip": 14 * 24 * 3600,
+    "search_routes": 24 * 3600
+}
+
+# Tools that default to "today" when no date is given - the date is part of their cache key
+DATE_SENSITIVE_TOOLS = {"get_forecast", "get_daylight_times", "get_daylight_table"}
+# The servers' "today" is UK time, not the host's clock
+LONDON = ZoneInfo("Europe/London")
+
+class ResponseCache:
+    """TTL cache of MCP results keyed on (server, tool, normalized arguments), with singleflight
+    
+    Concurrent identical calls share one upstream request: the first caller fetches, the rest
+    wait on its result. Errors are never cached. Every caller gets its own copy of a result, so
+    callers can annotate what they get back without touching the cached entry.
+    """
+    
+    def __init__(self, ttls: Dict[str, float] = TOOL_TTLS, max_entries: int = 1024):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+    
+    def _normalize(self, value):
+        if isinstance(value, str):
+            return " ".join(value.lower().split())
+        if isinstance(value, dict):
+            return {k: self._normalize(v) for k, v in value.items() if v is not None}
+        if isinstance(value, (list, tuple)):
+            # Order matters for batches and trips, so lists are kept as given
+            return [self._normalize(v) for v in value]
+        return value
+    
+    def key(self, server_url: str, tool_name: str, arguments: Dict[str, Any]) -> str:
+        normalized = self._normalize(arguments)
+        if tool_name in DATE_SENSITIVE_TOOLS:
+            normalized["_today"] = datetime.now(LONDON).date().isoformat()
+        return f"{server_url}|{tool_name}|{json.dumps(normalized, sort_keys=True)}"
+    
+    def get_or_fetch(self, server_url: str, tool_name: str, arguments: Dict[str, Any], fetch: Callable[[], Dict[str, Any]], timeout: Optional[float] = None) -> Dict[str, Any]:
+        ttl = self.ttls.get(tool_name, 0)
+        if ttl <= 0:
+            return fetch()
+        
+        key = self.key(server_url, tool_name, arguments)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            return copy.deepcopy(future.result(timeout=timeout))
+        
+        try:
+            result = fetch()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            # Waiters and the cache each copy this; the caller keeps the original
+            future.set_result(copy.deepcopy(result))
+            if "error" not in result:
+                with self._lock:
+                    self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(result))
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+class MCPClient:
+    """Shared client for every MCP server the chatbot talks to
+    
+    One requests.Session keeps TLS connections to each *.modal.run host alive between calls,
+    with at most `connections_per_server` calls in flight per host; extra callers wait for a free
+    slot, but never past their timeout. Failed calls are retried with jittered exponential backoff,
+    and every call's latency is recorded per (server, tool).
+    """
+    
+    def __init__(self, connections_per_server: int = 8, retries: int = 2, backoff: float = 0.25, max_backoff: float = 2.0, timeout: float = 30, cache: Optional[ResponseCache] = None):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.connections_per_server = connections_per_server
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=connections_per_server)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        self._lock = threading.Lock()
+        # The per-host limit: a pool_block'd adapter would wait for a connection with no timeout at all
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._stats: Dict[tuple, Dict[str, Any]] = {}
+        self.cache = cache or ResponseCache()
+    
+    def call_tool(self, server_url: str, tool_name: str, arguments: Dict[str, Any], timeout: Optional[float] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """POST a tools/call request and return the decoded JSON; raises once retries are exhausted
+        
+        timeout bounds the whole call including retries, so it can be given a turn's remaining budget.
+        Results of cacheable tools are served from the response cache while fresh.
+        """
+        if use_cache:
+            return self.cache.get_or_fetch(
+                server_url, tool_name, arguments,
+                lambda: self._post(server_url, tool_name, arguments, timeout),
+                timeout=self.timeout if timeout is None else timeout
+            )
+        return self._post(server_url, tool_name, arguments, timeout)
+    
+    def _post(self, server_url: str, tool_name: str, arguments: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        payload = {
+            "method": "tools/call",
+            "params": {
+                "name": tool_name,
+                "arguments": arguments
+            }
+        }
+        budget = self.timeout if timeout is None else timeout
+        give_up_at = time.monotonic() + budget
+        start = time.monotonic()
+        attempt = 0
+        slot = self._slot(server_url)
+        
+        while True:
+            try:
+                if not slot.acquire(timeout=max(0.0, give_up_at - time.monotonic())):
+                    raise requests.Timeout(f"No free connection to {server_url} within {budget}s")
+                try:
+                    response = self.session.post(server_url, json=payload, timeout=max(0.5, give_up_at - time.monotonic()))
+                finally:
+                    slot.release()
+                if response.status_code in RETRYABLE_STATUS and attempt < self.retries:
+                    raise requests.HTTPError(f"{response.status_code} from {server_url}", response=response)
+                response.raise_for_status()
+                result = response.json()
+                self._record(server_url, tool_name, time.monotonic() - start, attempt, error=False)
+                return result
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                retryable = not isinstance(e, requests.HTTPError) or (
+                    e.response is not None and e.response.status_code in RETRYABLE_STATUS
+                )
+                # Full jitter keeps concurrent Gradio users from retrying in lockstep
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                if not retryable or attempt >= self.retries or time.monotonic() + delay >= give_up_at:
+                    self._record(server_url, tool_name, time.monotonic() - start, attempt, error=True)
+                    raise
+                attempt += 1
+                time.sleep(delay)
+    
+    def _slot(self, server_url: str) -> threading.BoundedSemaphore:
+        host = urlparse(server_url).netloc
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.connections_per_server)
+            return self._slots[host]
+    
+    def _record(self, server_url: str, tool_name: str, seconds: float, retries: int, error: bool) -> None:
+        key = (urlparse(server_url).netloc, tool_name)
+        with self._lock:
+            entry = self._stats.setdefault(key, {"calls": 0, "errors": 0, "retries": 0, "latencies": deque(maxlen=256)})
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["retries"] += retries
+            entry["latencies"].append(seconds)
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-server, per-tool call counts and latency percentiles over the most recent calls"""
+        report = {"cache": self.cache.stats()}
+        with self._lock:
+            for (server, tool_name), entry in self._stats.items():
+                latencies = sorted(entry["latencies"])
+                report[f"{server} {tool_name}"] = {
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "retries": entry["retries"],
+                    "p50_ms": round(latencies[len(latencies) // 2] * 1000),
+                    "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000)
+                }
+        return report
+    
+    def close(self) -> None:
+        self.session.close()
+
+# One client per process, shared by the Gradio app and the agent
+mcp_client = MCPClient()
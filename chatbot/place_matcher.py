@@ -0,0 +1,88 @@
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+class Mention(NamedTuple):
+    name: str  # the place as the gazetteer spells it
+    start: int  # span in the original text
+    end: int
+
+class PlaceMatcher:
+    """Aho-Corasick matcher over place names, built once and reused for every message
+    
+    find() walks the text once, whatever the number of names, and returns whole-word
+    mentions in text order: overlaps resolve to the leftmost, then longest, match
+    ("Isle of Skye" rather than "Skye"), and repeats of a place are dropped.
+    """
+    
+    def __init__(self, names: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        # State 0 is the root; each state has child edges, a failure link and the patterns ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self._names: List[str] = []
+        self._lengths: List[int] = []
+        
+        surfaces = {name.lower(): name for name in names}
+        for alias, name in (aliases or {}).items():
+            surfaces[alias.lower()] = name
+        for surface, name in surfaces.items():
+            self._add(surface, name)
+        self._build_links()
+    
+    def _add(self, surface: str, name: str) -> None:
+        state = 0
+        for char in surface:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append(len(self._names))
+        self._names.append(name)
+        self._lengths.append(len(surface))
+    
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                if state:
+                    fallback = self._fail[state]
+                    while fallback and char not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[child] = self._goto[fallback].get(char, 0)
+                # Inherit the shorter patterns that end here too (e.g. "skye" inside "isle of skye")
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+    
+    def find(self, text: str) -> List[Mention]:
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lower-cased; map them one at a time to keep spans aligned
+            lowered = "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+        
+        candidates = []
+        state = 0
+        for i, char in enumerate(lowered):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern in self._output[state]:
+                start = i + 1 - self._lengths[pattern]
+                # Whole words only: "Ayr" must not match inside "Ayrshire" or "prayer"
+                if (start == 0 or not lowered[start - 1].isalnum()) and (i + 1 == len(lowered) or not lowered[i + 1].isalnum()):
+                    candidates.append((start, -(i + 1), pattern))
+        
+        mentions = []
+        seen = set()
+        last_end = 0
+        for start, negative_end, pattern in sorted(candidates):
+            if start < last_end:
+                continue
+            last_end = -negative_end
+            name = self._names[pattern]
+            if name not in seen:
+                seen.add(name)
+                mentions.append(Mention(name, start, last_end))
+        return mentions
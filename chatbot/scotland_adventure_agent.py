@@ -1,8 +1,14 @@
-import requests
 import json
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import re
+from mcp_client import MCPClient, mcp_client
+from place_matcher import PlaceMatcher
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scotland_common import get_gazetteer
 
 class ScotlandAdventureAgent:
     """
@@ -10,9 +16,13 @@ class ScotlandAdventureAgent:
     to help plan adventures in Scotland
     """
     
-    def __init__(self, weather_url: str, routes_url: str):
+    # Every Scottish place and alias in the gazetteer, compiled once for all agents
+    location_matcher = PlaceMatcher((), aliases=get_gazetteer().spellings("scotland"))
+    
+    def __init__(self, weather_url: str, routes_url: str, client: Optional[MCPClient] = None):
         self.weather_url = weather_url.rstrip('/')
         self.routes_url = routes_url.rstrip('/')
+        self.client = client or mcp_client
         self.conversation_history = []
         
     def chat(self, user_message: str) -> str:
@@ -82,19 +92,12 @@ class ScotlandAdventureAgent:
     
     def _extract_location(self, message: str) -> Optional[str]:
         """Extract location mentions from the message"""
-        # Common Scottish locations
-        scottish_locations = [
-            "highlands", "cairngorms", "trossachs", "borders", "dumfries", "galloway",
-            "loch lomond", "ben nevis", "glencoe", "skye", "isle of skye", "mull",
-            "edinburgh", "glasgow", "stirling", "fort william", "inverness", "perth",
-            "oban", "pitlochry", "aviemore", "ballater", "braemar", "dunkeld"
-        ]
+        # First known place in the message, matched on whole words
+        mentions = self.location_matcher.find(message)
+        if mentions:
+            return mentions[0].name
         
         message_lower = message.lower()
-        for location in scottish_locations:
-            if location in message_lower:
-                return location.title()
-        
         # Look for "near X" or "around X" patterns
         near_patterns = [r"near (\w+)", r"around (\w+)", r"in (\w+)", r"at (\w+)"]
         for pattern in near_patterns:
@@ -247,30 +250,17 @@ class ScotlandAdventureAgent:
         try:
             if time_frame in ["weekend", "next_week", "this_week"]:
                 # Get forecast
-                payload = {
-                    "method": "tools/call",
-                    "params": {
-                        "name": "get_forecast",
-                        "arguments": {
-                            "location": location,
-                            "days": 5 if time_frame == "next_week" else 3
-                        }
-                    }
+                tool_name = "get_forecast"
+                arguments = {
+                    "location": location,
+                    "days": 5 if time_frame == "next_week" else 3
                 }
             else:
                 # Get current weather
-                payload = {
-                    "method": "tools/call", 
-                    "params": {
-                        "name": "get_weather",
-                        "arguments": {"location": location}
-                    }
-                }
+                tool_name = "get_weather"
+                arguments = {"location": location}
             
-            response = requests.post(f"{self.weather_url}/mcp", json=payload, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.client.call_tool(f"{self.weather_url}/mcp", tool_name, arguments, timeout=10)
             if "content" in data and data["content"]:
                 return data["content"][0]["text"]
             
@@ -303,18 +293,7 @@ class ScotlandAdventureAgent:
             
             arguments["max_results"] = 5  # Limit results for better display
             
-            payload = {
-                "method": "tools/call",
-                "params": {
-                    "name": "search_routes",
-                    "arguments": arguments
-                }
-            }
-            
-            response = requests.post(f"{self.routes_url}/mcp", json=payload, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.client.call_tool(f"{self.routes_url}/mcp", "search_routes", arguments, timeout=10)
             if "content" in data and data["content"]:
                 return data["content"][0]["text"]
             
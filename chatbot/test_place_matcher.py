@@ -0,0 +1,46 @@
+import random
+import re
+import sys
+from pathlib import Path
+
+from place_matcher import Mention, PlaceMatcher
+
+# scotland_common lives at the repo root, as it does for app.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scotland_common import get_gazetteer
+
+ALIASES = get_gazetteer().spellings("scotland")
+
+def regex_reference(text, aliases):
+    """What find() should return, one regex per spelling: leftmost, then longest, whole-word matches"""
+    candidates = []
+    for surface, name in aliases.items():
+        for match in re.finditer(rf"(?<![^\W_]){re.escape(surface.lower())}(?![^\W_])", text.lower()):
+            candidates.append((match.start(), -match.end(), name))
+    mentions, seen, last_end = [], set(), 0
+    for start, negative_end, name in sorted(candidates, key=lambda c: (c[0], c[1])):
+        if start < last_end:
+            continue
+        last_end = -negative_end
+        if name not in seen:
+            seen.add(name)
+            mentions.append(Mention(name, start, last_end))
+    return mentions
+
+def test_examples():
+    matcher = PlaceMatcher((), aliases=ALIASES)
+    assert [m.name for m in matcher.find("Drive from Edinburgh to the Isle of Skye via Fort William")] == ["Edinburgh", "Isle of Skye", "Fort William"]
+    assert matcher.find("Ayrshire prayer meetings") == []
+    assert [(m.start, m.end) for m in matcher.find("Oban, then OBAN again")] == [(0, 4)]
+
+def test_matches_regex_reference():
+    rng = random.Random(17)
+    matcher = PlaceMatcher((), aliases=ALIASES)
+    spellings = list(ALIASES)
+    filler = ["the", "and", "to", "walk", "near", "isle", "of", "loch", "fort", "kyle", "prayer", "ayrshire", "st", "glen"]
+    separators = [" ", " ", " ", ", ", ". ", "-", "'s "]
+    for _ in range(300):
+        words = [rng.choice(spellings if rng.random() < 0.3 else filler) for _ in range(rng.randint(1, 12))]
+        words = [word.title() if rng.random() < 0.5 else word for word in words]
+        text = "".join(word + rng.choice(separators) for word in words)
+        assert matcher.find(text) == regex_reference(text, ALIASES), text
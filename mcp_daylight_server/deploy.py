@@ -1,20 +1,198 @@
 import modal
-from typing import Dict, Any
-import requests
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Sequence
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 import json
+import math
+import asyncio
+import numpy as np
+from scotland_common import MCPServer, create_app, get_gazetteer, get_geocoder, not_shipped
 
-class SimpleDaylightMCP:
+LONDON = ZoneInfo("Europe/London")
+
+# Sun elevations (degrees) that define each daylight event
+SUNRISE_ELEVATION = -0.833  # upper limb on the horizon, allowing for refraction
+GOLDEN_HOUR_ELEVATION = 6.0
+BLUE_HOUR_ELEVATION = -4.0
+CIVIL_TWILIGHT_ELEVATION = -6.0
+NAUTICAL_TWILIGHT_ELEVATION = -12.0
+ASTRONOMICAL_TWILIGHT_ELEVATION = -18.0
+
+# (morning event, evening event, elevation) - golden hour runs from -4° to +6°, blue hour from -6° to -4°
+SOLAR_EVENTS = (
+    ("sunrise", "sunset", SUNRISE_ELEVATION),
+    ("golden_hour_morning_end", "golden_hour_evening_start", GOLDEN_HOUR_ELEVATION),
+    ("blue_hour_morning_end", "blue_hour_evening_start", BLUE_HOUR_ELEVATION),
+    ("civil_dawn", "civil_dusk", CIVIL_TWILIGHT_ELEVATION),
+    ("nautical_dawn", "nautical_dusk", NAUTICAL_TWILIGHT_ELEVATION),
+    ("astronomical_dawn", "astronomical_dusk", ASTRONOMICAL_TWILIGHT_ELEVATION)
+)
+# Either event name selects its pair: "sunrise" and "sunset" both mean sunrise/sunset
+SOLAR_EVENT_PAIRS = {name: event for event in SOLAR_EVENTS for name in event[:2]}
+# How close to ±1 solar_table lets an interpolated cos(hour angle) come before redoing the cell exactly
+MARGINAL_COS_HOUR_ANGLE = 1e-4
+
+def _julian_day(day: date) -> float:
+    """Julian day number at 00:00 UTC on the given date"""
+    return day.toordinal() + 1721424.5
+
+def _sun_position(jd, xp=math) -> tuple:
+    """Solar declination (radians) and equation of time (minutes) using the NOAA algorithm
+    
+    Pass xp=numpy to evaluate a whole array of Julian days at once.
+    """
+    t = (jd - 2451545.0) / 36525.0
+    
+    mean_long = xp.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anom = xp.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccentricity = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+    
+    center = xp.radians(
+        xp.sin(mean_anom) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + xp.sin(2 * mean_anom) * (0.019993 - 0.000101 * t)
+        + xp.sin(3 * mean_anom) * 0.000289
+    )
+    omega = xp.radians(125.04 - 1934.136 * t)
+    apparent_long = mean_long + center - xp.radians(0.00569 + 0.00478 * xp.sin(omega))
+    
+    mean_obliquity = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliquity = xp.radians(mean_obliquity + 0.00256 * xp.cos(omega))
+    
+    declination = xp.asin(xp.sin(obliquity) * xp.sin(apparent_long))
+    
+    y = xp.tan(obliquity / 2) ** 2
+    equation_of_time = 4 * xp.degrees(
+        y * xp.sin(2 * mean_long)
+        - 2 * eccentricity * xp.sin(mean_anom)
+        + 4 * eccentricity * y * xp.sin(mean_anom) * xp.cos(2 * mean_long)
+        - 0.5 * y * y * xp.sin(4 * mean_long)
+        - 1.25 * eccentricity * eccentricity * xp.sin(2 * mean_anom)
+    )
+    return declination, equation_of_time
+
+def _solar_noon_minutes(jd0: float, lon: float) -> float:
+    """Minutes after 00:00 UTC at which the sun crosses the meridian"""
+    minutes = 720.0 - 4 * lon
+    for _ in range(2):
+        _, equation_of_time = _sun_position(jd0 + minutes / 1440)
+        minutes = 720.0 - 4 * lon - equation_of_time
+    return minutes
+
+def _event_minutes(jd0: float, lat: float, lon: float, elevation: float, rising: bool) -> Optional[float]:
+    """Minutes after 00:00 UTC at which the sun passes the given elevation, or None if it never does"""
+    phi = math.radians(lat)
+    minutes = _solar_noon_minutes(jd0, lon)
+    # Re-evaluate the sun's position at the estimated event time; converges in a few passes
+    for _ in range(3):
+        declination, equation_of_time = _sun_position(jd0 + minutes / 1440)
+        cos_hour_angle = (
+            (math.sin(math.radians(elevation)) - math.sin(phi) * math.sin(declination))
+            / (math.cos(phi) * math.cos(declination))
+        )
+        if not -1.0 <= cos_hour_angle <= 1.0:
+            return None
+        hour_angle = math.degrees(math.acos(cos_hour_angle))
+        offset = -4 * hour_angle if rising else 4 * hour_angle
+        minutes = 720.0 - 4 * lon - equation_of_time + offset
+    return minutes
+
+def solar_day(lat: float, lon: float, day: date, tz: ZoneInfo = LONDON) -> Dict[str, Optional[datetime]]:
+    """Compute sunrise, sunset, twilight and photography-light boundaries for one day, in local time"""
+    jd0 = _julian_day(day)
+    midnight_utc = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    
+    def at(minutes):
+        if minutes is None:
+            return None
+        return (midnight_utc + timedelta(minutes=minutes)).astimezone(tz)
+    
+    events = {"solar_noon": at(_solar_noon_minutes(jd0, lon))}
+    for morning, evening, elevation in SOLAR_EVENTS:
+        events[morning] = at(_event_minutes(jd0, lat, lon, elevation, rising=True))
+        events[evening] = at(_event_minutes(jd0, lat, lon, elevation, rising=False))
+    return events
+
+def solar_table(lats, lons, days: list, events: Sequence[str] = ("sunrise", "civil_dawn")) -> Dict[str, np.ndarray]:
+    """Vectorized event times for every (location, date) pair
+    
+    events names the pairs to compute ("sunrise" gives sunrise and sunset); solar noon is always
+    included. Returns arrays of shape (len(lats), len(days)) holding minutes after local midnight,
+    NaN where the sun never reaches the elevation.
+    
+    Same iteration as _event_minutes(), but the sun's position depends only on the time, not the
+    place: it is evaluated at the start and end of each date (1-D) and interpolated linearly within
+    the day, so the (locations x days) passes are plain arithmetic. Cells where the sun only just
+    reaches the elevation are redone with _event_minutes(), so the table agrees with solar_day()
+    on whether an event happens. Times are usually within a second of it, and within half a minute
+    on days the sun barely clears the elevation.
+    """
+    lat_degrees = np.asarray(lats, dtype=float)
+    lon_degrees = np.asarray(lons, dtype=float)
+    phi = np.radians(lat_degrees)[:, None]
+    sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+    lon = lon_degrees[:, None]
+    jd0 = np.array([_julian_day(day) for day in days])
+    # Local UTC offset per day (DST switches at 01:00 UTC, well before any sunrise)
+    utc_offset = np.array([LONDON.utcoffset(datetime(day.year, day.month, day.day, 12)).total_seconds() / 60 for day in days])[None, :]
+    
+    # Sun position at 00:00 UTC on each day and on the day after it (not the next entry: days needn't
+    # be consecutive), as (start, change over the day) per day
+    start_declination, start_eot = _sun_position(jd0, xp=np)
+    end_declination, end_eot = _sun_position(jd0 + 1, xp=np)
+    series = [
+        (start[None, :], (end - start)[None, :])
+        for start, end in ((np.sin(start_declination), np.sin(end_declination)),
+                           (np.cos(start_declination), np.cos(end_declination)),
+                           (start_eot, end_eot))
+    ]
+    
+    def at(minutes):
+        fraction = minutes / 1440
+        return [start + fraction * change for start, change in series]
+    
+    noon = 720.0 - 4 * lon + np.zeros(len(days))
+    for _ in range(2):
+        noon = 720.0 - 4 * lon - at(noon)[2]
+    
+    table = {"solar_noon": noon + utc_offset}
+    with np.errstate(invalid="ignore"):
+        for morning, evening, elevation in dict.fromkeys(SOLAR_EVENT_PAIRS[name] for name in events):
+            for key, sign in ((morning, -1), (evening, 1)):
+                minutes = noon
+                marginal = np.zeros(noon.shape, dtype=bool)
+                for _ in range(3):
+                    sin_declination, cos_declination, equation_of_time = at(minutes)
+                    cos_hour_angle = (math.sin(math.radians(elevation)) - sin_phi * sin_declination) / (cos_phi * cos_declination)
+                    marginal |= np.abs(np.abs(cos_hour_angle) - 1) < MARGINAL_COS_HOUR_ANGLE
+                    # arccos yields NaN outside [-1, 1], and NaN sticks through later passes
+                    minutes = 720.0 - 4 * lon - equation_of_time + sign * 4 * np.degrees(np.arccos(cos_hour_angle))
+                # Interpolation can tip a borderline day either way, so those few cells take the exact path
+                for i, j in zip(*np.nonzero(marginal)):
+                    exact = _event_minutes(jd0[j], lat_degrees[i], lon_degrees[i], elevation, rising=sign < 0)
+                    minutes[i, j] = np.nan if exact is None else exact
+                table[key] = minutes + utc_offset
+    return table
+
+class SimpleDaylightMCP(MCPServer):
     def __init__(self):
-        self.api_url = "https://api.sunrise-sunset.org/json"
+        super().__init__()
         self.geocoding_url = "https://geocoding-api.open-meteo.com/v1"
+        self.gazetteer = get_gazetteer()
+        self.geocoder = get_geocoder()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "gazetteer": self.gazetteer.stats(),
+            "geocoder": self.geocoder.stats() if self.geocoder else None
+        }
     
     def list_tools(self) -> Dict[str, Any]:
         return {
             "tools": [
                 {
                     "name": "get_daylight_times",
-                    "description": "Get sunrise, sunset, and daylight duration for Scottish locations - perfect for planning outdoor activities, photography, and camping.",
+                    "description": "Get sunrise, sunset, civil/nautical/astronomical twilight, golden and blue hour, and daylight duration for Scottish locations (computed locally, UK time with correct BST/GMT) - perfect for planning outdoor activities, photography, and camping.",
                     "inputSchema": {
                         "type": "object",
                         "properties": {
@@ -29,26 +207,70 @@ class SimpleDaylightMCP:
                         },
                         "required": ["location"]
                     }
+                },
+                {
+                    "name": "get_daylight_table",
+                    "description": "Get sunrise, sunset, civil twilight and daylight length for several locations over a range of dates in one call - ideal for planning multi-day, multi-stop trips.",
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": {
+                            "locations": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Scottish location names or 'lat,lon' coordinates",
+                                "minItems": 1,
+                                "maxItems": 500
+                            },
+                            "start_date": {
+                                "type": "string",
+                                "description": "First date in YYYY-MM-DD format (optional, defaults to today)"
+                            },
+                            "end_date": {
+                                "type": "string",
+                                "description": "Last date in YYYY-MM-DD format (optional, defaults to start_date + days - 1)"
+                            },
+                            "days": {
+                                "type": "integer",
+                                "description": "Number of days when end_date is not given (default: 7)",
+                                "minimum": 1,
+                                "maximum": 366,
+                                "default": 7
+                            }
+                        },
+                        "required": ["locations"]
+                    }
                 }
             ]
         }
     
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         try:
             if name == "get_daylight_times":
-                return self._get_daylight_times(arguments)
+                result = await self._get_daylight_times(arguments)
+            elif name == "get_daylight_table":
+                result = await self._get_daylight_table(arguments)
             else:
-                return {"error": f"Unknown tool: {name}"}
+                result = {"error": f"Unknown tool: {name}"}
         except Exception as e:
-            return {"error": f"Error in {name}: {str(e)}"}
+            result = {"error": f"Error in {name}: {str(e)}"}
+        return self._record_call(name, result)
     
-    def _get_coordinates(self, location: str) -> tuple:
+    async def _get_coordinates(self, location: str) -> tuple:
         """Smart geocoding using Open-Meteo's geocoding API with Scottish place prioritization"""
         try:
             # Handle direct coordinates first
             if self._is_coordinate_input(location):
                 return self._parse_coordinates(location)
             
+            # Places the gazetteer pins down need no geocoding at all; typos ("Tobermorey") only once
+            # the offline index can rule out a real place of that name
+            coords = self.gazetteer.coordinates(location, fuzzy=self.gazetteer.fuzzy_first)
+            if coords:
+                return coords
+            hit = self.geocoder.lookup(location) if self.geocoder else None
+            if hit:
+                return (hit.lat, hit.lon)
+            
             # Use Open-Meteo's geocoding API
             url = f"{self.geocoding_url}/search"
             params = {
@@ -58,12 +280,13 @@ class SimpleDaylightMCP:
                 "format": "json"
             }
             
-            response = requests.get(url, params=params)
+            response = await self.http.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             
             if not data.get("results"):
-                return None
+                # A misspelt Scottish name ("Pitlochery") still resolves locally rather than failing
+                return self.gazetteer.coordinates(location, fuzzy=True)
                 
             results = data["results"]
             
@@ -103,32 +326,7 @@ class SimpleDaylightMCP:
             return None
             
         # Known Scottish places (prioritize these)
-        SCOTTISH_PLACES = {
-            "edinburgh": ["united kingdom", "scotland"],
-            "glasgow": ["united kingdom", "scotland"],
-            "aberdeen": ["united kingdom", "scotland"],
-            "dundee": ["united kingdom", "scotland"],
-            "stirling": ["united kingdom", "scotland"],
-            "inverness": ["united kingdom", "scotland"],
-            "fort william": ["united kingdom", "scotland"],
-            "aviemore": ["united kingdom", "scotland"],
-            "perth": ["united kingdom", "scotland"],
-            "oban": ["united kingdom", "scotland"],
-            "pitlochry": ["united kingdom", "scotland"],
-            "skye": ["united kingdom", "scotland"],
-            "isle of skye": ["united kingdom", "scotland"],
-            "cairngorms": ["united kingdom", "scotland"],
-            "ben nevis": ["united kingdom", "scotland"],
-            "glencoe": ["united kingdom", "scotland"],
-            "loch lomond": ["united kingdom", "scotland"],
-            "st andrews": ["united kingdom", "scotland"],
-            "arran": ["united kingdom", "scotland"],
-            "mull": ["united kingdom", "scotland"],
-            "harris": ["united kingdom", "scotland"],
-            "lewis": ["united kingdom", "scotland"],
-            "orkney": ["united kingdom", "scotland"],
-            "shetland": ["united kingdom", "scotland"]
-        }
+        place = self.gazetteer.resolve(query)
         
         query_lower = query.lower().strip()
         
@@ -143,8 +341,8 @@ class SimpleDaylightMCP:
                 score += 100
             
             # Check if this is a known Scottish place
-            if query_lower in SCOTTISH_PLACES:
-                preferred_countries = SCOTTISH_PLACES[query_lower]
+            if place:
+                preferred_countries = place.preferred_countries
                 for i, pref_country in enumerate(preferred_countries):
                     if pref_country in country or pref_country in admin1:
                         # Much higher score for Scottish locations
@@ -176,69 +374,77 @@ class SimpleDaylightMCP:
         
         return best_result
     
-    def _get_daylight_times(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Get sunrise, sunset, and daylight duration"""
+    async def _get_daylight_times(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Get sunrise, sunset, twilight and golden/blue hour times, computed locally"""
         location = params["location"]
-        date = params.get("date", "")
+        date_str = params.get("date", "")
         
-        if not date:
-            date = datetime.now().strftime("%Y-%m-%d")
+        try:
+            if date_str:
+                day = datetime.strptime(date_str, "%Y-%m-%d").date()
+            else:
+                day = datetime.now(LONDON).date()
+        except ValueError:
+            return {"error": f"Invalid date '{date_str}' - use YYYY-MM-DD"}
         
-        coords = self._get_coordinates(location)
+        coords = await self._get_coordinates(location)
         if not coords:
             return {"error": f"Could not find location: {location}"}
         
         lat, lng = coords
         
         try:
-            response = requests.get(
-                self.api_url,
-                params={
-                    "lat": lat,
-                    "lng": lng,
-                    "date": date,
-                    "formatted": 0  # Get ISO format
-                },
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if data["status"] != "OK":
-                return {"error": f"Could not get daylight times for {location}"}
+            events = solar_day(lat, lng, day)
             
-            results = data["results"]
+            def fmt(moment):
+                return moment.strftime('%H:%M') if moment else "—"
             
-            # Convert to local UK time (add 1 hour for BST)
-            sunrise = datetime.fromisoformat(results["sunrise"].replace("Z", "+00:00"))
-            sunset = datetime.fromisoformat(results["sunset"].replace("Z", "+00:00"))
+            def twilight(kind):
+                if not events[f"{kind}_dawn"]:
+                    return "lasts all night"
+                return f"from {fmt(events[f'{kind}_dawn'])}, until {fmt(events[f'{kind}_dusk'])}"
             
-            # Convert to UK time (approximate - BST in summer)
-            sunrise_local = sunrise + timedelta(hours=1)
-            sunset_local = sunset + timedelta(hours=1)
+            sunrise_local = events["sunrise"]
+            sunset_local = events["sunset"]
+            if not sunrise_local or not sunset_local:
+                return {"error": f"The sun does not rise or set at {location} on {day.isoformat()}"}
             
             daylight_duration = sunset_local - sunrise_local
             hours = int(daylight_duration.total_seconds() // 3600)
             minutes = int((daylight_duration.total_seconds() % 3600) // 60)
             
-            # Golden hour times (approximately)
-            golden_hour_morning = sunrise_local + timedelta(minutes=30)
-            golden_hour_evening = sunset_local - timedelta(minutes=60)
+            # Far north in midsummer the sun never gets low enough for full darkness
+            if events["astronomical_dusk"]:
+                darkness = f"{fmt(events['astronomical_dusk'])} - {fmt(events['astronomical_dawn'])}"
+            elif events["nautical_dusk"]:
+                darkness = "No full darkness (astronomical twilight all night)"
+            else:
+                darkness = "No real darkness (twilight all night)"
             
-            result_text = f"""🌅 **Daylight Times for {location.title()}** ({date}):
+            result_text = f"""🌅 **Daylight Times for {location.title()}** ({day.isoformat()}, {sunrise_local.tzname()}):
 
-**Sunrise:** {sunrise_local.strftime('%H:%M')}
-**Sunset:** {sunset_local.strftime('%H:%M')}
+**Sunrise:** {fmt(sunrise_local)}
+**Sunset:** {fmt(sunset_local)}
+**Solar Noon:** {fmt(events['solar_noon'])}
 **Daylight Duration:** {hours}h {minutes}m
 
+**Twilight:**
+• Civil: {fmt(events['civil_dawn'])} - {fmt(sunrise_local)} and {fmt(sunset_local)} - {fmt(events['civil_dusk'])}
+• Nautical: {twilight('nautical')}
+• Astronomical: {twilight('astronomical')}
+• Darkness: {darkness}
+
 **For Photography:**
-• Golden hour morning: Around {golden_hour_morning.strftime('%H:%M')}
-• Golden hour evening: {golden_hour_evening.strftime('%H:%M')} - {sunset_local.strftime('%H:%M')}
+• Blue hour morning: {fmt(events['civil_dawn'])} - {fmt(events['blue_hour_morning_end'])}
+• Golden hour morning: {fmt(events['blue_hour_morning_end'])} - {fmt(events['golden_hour_morning_end'])}
+• Golden hour evening: {fmt(events['golden_hour_evening_start'])} - {fmt(events['blue_hour_evening_start'])}
+• Blue hour evening: {fmt(events['blue_hour_evening_start'])} - {fmt(events['civil_dusk'])}
 
 **For Outdoor Activities:**
-• Best light for hiking: After {sunrise_local.strftime('%H:%M')}
-• Plan to finish by: {(sunset_local - timedelta(minutes=30)).strftime('%H:%M')}
-• Set up camp before: {sunset_local.strftime('%H:%M')}"""
+• Best light for hiking: After {fmt(sunrise_local)}
+• Plan to finish by: {fmt(sunset_local - timedelta(minutes=30))}
+• Set up camp before: {fmt(sunset_local)}
+• Usable light (civil twilight) until: {fmt(events['civil_dusk'])}"""
             
             return {
                 "content": [{
@@ -250,34 +456,93 @@ class SimpleDaylightMCP:
         except Exception as e:
             return {"error": f"Failed to get daylight times: {str(e)}"}
 
+    async def _get_daylight_table(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Sunrise/sunset/twilight table for every (location, date) pair, computed in one vectorized pass"""
+        locations = params["locations"][:500]
+        if not locations:
+            return {"error": "No locations provided"}
+        
+        try:
+            start = datetime.strptime(params["start_date"], "%Y-%m-%d").date() if params.get("start_date") else datetime.now(LONDON).date()
+            if params.get("end_date"):
+                end = datetime.strptime(params["end_date"], "%Y-%m-%d").date()
+            else:
+                end = start + timedelta(days=int(params.get("days", 7)) - 1)
+        except ValueError:
+            return {"error": "Invalid date - use YYYY-MM-DD"}
+        
+        if end < start or (end - start).days >= 366:
+            return {"error": "Date range must be between 1 and 366 days"}
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        
+        # Bound concurrent geocoding requests; coordinates skip the network entirely
+        semaphore = asyncio.Semaphore(16)
+        
+        async def resolve(location):
+            async with semaphore:
+                return await self._get_coordinates(location)
+        
+        resolved = await asyncio.gather(*(resolve(location) for location in locations))
+        found = [i for i, coords in enumerate(resolved) if coords]
+        if not found:
+            return {"error": f"Could not find any of: {', '.join(locations)}"}
+        
+        table = solar_table([resolved[i][0] for i in found], [resolved[i][1] for i in found], days)
+        
+        def hhmm(minutes):
+            if np.isnan(minutes):
+                return "—"
+            minutes = int(round(minutes)) % 1440
+            return f"{minutes // 60:02d}:{minutes % 60:02d}"
+        
+        daylight = table["sunset"] - table["sunrise"]
+        # Keep the text readable for long ranges; the structured payload always has every cell
+        max_rows = 31
+        
+        content = []
+        row_of = {i: row for row, i in enumerate(found)}
+        for i, location in enumerate(locations):
+            if i not in row_of:
+                content.append({"type": "text", "text": f"❌ Could not find location: {location}"})
+                continue
+            row = row_of[i]
+            lines = [
+                f"🌅 **Daylight table for {location.title()}** ({start.isoformat()} to {end.isoformat()}, UK time)",
+                "",
+                "| Date | Sunrise | Sunset | Civil dawn | Civil dusk | Daylight |",
+                "|---|---|---|---|---|---|"
+            ]
+            for col, day in enumerate(days[:max_rows]):
+                length = daylight[row, col]
+                length_text = "—" if np.isnan(length) else f"{int(length // 60)}h {int(length % 60):02d}m"
+                lines.append(
+                    f"| {day.strftime('%a %d %b')} | {hhmm(table['sunrise'][row, col])} | {hhmm(table['sunset'][row, col])} "
+                    f"| {hhmm(table['civil_dawn'][row, col])} | {hhmm(table['civil_dusk'][row, col])} | {length_text} |"
+                )
+            if len(days) > max_rows:
+                lines.append(f"| … {len(days) - max_rows} more days in structuredContent | | | | | |")
+            content.append({"type": "text", "text": "\n".join(lines)})
+        
+        return {
+            "content": content,
+            "structuredContent": {
+                "dates": [day.isoformat() for day in days],
+                "locations": [locations[i] for i in found],
+                "coordinates": [list(resolved[i]) for i in found],
+                "sunrise": [[hhmm(m) for m in row] for row in table["sunrise"]],
+                "sunset": [[hhmm(m) for m in row] for row in table["sunset"]],
+                "civil_dawn": [[hhmm(m) for m in row] for row in table["civil_dawn"]],
+                "civil_dusk": [[hhmm(m) for m in row] for row in table["civil_dusk"]],
+                "daylight_minutes": np.where(np.isnan(daylight), -1, np.round(daylight)).astype(int).tolist()
+            }
+        }
+
 app = modal.App("scotland-daylight-mcp")
 
 @app.function(
-    image=modal.Image.debian_slim().pip_install("requests", "fastapi", "uvicorn")
+    image=modal.Image.debian_slim().pip_install("httpx", "fastapi", "uvicorn", "tzdata", "numpy>=2").add_local_python_source("scotland_common", ignore=not_shipped)
 )
 @modal.asgi_app()
 def fastapi_app():
-    from fastapi import FastAPI
-    
-    web_app = FastAPI()
-
-    @web_app.post("/mcp")
-    async def mcp_endpoint(request_dict: Dict[str, Any]) -> Dict[str, Any]:
-        mcp_server = SimpleDaylightMCP()
-        
-        method = request_dict.get("method")
-        
-        if method == "tools/list":
-            return mcp_server.list_tools()
-        elif method == "tools/call":
-            tool_name = request_dict.get("params", {}).get("name")
-            arguments = request_dict.get("params", {}).get("arguments", {})
-            return mcp_server.call_tool(tool_name, arguments)
-        else:
-            return {"error": f"Unsupported method: {method}"}
-
-    @web_app.get("/health")
-    async def health_check():
-        return {"status": "healthy", "service": "Scotland Daylight Times MCP"}
-    
-    return web_app
\ No newline at end of file
+    # One server per container: caches and pooled connections survive across requests
+    return create_app(SimpleDaylightMCP(), "Scotland Daylight Times MCP")
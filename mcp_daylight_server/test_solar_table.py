@@ -0,0 +1,32 @@
+import math
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# scotland_common lives at the repo root, as it does when deploying from there
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from deploy import LONDON, SOLAR_EVENTS, solar_day, solar_table
+
+ALL_EVENTS = [morning for morning, _, _ in SOLAR_EVENTS]
+
+def assert_matches_solar_day(lats, lons, days):
+    table = solar_table(lats, lons, days, events=ALL_EVENTS)
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        for j, day in enumerate(days):
+            local_midnight = datetime(day.year, day.month, day.day, tzinfo=LONDON)
+            for name, when in solar_day(lat, lon, day).items():
+                minutes = table[name][i, j]
+                if when is None:
+                    assert math.isnan(minutes), (lat, lon, day, name)
+                else:
+                    expected = (when - local_midnight).total_seconds() / 60
+                    # Interpolating the sun's position costs up to half a minute on borderline days
+                    assert abs(minutes - expected) < 0.5, (lat, lon, day, name, minutes, expected)
+
+def test_consecutive_year():
+    # On Edinburgh's 2024-08-08 the sun only just fails to get 18° below the horizon: no astronomical dawn
+    lats, lons = [55.95, 55.9533, 57.4778, 60.1546], [-3.19, -3.1883, -4.2247, -1.1494]
+    assert_matches_solar_day(lats, lons, [date(2024, 1, 1) + timedelta(days=i) for i in range(366)])
+
+def test_days_need_not_be_consecutive():
+    assert_matches_solar_day([55.95], [-3.19], [date(2024, 6, 21), date(2024, 12, 21), date(2024, 8, 8), date(2025, 3, 30)])
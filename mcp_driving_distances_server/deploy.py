@@ -1,19 +1,514 @@
 import modal
-from typing import Dict, Any
-import requests
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import httpx
 from datetime import datetime
+import hashlib
 import json
+import math
+import os
+import time
+from scotland_common import MCPServer, create_app, get_gazetteer, get_geocoder, not_shipped
 
-class ScottishDrivingMCP:
-    def __init__(self):
+def haversine_km(a: tuple, b: tuple) -> float:
+    """Great-circle distance between two (lon, lat) points"""
+    lon1, lat1, lon2, lat2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+class OrsMatrixProvider:
+    """Fills matrix cells with bulk OpenRouteService matrix requests
+    
+    The matrix endpoint only snaps points to a road within a few hundred metres, so a remote
+    geocode (a glen, a hill car park) comes back unroutable. Those cells are retried one leg at a
+    time through directions with radiuses=-1, which snaps to the nearest road however far it is.
+    """
+    # Free tier: at most 3500 source x destination cells per request
+    max_cells = 3500
+    # Directions requests spent per fetch on cells the matrix could not route
+    max_snapped_cells = 24
+    
+    def __init__(self, http: httpx.AsyncClient, api_key: str, url: str = "https://api.openrouteservice.org/v2/matrix/driving-car",
+                 directions_url: str = "https://api.openrouteservice.org/v2/directions/driving-car"):
+        self.http = http
+        self.api_key = api_key
+        self.url = url
+        self.directions_url = directions_url
+    
+    def _headers(self) -> Dict[str, str]:
+        return {
+            'Accept': 'application/json; charset=utf-8',
+            'Authorization': self.api_key,
+            'Content-Type': 'application/json; charset=utf-8'
+        }
+    
+    async def fetch(self, sources: List[tuple], destinations: List[tuple]) -> Tuple[list, list]:
+        """Distances (metres) and durations (seconds) from every source to every destination; None if unroutable"""
+        distances, durations = [], []
+        rows_per_request = max(1, self.max_cells // len(destinations))
+        for start in range(0, len(sources), rows_per_request):
+            chunk = sources[start:start + rows_per_request]
+            body = {
+                "locations": [list(point) for point in chunk + destinations],
+                "sources": list(range(len(chunk))),
+                "destinations": list(range(len(chunk), len(chunk) + len(destinations))),
+                "metrics": ["distance", "duration"],
+                "units": "m"
+            }
+            response = await self.http.post(self.url, headers=self._headers(), json=body)
+            if response.status_code == 404:
+                # A point with no road in reach fails the whole request; leave the chunk to snapping
+                distances.extend([None] * len(destinations) for _ in chunk)
+                durations.extend([None] * len(destinations) for _ in chunk)
+                continue
+            response.raise_for_status()
+            data = response.json()
+            distances.extend(data["distances"])
+            durations.extend(data["durations"])
+        
+        unroutable = [
+            (i, j) for i, row in enumerate(distances) for j, metres in enumerate(row)
+            if (metres is None or durations[i][j] is None) and sources[i] != destinations[j]
+        ][:self.max_snapped_cells]
+        legs = await asyncio.gather(*(self._snapped_leg(sources[i], destinations[j]) for i, j in unroutable))
+        for (i, j), leg in zip(unroutable, legs):
+            if leg:
+                distances[i][j], durations[i][j] = leg
+        return distances, durations
+    
+    async def _snapped_leg(self, origin: tuple, destination: tuple) -> Optional[Tuple[float, float]]:
+        """(metres, seconds) for one leg routed from the nearest roads to each end, or None"""
+        body = {
+            "coordinates": [list(origin), list(destination)],
+            "radiuses": [-1, -1],  # Use closest road
+            "instructions": False,
+            "geometry": False
+        }
+        response = await self.http.post(self.directions_url, headers=self._headers(), json=body)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        summary = response.json()["routes"][0]["summary"]
+        return float(summary.get("distance", 0.0)), float(summary.get("duration", 0.0))
+
+class HaversineMatrixProvider:
+    """Offline stand-in for tests and keyless deployments: great-circle distance stretched to approximate roads"""
+    
+    def __init__(self, detour_factor: float = 1.3, speed_kmh: float = 60.0):
+        self.detour_factor = detour_factor
+        self.speed_kmh = speed_kmh
+    
+    async def fetch(self, sources: List[tuple], destinations: List[tuple]) -> Tuple[list, list]:
+        distances = [[haversine_km(a, b) * 1000 * self.detour_factor for b in destinations] for a in sources]
+        durations = [[metres / (self.speed_kmh / 3.6) for metres in row] for row in distances]
+        return distances, durations
+
+class DistanceMatrix:
+    """Persistent, incrementally filled distance/duration matrix between resolved places
+    
+    Cells are keyed by rounded (lon, lat) pairs so any query that resolves to the same point
+    shares them. ensure() fetches only the cells that are still missing, in bulk; concurrent
+    calls share a fetch for any cell already in flight rather than queueing behind each other.
+    Pairs the provider could not route are remembered for unroutable_ttl seconds, then retried.
+    """
+    
+    def __init__(self, provider=None, path: Optional[str] = None, precision: int = 5, unroutable_ttl: float = 24 * 3600):
+        self.provider = provider
+        self.path = path
+        self.precision = precision
+        self.unroutable_ttl = unroutable_ttl
+        self.places: Dict[str, tuple] = {}
+        self.cells: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        # Cell -> when the provider last failed to route it
+        self.unroutable: Dict[Tuple[str, str], float] = {}
+        # Cell -> the fetch currently filling it
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.fills = 0
+    
+    def key(self, point: tuple) -> str:
+        return f"{round(point[0], self.precision)},{round(point[1], self.precision)}"
+    
+    def place(self, name: str) -> Optional[tuple]:
+        """Previously resolved (lon, lat) for a normalized place name"""
+        return self.places.get(name)
+    
+    def add_place(self, name: str, point: tuple) -> None:
+        self.places[name] = tuple(point)
+        self._dirty = True
+    
+    def get(self, a: tuple, b: tuple) -> Optional[Tuple[float, float]]:
+        """(metres, seconds) for a known cell, or None when unknown or unroutable"""
+        if a == b:
+            return (0.0, 0.0)
+        return self.cells.get((self.key(a), self.key(b)))
+    
+    def _known(self, cell: Tuple[str, str], now: float) -> bool:
+        return cell in self.cells or now - self.unroutable.get(cell, -math.inf) < self.unroutable_ttl
+    
+    async def ensure(self, sources: List[tuple], destinations: Optional[List[tuple]] = None) -> None:
+        """Fill every missing source -> destination cell with as few provider requests as possible"""
+        destinations = sources if destinations is None else destinations
+        pairs = [(a, b) for a in sources for b in destinations if a != b]
+        counted = False
+        while True:
+            # No await between sorting the cells and claiming the missing ones, so no lock is needed
+            now = time.time()
+            missing, waiting = [], set()
+            for a, b in pairs:
+                cell = (self.key(a), self.key(b))
+                if self._known(cell, now):
+                    continue
+                if cell in self._pending:
+                    waiting.add(self._pending[cell])
+                else:
+                    missing.append((a, b))
+            if not counted:
+                self.misses += len(missing) + len(waiting)
+                self.hits += len(pairs) - len(missing) - len(waiting)
+                counted = True
+            if not missing and not waiting:
+                return
+            if missing:
+                await self._fill(missing)
+            if waiting:
+                # Another request's fetch; whatever it failed to fill is picked up on the next pass
+                await asyncio.wait(waiting)
+    
+    async def _fill(self, missing: List[Tuple[tuple, tuple]]) -> None:
+        """One rectangular provider request covering every row and column with a gap"""
+        claimed = [(self.key(a), self.key(b)) for a, b in missing]
+        done = asyncio.get_running_loop().create_future()
+        for cell in claimed:
+            self._pending[cell] = done
+        try:
+            rows = list(dict.fromkeys(a for a, _ in missing))
+            cols = list(dict.fromkeys(b for _, b in missing))
+            distances, durations = await self.provider.fetch(rows, cols)
+            self.fills += 1
+            
+            now = time.time()
+            for i, a in enumerate(rows):
+                for j, b in enumerate(cols):
+                    if a == b:
+                        continue
+                    cell = (self.key(a), self.key(b))
+                    metres, seconds = distances[i][j], durations[i][j]
+                    if metres is None or seconds is None:
+                        self.unroutable[cell] = now
+                    else:
+                        self.cells[cell] = (float(metres), float(seconds))
+                        self.unroutable.pop(cell, None)
+            self._dirty = True
+        finally:
+            for cell in claimed:
+                if self._pending.get(cell) is done:
+                    del self._pending[cell]
+            done.set_result(None)
+    
+    def _read(self) -> Tuple[Dict[str, tuple], Dict[Tuple[str, str], Tuple[float, float]], Dict[Tuple[str, str], float]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}, {}, {}
+        with open(self.path) as f:
+            data = json.load(f)
+        return (
+            {name: tuple(point) for name, point in data.get("places", {}).items()},
+            {tuple(key.split("|")): tuple(value) for key, value in data.get("cells", {}).items() if value is not None},
+            {tuple(key.split("|")): checked_at for key, checked_at in data.get("unroutable", {}).items()}
+        )
+    
+    def load(self) -> None:
+        self.places, self.cells, self.unroutable = self._read()
+    
+    def save(self) -> None:
+        """Write the matrix, merged with whatever other containers have saved since it was loaded"""
+        if not self.path or not self._dirty:
+            return
+        places, cells, unroutable = self._read()
+        self.places = {**places, **self.places}
+        self.cells = {**cells, **self.cells}
+        # A cell someone has since routed is no longer unroutable; otherwise the latest failure counts
+        for cell, checked_at in unroutable.items():
+            if cell not in self.cells and checked_at > self.unroutable.get(cell, -math.inf):
+                self.unroutable[cell] = checked_at
+        self.unroutable = {cell: checked_at for cell, checked_at in self.unroutable.items() if cell not in self.cells}
+        data = {
+            "places": self.places,
+            "cells": {f"{a}|{b}": value for (a, b), value in self.cells.items()},
+            "unroutable": {f"{a}|{b}": checked_at for (a, b), checked_at in self.unroutable.items()}
+        }
+        # Write then rename so a crash never leaves a truncated file behind
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "places": len(self.places),
+            "cells": len(self.cells),
+            "unroutable": len(self.unroutable),
+            "in_flight": len(self._pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fills": self.fills
+        }
+
+class GeometryCache:
+    """Encoded route polylines on disk, keyed by (origin, destination, profile)
+    
+    One small file per leg, written as soon as it is fetched, so the cache survives
+    container restarts without a save step. Recent entries are also kept in memory.
+    """
+    
+    def __init__(self, directory: Optional[str] = None, max_memory: int = 512, precision: int = 5):
+        self.directory = directory
+        self.max_memory = max_memory
+        self.precision = precision
+        self._memory: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def key(self, origin: tuple, destination: tuple, profile: str) -> str:
+        raw = f"{profile}|{round(origin[0], self.precision)},{round(origin[1], self.precision)}|{round(destination[0], self.precision)},{round(destination[1], self.precision)}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+    
+    def get(self, origin: tuple, destination: tuple, profile: str) -> Optional[str]:
+        key = self.key(origin, destination, profile)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+        
+        path = os.path.join(self.directory, f"{key}.polyline") if self.directory else None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                encoded = f.read()
+            self._remember(key, encoded)
+            self.hits += 1
+            return encoded
+        
+        self.misses += 1
+        return None
+    
+    def put(self, origin: tuple, destination: tuple, profile: str, encoded: str) -> None:
+        key = self.key(origin, destination, profile)
+        self._remember(key, encoded)
+        if self.directory:
+            # Write then rename so readers never see a half-written polyline
+            path = os.path.join(self.directory, f"{key}.polyline")
+            with open(f"{path}.tmp", "w") as f:
+                f.write(encoded)
+            os.replace(f"{path}.tmp", path)
+    
+    def _remember(self, key: str, encoded: str) -> None:
+        self._memory[key] = encoded
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"in_memory": len(self._memory), "hits": self.hits, "misses": self.misses}
+
+# Stop-order optimization over a cost matrix (seconds). Node 0 is always the fixed start.
+# Routes are index lists with both ends pinned: the start, and either a fixed end node, the
+# start again (closed tour) or a zero-cost virtual node (open tour ending anywhere).
+HELD_KARP_MAX_STOPS = 13  # 2^12 subsets x 12^2 transitions ≈ 0.15 s in pure Python
+# Larger trips use time-bounded local search, so the cap only keeps output and matrix fills sane
+MAX_TRIP_STOPS = 60
+OPTIMIZE_TIME_BUDGET = 2.0
+
+def _held_karp(n: int, cost, end: int) -> List[int]:
+    """Exact shortest route from node 0 through every node to `end` (which may be 0 or the virtual node)"""
+    free = [node for node in range(1, n) if node != end]
+    if not free:
+        return [0, end]
+    
+    # best[mask][j] = (cost, previous j) for routes from 0 covering `mask` and ending at free[j]
+    size = len(free)
+    best = [[None] * size for _ in range(1 << size)]
+    for j, node in enumerate(free):
+        best[1 << j][j] = (cost(0, node), None)
+    for mask in range(1, 1 << size):
+        for j in range(size):
+            if not mask & (1 << j) or best[mask][j] is not None:
+                continue
+            prev_mask = mask ^ (1 << j)
+            best[mask][j] = min(
+                (best[prev_mask][k][0] + cost(free[k], free[j]), k)
+                for k in range(size) if prev_mask & (1 << k)
+            )
+    
+    full = (1 << size) - 1
+    _, last = min((best[full][j][0] + cost(free[j], end), j) for j in range(size))
+    route, mask = [end], full
+    while last is not None:
+        route.append(free[last])
+        mask, last = mask ^ (1 << last), best[mask][last][1]
+    return [0] + route[::-1]
+
+def _nearest_neighbour(n: int, cost, end: int) -> List[int]:
+    route, remaining = [0], set(range(1, n)) - {end}
+    while remaining:
+        nearest = min(remaining, key=lambda node: cost(route[-1], node))
+        route.append(nearest)
+        remaining.remove(nearest)
+    return route + [end]
+
+def _local_search(route: List[int], cost, deadline: float) -> List[int]:
+    """2-opt and Or-opt moves on the interior of the route until no move helps or time runs out
+    
+    Durations are asymmetric, so a 2-opt reversal is priced with prefix sums of the forward and
+    backward leg costs, which keeps every move evaluation O(1).
+    """
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        
+        forward, backward = [0.0], [0.0]
+        for a, b in zip(route, route[1:]):
+            forward.append(forward[-1] + cost(a, b))
+            backward.append(backward[-1] + cost(b, a))
+        
+        # 2-opt: reverse route[i..j]
+        for i in range(1, len(route) - 2):
+            for j in range(i + 1, len(route) - 1):
+                before = cost(route[i - 1], route[i]) + (forward[j] - forward[i]) + cost(route[j], route[j + 1])
+                after = cost(route[i - 1], route[j]) + (backward[j] - backward[i]) + cost(route[i], route[j + 1])
+                if after < before - 1e-9:
+                    route[i:j + 1] = route[i:j + 1][::-1]
+                    improved = True
+                    break
+            if improved or time.perf_counter() >= deadline:
+                break
+        if improved:
+            continue
+        
+        # Or-opt: move a run of 1-3 stops to another gap, keeping its direction
+        for length in (1, 2, 3):
+            for i in range(1, len(route) - length):
+                segment = route[i:i + length]
+                rest = route[:i] + route[i + length:]
+                removed_gain = (
+                    cost(route[i - 1], segment[0]) + cost(segment[-1], route[i + length])
+                    - cost(route[i - 1], route[i + length])
+                )
+                for k in range(1, len(rest)):
+                    if k == i:
+                        continue
+                    insert_cost = cost(rest[k - 1], segment[0]) + cost(segment[-1], rest[k]) - cost(rest[k - 1], rest[k])
+                    if insert_cost < removed_gain - 1e-9:
+                        route[:] = rest[:k] + segment + rest[k:]
+                        improved = True
+                        break
+                if improved or time.perf_counter() >= deadline:
+                    break
+            if improved:
+                break
+    return route
+
+def optimize_stop_order(matrix: List[List[float]], end: Optional[int] = None, closed: bool = False, time_budget: float = OPTIMIZE_TIME_BUDGET) -> List[int]:
+    """Visiting order (indices into matrix) starting at node 0 that minimises total cost
+    
+    end pins the last stop, closed returns to node 0, otherwise the route may end anywhere.
+    Exact (Held-Karp) up to HELD_KARP_MAX_STOPS, otherwise nearest neighbour improved by
+    2-opt/Or-opt until no move helps or time_budget seconds have passed.
+    """
+    n = len(matrix)
+    virtual = n
+    
+    def cost(a, b):
+        return 0.0 if virtual in (a, b) else matrix[a][b]
+    
+    route_end = 0 if closed else (end if end is not None else virtual)
+    if n <= HELD_KARP_MAX_STOPS:
+        route = _held_karp(n, cost, route_end)
+    else:
+        route = _local_search(_nearest_neighbour(n, cost, route_end), cost, time.perf_counter() + time_budget)
+    return route[:-1] if route_end == virtual else route
+
+@dataclass
+class RouteSegment:
+    """One driving leg, kept in SI units until it is rendered"""
+    from_location: str
+    to_location: str
+    from_coords: tuple  # (lon, lat)
+    to_coords: tuple
+    distance_m: float
+    duration_s: float
+    geometry: Optional[str] = None  # encoded polyline, when the leg was routed in full
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "from": self.from_location,
+            "to": self.to_location,
+            "from_coords": list(self.from_coords),
+            "to_coords": list(self.to_coords),
+            "distance_m": round(self.distance_m, 1),
+            "duration_s": round(self.duration_s, 1),
+            "geometry": self.geometry
+        }
+
+class ScottishDrivingMCP(MCPServer):
+    def __init__(self, matrix_provider=None, matrix_path: Optional[str] = None, geometry_dir: Optional[str] = None,
+                 sync_volume: Optional[Callable[[], None]] = None):
+        super().__init__()
         # Using OpenRouteService (free tier: 2000 requests/day)
         # Alternative: GraphHopper (free tier: 2500 requests/day)
-        self.routing_url = "https://api.openrouteservice.org/v2/directions/driving-car"
+        self.profile = "driving-car"
+        self.routing_url = f"https://api.openrouteservice.org/v2/directions/{self.profile}"
         self.geocoding_url = "https://api.openrouteservice.org/geocode/search"
         
         # Get free API key from: https://openrouteservice.org/dev/#/signup
-        # Store in environment variable for security
-        self.api_key = "YOUR_OPENROUTESERVICE_API_KEY"  # Replace with actual key
+        # Read from the openrouteservice secret in startup(); None runs the server without ORS
+        self.api_key: Optional[str] = None
+        self.gazetteer = get_gazetteer()
+        self.geocoder = get_geocoder()
+        # Providers are chosen in startup() once the API key is known, unless one is injected (e.g. in tests)
+        self.matrix = DistanceMatrix(matrix_provider, path=matrix_path or os.getenv("DRIVING_MATRIX_PATH"))
+        self.geometry = GeometryCache(geometry_dir or os.getenv("DRIVING_GEOMETRY_DIR"))
+        # Brings in other containers' saves, so the matrix written at shutdown merges them rather than overwriting them
+        self.sync_volume = sync_volume
+        # Directions calls are only needed for geometry; keep a few in flight at most
+        self._directions_slots = asyncio.Semaphore(4)
+    
+    async def startup(self) -> None:
+        await super().startup()
+        # Read the key once per container rather than on every request
+        self.api_key = os.getenv("OPENROUTESERVICE_API_KEY") or None
+        self.matrix.load()
+        if self.matrix.provider is None:
+            if self.api_key:
+                self.matrix.provider = OrsMatrixProvider(self.http, self.api_key)
+            else:
+                # Without a key every ORS call would come back 401: estimate legs from great-circle
+                # distance instead, and keep the estimates out of the shared matrix file
+                self.matrix.provider = HaversineMatrixProvider()
+                self.matrix.path = None
+    
+    async def shutdown(self) -> None:
+        """Persists the matrix before the connections are released"""
+        if self.sync_volume and self.matrix.path:
+            self.sync_volume()
+        self.matrix.save()
+        await super().shutdown()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "matrix": self.matrix.stats(),
+            "matrix_provider": type(self.matrix.provider).__name__,
+            "geometry": self.geometry.stats(),
+            "gazetteer": self.gazetteer.stats(),
+            "geocoder": self.geocoder.stats() if self.geocoder else None
+        }
     
     def list_tools(self) -> Dict[str, Any]:
         return {
@@ -36,6 +531,11 @@ class ScottishDrivingMCP:
                                 "type": "array",
                                 "items": {"type": "string"},
                                 "description": "Optional stops along the way (max 3 for free tier)"
+                            },
+                            "include_geometry": {
+                                "type": "boolean",
+                                "description": "Include each leg's encoded polyline (precision 5) in structuredContent (default: true)",
+                                "default": True
                             }
                         },
                         "required": ["from_location", "to_location"]
@@ -43,18 +543,37 @@ class ScottishDrivingMCP:
                 },
                 {
                     "name": "plan_road_trip",
-                    "description": "Plan a multi-stop road trip with optimized route through Scottish destinations.",
+                    "description": "Plan a multi-stop road trip through Scottish destinations, choosing the visiting order that minimises total driving time.",
                     "inputSchema": {
                         "type": "object",
                         "properties": {
                             "locations": {
                                 "type": "array",
                                 "items": {"type": "string"},
-                                "description": "List of Scottish locations to visit (max 5 for free tier)"
+                                "description": f"List of Scottish locations to visit (max {MAX_TRIP_STOPS})"
                             },
                             "start_location": {
                                 "type": "string",
                                 "description": "Starting point (if different from first location)"
+                            },
+                            "end_location": {
+                                "type": "string",
+                                "description": "Fixed final stop (optional; otherwise the trip may end anywhere)"
+                            },
+                            "return_to_start": {
+                                "type": "boolean",
+                                "description": "Finish back at the starting point (default: false)",
+                                "default": False
+                            },
+                            "optimize": {
+                                "type": "boolean",
+                                "description": "Reorder stops to minimise driving time (default: true); false keeps the given order",
+                                "default": True
+                            },
+                            "include_geometry": {
+                                "type": "boolean",
+                                "description": "Include each leg's encoded polyline (precision 5) in structuredContent (default: true)",
+                                "default": True
                             }
                         },
                         "required": ["locations"]
@@ -63,100 +582,48 @@ class ScottishDrivingMCP:
             ]
         }
     
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         try:
             if name == "get_driving_distance":
-                return self._get_driving_distance(arguments)
+                result = await self._get_driving_distance(arguments)
             elif name == "plan_road_trip":
-                return self._plan_road_trip(arguments)
+                result = await self._plan_road_trip(arguments)
             else:
-                return {"error": f"Unknown tool: {name}"}
+                result = {"error": f"Unknown tool: {name}"}
         except Exception as e:
-            return {"error": f"Error in {name}: {str(e)}"}
+            result = {"error": f"Error in {name}: {str(e)}"}
+        return self._record_call(name, result)
     
     def _clarify_scottish_location(self, location: str) -> str:
-        """Ensure location is clearly identified as Scottish"""
-        # Same extensive mapping as your weather app
-        scottish_clarifications = {
-            "mull": "Isle of Mull, Scotland, UK",
-            "skye": "Isle of Skye, Scotland, UK",
-            "arran": "Isle of Arran, Scotland, UK",
-            "harris": "Isle of Harris, Scotland, UK",
-            "lewis": "Isle of Lewis, Scotland, UK",
-            "perth": "Perth, Scotland, UK",
-            "aberdeen": "Aberdeen, Scotland, UK",
-            "dundee": "Dundee, Scotland, UK",
-            "stirling": "Stirling, Scotland, UK",
-            "inverness": "Inverness, Scotland, UK",
-            "fort william": "Fort William, Scotland, UK",
-            "aviemore": "Aviemore, Scotland, UK",
-            "oban": "Oban, Scotland, UK",
-            "pitlochry": "Pitlochry, Scotland, UK",
-            "st andrews": "St Andrews, Scotland, UK",
-            "tobermory": "Tobermory, Scotland, UK",
-            "portree": "Portree, Scotland, UK",
-            "mallaig": "Mallaig, Scotland, UK",
-            "kyle": "Kyle of Lochalsh, Scotland, UK",
-            "tarbert": "Tarbert, Scotland, UK",
-            "thurso": "Thurso, Scotland, UK",
-            "wick": "Wick, Scotland, UK",
-            "ullapool": "Ullapool, Scotland, UK",
-            "durness": "Durness, Scotland, UK",
-            "john o groats": "John O'Groats, Scotland, UK",
-            "kelso": "Kelso, Scotland, UK",
-            "jedburgh": "Jedburgh, Scotland, UK",
-            "melrose": "Melrose, Scotland, UK",
-            "peebles": "Peebles, Scotland, UK",
-            "north berwick": "North Berwick, Scotland, UK",
-            "dunbar": "Dunbar, Scotland, UK",
-            "stonehaven": "Stonehaven, Scotland, UK",
-            "montrose": "Montrose, Scotland, UK",
-            "arbroath": "Arbroath, Scotland, UK",
-            "carnoustie": "Carnoustie, Scotland, UK",
-            "dunkeld": "Dunkeld, Scotland, UK",
-            "callander": "Callander, Scotland, UK",
-            "balloch": "Balloch, Scotland, UK",
-            "helensburgh": "Helensburgh, Scotland, UK",
-            "rothesay": "Rothesay, Scotland, UK",
-            "dunoon": "Dunoon, Scotland, UK",
-            "inveraray": "Inveraray, Scotland, UK",
-            "lochgilphead": "Lochgilphead, Scotland, UK",
-            "campbeltown": "Campbeltown, Scotland, UK",
-            "stranraer": "Stranraer, Scotland, UK",
-            "dumfries": "Dumfries, Scotland, UK",
-            "gretna": "Gretna, Scotland, UK",
-            "lockerbie": "Lockerbie, Scotland, UK",
-            "elgin": "Elgin, Scotland, UK",
-            "forres": "Forres, Scotland, UK",
-            "nairn": "Nairn, Scotland, UK",
-            "grantown": "Grantown-on-Spey, Scotland, UK",
-            "huntly": "Huntly, Scotland, UK",
-            "keith": "Keith, Scotland, UK",
-            "banff": "Banff, Scotland, UK",
-            "fraserburgh": "Fraserburgh, Scotland, UK",
-            "peterhead": "Peterhead, Scotland, UK",
-            "turriff": "Turriff, Scotland, UK",
-            "lairg": "Lairg, Scotland, UK",
-            "dornoch": "Dornoch, Scotland, UK",
-            "golspie": "Golspie, Scotland, UK",
-            "brora": "Brora, Scotland, UK",
-            "helmsdale": "Helmsdale, Scotland, UK",
-            "bettyhill": "Bettyhill, Scotland, UK",
-            "tongue": "Tongue, Scotland, UK"
-        }
+        """Ensure location is clearly identified as Scottish
         
-        location_lower = location.lower().strip()
-        if location_lower in scottish_clarifications:
-            return scottish_clarifications[location_lower]
-        elif not any(keyword in location_lower for keyword in ["scotland", "uk", "united kingdom"]):
-            return f"{location}, Scotland, UK"
-        return location
-    
-    def _geocode_location(self, location: str) -> tuple:
+        Typos are only corrected up front when the offline index can vouch that the name isn't a real
+        place in its own right ("Tarbet" is not "Tarbert"); otherwise ORS gets the name as written.
+        """
+        return self.gazetteer.clarify(location, fuzzy=self.gazetteer.fuzzy_first)
+    
+    async def _geocode_location(self, location: str) -> tuple:
         """Get coordinates for a location using OpenRouteService"""
+        clarified_location = self._clarify_scottish_location(location)
+        cache_key = clarified_location.lower()
+        cached = self.matrix.place(cache_key)
+        if cached:
+            return cached
+        
+        # Towns and villages come from the offline index; hills, lochs and islands are left to ORS,
+        # whose point is more likely to sit on a road the router can snap to
+        hit = self.geocoder.lookup(clarified_location, feature_classes="P") if self.geocoder else None
+        if hit:
+            self.matrix.add_place(cache_key, (hit.lon, hit.lat))
+            return (hit.lon, hit.lat)
+        
+        if not self.api_key:
+            # No ORS geocoding without a key; the gazetteer's own point is the last resort, typos
+            # ("Pitlochery") included since there is no geocoder left to miss first
+            coords = self.gazetteer.coordinates(location, fuzzy=True)
+            return (coords[1], coords[0]) if coords else None
+        
         try:
-            clarified_location = self._clarify_scottish_location(location)
-            
             headers = {
                 'Accept': 'application/json, application/geo+json, application/gpx+xml, img/png; charset=utf-8',
                 'Authorization': self.api_key
@@ -172,84 +639,147 @@ class ScottishDrivingMCP:
                 'size': 1  # Only need the best match
             }
             
-            response = requests.get(self.geocoding_url, headers=headers, params=params)
+            response = await self.http.get(self.geocoding_url, headers=headers, params=params)
             response.raise_for_status()
             data = response.json()
             
             if data['features']:
                 coords = data['features'][0]['geometry']['coordinates']
+                self.matrix.add_place(cache_key, (coords[0], coords[1]))
                 return (coords[0], coords[1])  # lon, lat
             
+            # ORS knows no such place, so a misspelt gazetteer name ("Pitlochery") is the likely answer
+            place = self.gazetteer.resolve(location, fuzzy=True)
+            if place and place.query != clarified_location:
+                return await self._geocode_location(place.query)
             return None
             
         except Exception as e:
             return None
     
-    def _get_driving_distance(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _format_duration(self, seconds: float) -> str:
+        duration_mins = round(seconds / 60)
+        hours = duration_mins // 60
+        mins = duration_mins % 60
+        if hours > 0:
+            return f"{hours}h {mins}m"
+        return f"{mins}m"
+    
+    async def _resolve(self, locations: List[str]) -> List[tuple]:
+        """Geocode every location concurrently; raises ValueError naming the first one not found"""
+        coordinates = await asyncio.gather(*(self._geocode_location(location) for location in locations))
+        for location, coords in zip(locations, coordinates):
+            if not coords:
+                raise ValueError(f"Could not find location: {location}")
+        return list(coordinates)
+    
+    async def _segments(self, locations: List[str], coordinates: List[tuple], order: Optional[List[int]] = None) -> List[RouteSegment]:
+        """Typed legs for visiting `locations` in `order` (default: as given), filling only missing matrix cells"""
+        order = list(range(len(locations))) if order is None else order
+        try:
+            await self.matrix.ensure(coordinates)
+        except Exception as e:
+            raise ValueError(f"Failed to calculate route: {str(e)}")
+        
+        segments = []
+        for a, b in zip(order, order[1:]):
+            cell = self.matrix.get(coordinates[a], coordinates[b])
+            if cell is None:
+                raise ValueError("No route found between these locations")
+            segments.append(RouteSegment(
+                from_location=locations[a],
+                to_location=locations[b],
+                from_coords=coordinates[a],
+                to_coords=coordinates[b],
+                distance_m=cell[0],
+                duration_s=cell[1]
+            ))
+        return segments
+    
+    async def _leg_geometry(self, origin: tuple, destination: tuple) -> Optional[str]:
+        """Encoded polyline for one leg, from the on-disk cache or one directions request"""
+        cached = self.geometry.get(origin, destination, self.profile)
+        if cached is not None or not self.api_key:
+            return cached
+        
+        headers = {
+            'Accept': 'application/json; charset=utf-8',
+            'Authorization': self.api_key,
+            'Content-Type': 'application/json; charset=utf-8'
+        }
+        body = {
+            "coordinates": [list(origin), list(destination)],
+            "radiuses": [-1, -1],  # Use closest road
+            "instructions": False
+        }
+        try:
+            async with self._directions_slots:
+                response = await self.http.post(self.routing_url, headers=headers, json=body)
+            response.raise_for_status()
+            encoded = response.json()['routes'][0]['geometry']
+        except Exception:
+            # Geometry is a nice-to-have: the caller still gets distances and falls back to straight lines
+            return None
+        
+        self.geometry.put(origin, destination, self.profile, encoded)
+        return encoded
+    
+    async def _attach_geometry(self, segments: List[RouteSegment]) -> None:
+        geometries = await asyncio.gather(*(self._leg_geometry(s.from_coords, s.to_coords) for s in segments))
+        for segment, encoded in zip(segments, geometries):
+            segment.geometry = encoded
+    
+    def _structured(self, segments: List[RouteSegment], **extra) -> Dict[str, Any]:
+        """JSON payload for callers that want numbers rather than text"""
+        return {
+            "segments": [segment.to_dict() for segment in segments],
+            "total_distance_m": round(sum(segment.distance_m for segment in segments), 1),
+            "total_duration_s": round(sum(segment.duration_s for segment in segments), 1),
+            **extra
+        }
+    
+    async def _get_driving_distance(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate driving distance and time between two locations"""
         from_location = params["from_location"]
         to_location = params["to_location"]
-        waypoints = params.get("waypoints", [])
-        
-        # Get coordinates for all locations
-        from_coords = self._geocode_location(from_location)
-        to_coords = self._geocode_location(to_location)
+        waypoints = params.get("waypoints", [])[:3]  # Limit to 3 waypoints for free tier
         
-        if not from_coords:
-            return {"error": f"Could not find location: {from_location}"}
-        if not to_coords:
-            return {"error": f"Could not find location: {to_location}"}
+        try:
+            (from_coords, to_coords), waypoint_coords = await asyncio.gather(
+                self._resolve([from_location, to_location]),
+                asyncio.gather(*(self._geocode_location(waypoint) for waypoint in waypoints))
+            )
+        except ValueError as e:
+            return {"error": str(e)}
         
-        # Build coordinate list
-        coordinates = [list(from_coords)]
+        # Waypoints we can't resolve are skipped rather than failing the whole route
+        stops = (
+            [(from_location, from_coords)]
+            + [(waypoint, coords) for waypoint, coords in zip(waypoints, waypoint_coords) if coords]
+            + [(to_location, to_coords)]
+        )
         
-        # Add waypoints if specified
-        for waypoint in waypoints[:3]:  # Limit to 3 waypoints for free tier
-            waypoint_coords = self._geocode_location(waypoint)
-            if waypoint_coords:
-                coordinates.append(list(waypoint_coords))
+        try:
+            segments = await self._segments([name for name, _ in stops], [coords for _, coords in stops])
+        except ValueError as e:
+            return {"error": str(e)}
+        if params.get("include_geometry", True):
+            await self._attach_geometry(segments)
         
-        coordinates.append(list(to_coords))
+        return {
+            "content": [{
+                "type": "text",
+                "text": self._render_route(segments)
+            }],
+            "structuredContent": self._structured(segments)
+        }
+    
+    def _render_route(self, segments: List[RouteSegment]) -> str:
+        route_desc = " → ".join([segments[0].from_location] + [segment.to_location for segment in segments])
+        distance_km = round(sum(segment.distance_m for segment in segments) / 1000, 1)
+        duration_str = self._format_duration(sum(segment.duration_s for segment in segments))
         
-        try:
-            headers = {
-                'Accept': 'application/json, application/geo+json, application/gpx+xml, img/png; charset=utf-8',
-                'Authorization': self.api_key,
-                'Content-Type': 'application/json; charset=utf-8'
-            }
-            
-            body = {
-                "coordinates": coordinates,
-                "radiuses": [-1] * len(coordinates),  # Use closest road
-                "instructions": False,
-                "units": "km"
-            }
-            
-            response = requests.post(self.routing_url, headers=headers, json=body)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'routes' in data and data['routes']:
-                route = data['routes'][0]
-                distance_km = round(route['summary']['distance'] / 1000, 1)
-                duration_mins = round(route['summary']['duration'] / 60)
-                
-                # Format duration nicely
-                hours = duration_mins // 60
-                mins = duration_mins % 60
-                
-                if hours > 0:
-                    duration_str = f"{hours}h {mins}m"
-                else:
-                    duration_str = f"{mins}m"
-                
-                # Build route description
-                route_desc = f"{from_location} → {to_location}"
-                if waypoints:
-                    waypoint_str = " → ".join(waypoints)
-                    route_desc = f"{from_location} → {waypoint_str} → {to_location}"
-                
-                result_text = f"""🚗 **Driving Route: {route_desc}**
+        return f"""🚗 **Driving Route: {route_desc}**
 
 **Distance:** {distance_km} km
 **Estimated Time:** {duration_str}
@@ -264,89 +794,92 @@ class ScottishDrivingMCP:
 • Fill up before heading into remote areas
 • Services can be limited in the Highlands
 • Check opening hours for petrol stations in rural areas"""
-                
-                return {
-                    "content": [{
-                        "type": "text",
-                        "text": result_text
-                    }]
-                }
-            else:
-                return {"error": "No route found between these locations"}
-                
-        except Exception as e:
-            return {"error": f"Failed to calculate route: {str(e)}"}
     
-    def _plan_road_trip(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Plan a multi-stop road trip with distance calculations"""
+    async def _plan_road_trip(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Plan a multi-stop road trip, optimising the visiting order over the duration matrix"""
         locations = params["locations"]
         start_location = params.get("start_location")
-        
-        if len(locations) > 5:
-            return {"error": "Maximum 5 locations supported on free tier"}
+        end_location = params.get("end_location")
+        closed = bool(params.get("return_to_start", False))
+        if end_location and locations and end_location == (start_location or locations[0]):
+            # Ending where the trip starts is a round trip; pinning it as the last stop would move the start
+            closed, end_location = True, None
         
         # Use start_location if provided, otherwise start from first location
         if start_location:
-            route_locations = [start_location] + locations
+            route_locations = [start_location] + [loc for loc in locations if loc != start_location]
         else:
-            route_locations = locations
+            route_locations = list(locations)
+        if end_location and not closed:
+            route_locations = [loc for loc in route_locations if loc != end_location] + [end_location]
         
-        total_distance = 0
-        total_time = 0
-        segments = []
+        if len(route_locations) < 2:
+            return {"error": "Need at least two locations for a road trip"}
+        if len(route_locations) > MAX_TRIP_STOPS:
+            return {"error": f"Maximum {MAX_TRIP_STOPS} locations per trip"}
         
-        # Calculate each segment
-        for i in range(len(route_locations) - 1):
-            from_loc = route_locations[i]
-            to_loc = route_locations[i + 1]
-            
-            result = self._get_driving_distance({
-                "from_location": from_loc,
-                "to_location": to_loc
-            })
-            
-            if "error" in result:
-                return result
-            
-            # Parse the result to extract distance and time
-            content = result["content"][0]["text"]
+        n = len(route_locations)
+        given_order = list(range(n)) + ([0] if closed else [])
+        try:
+            # Each place is geocoded once (and usually served from the cache)
+            coordinates = await self._resolve(route_locations)
+            given = await self._segments(route_locations, coordinates, given_order)
+        except ValueError as e:
+            # An unroutable leg in the given order may still be avoidable by reordering
+            if not (params.get("optimize", True) and str(e).startswith("No route")):
+                return {"error": str(e)}
+            given = None
+        
+        segments = given
+        if params.get("optimize", True):
+            def leg_seconds(a, b):
+                cell = self.matrix.get(coordinates[a], coordinates[b])
+                return math.inf if cell is None else cell[1]
             
-            # Simple parsing - in production, you'd store structured data
+            order = optimize_stop_order(
+                [[leg_seconds(a, b) for b in range(n)] for a in range(n)],
+                end=n - 1 if end_location and not closed else None,
+                closed=closed
+            )
             try:
-                lines = content.split('\n')
-                for line in lines:
-                    if line.startswith('**Distance:**'):
-                        dist = float(line.split()[1])
-                        total_distance += dist
-                    elif line.startswith('**Estimated Time:**'):
-                        time_str = line.split('**Estimated Time:**')[1].strip()
-                        # Convert to minutes for calculation
-                        if 'h' in time_str:
-                            hours = int(time_str.split('h')[0])
-                            mins = int(time_str.split('h')[1].replace('m', '').strip()) if 'm' in time_str else 0
-                            total_time += hours * 60 + mins
-                        else:
-                            total_time += int(time_str.replace('m', ''))
-                
-                segments.append(f"• {from_loc} → {to_loc}: {dist}km")
-                
-            except:
-                # Fallback if parsing fails
-                segments.append(f"• {from_loc} → {to_loc}")
+                segments = await self._segments(route_locations, coordinates, order)
+            except ValueError as e:
+                return {"error": str(e)}
         
-        # Format total time
-        total_hours = total_time // 60
-        total_mins = total_time % 60
-        if total_hours > 0:
-            total_time_str = f"{total_hours}h {total_mins}m"
-        else:
-            total_time_str = f"{total_mins}m"
+        if params.get("include_geometry", True):
+            await self._attach_geometry(segments)
         
-        segments_text = "\n".join(segments)
+        saved_seconds = 0.0
+        if given is not None:
+            saved_seconds = sum(segment.duration_s for segment in given) - sum(segment.duration_s for segment in segments)
         
-        result_text = f"""🗺️ **Scottish Road Trip Plan**
+        return {
+            "content": [{
+                "type": "text",
+                "text": self._render_trip(segments, saved_seconds)
+            }],
+            "structuredContent": self._structured(
+                segments,
+                order=[segments[0].from_location] + [segment.to_location for segment in segments],
+                saved_duration_s=round(saved_seconds, 1)
+            )
+        }
+    
+    def _render_trip(self, segments: List[RouteSegment], saved_seconds: float) -> str:
+        route_locations = [segments[0].from_location] + [segment.to_location for segment in segments]
+        segments_text = "\n".join(
+            f"• {segment.from_location} → {segment.to_location}: {segment.distance_m / 1000:.1f}km"
+            for segment in segments
+        )
+        total_distance = sum(segment.distance_m for segment in segments) / 1000
+        total_time_str = self._format_duration(sum(segment.duration_s for segment in segments))
+        savings_text = ""
+        if saved_seconds >= 60:
+            savings_text = f"\n**Saved vs. given order:** {self._format_duration(saved_seconds)}"
+        
+        return f"""🗺️ **Scottish Road Trip Plan**
 
-**Total Route:** {" → ".join(route_locations)}
+**Total Route:** {" → ".join(route_locations)}{savings_text}
 
 **Journey Breakdown:**
 {segments_text}
@@ -365,48 +898,26 @@ class ScottishDrivingMCP:
 • Highland roads: 200-250km per day max
 • Island hopping: Plan for ferry times
 • City to city: 300-400km comfortable"""
-        
-        return {
-            "content": [{
-                "type": "text",
-                "text": result_text
-            }]
-        }
 
 app = modal.App("scottish-driving-mcp")
 
+# Matrix cells, geocodes and leg geometry outlive containers so each pair is paid for once
+matrix_volume = modal.Volume.from_name("scottish-driving-matrix", create_if_missing=True)
+
 @app.function(
-    image=modal.Image.debian_slim().pip_install("requests", "fastapi", "uvicorn"),
-    secrets=[modal.Secret.from_name("openrouteservice")]  # Store API key as secret
+    image=modal.Image.debian_slim().pip_install("httpx", "fastapi", "uvicorn").env({
+        "DRIVING_MATRIX_PATH": "/data/matrix.json",
+        "DRIVING_GEOMETRY_DIR": "/data/geometry"
+    }).add_local_python_source("scotland_common", ignore=not_shipped),
+    secrets=[modal.Secret.from_name("openrouteservice")],  # Store API key as secret
+    volumes={"/data": matrix_volume}
 )
 @modal.asgi_app()
 def fastapi_app():
-    from fastapi import FastAPI
-    import os
-    
-    web_app = FastAPI()
-
-    @web_app.post("/mcp")
-    async def mcp_endpoint(request_dict: Dict[str, Any]) -> Dict[str, Any]:
-        # Get API key from environment
-        api_key = os.getenv("OPENROUTESERVICE_API_KEY")
-        
-        mcp_server = ScottishDrivingMCP()
-        mcp_server.api_key = api_key  # Set the API key
-        
-        method = request_dict.get("method")
-        
-        if method == "tools/list":
-            return mcp_server.list_tools()
-        elif method == "tools/call":
-            tool_name = request_dict.get("params", {}).get("name")
-            arguments = request_dict.get("params", {}).get("arguments", {})
-            return mcp_server.call_tool(tool_name, arguments)
-        else:
-            return {"error": f"Unsupported method: {method}"}
-
-    @web_app.get("/health")
-    async def health_check():
-        return {"status": "healthy", "service": "Scottish Driving Distances MCP"}
+    def sync_volume():
+        # Commit this container's geometry files first: reloading must not discard them
+        matrix_volume.commit()
+        matrix_volume.reload()
     
-    return web_app
\ No newline at end of file
+    # One server per container: caches and pooled connections survive across requests
+    return create_app(ScottishDrivingMCP(sync_volume=sync_volume), "Scottish Driving Distances MCP", on_shutdown=matrix_volume.commit)
@@ -0,0 +1,73 @@
+"""
+Parsing throughput benchmark for Walkhighlands route pages.
+
+Parses every route page saved under fixtures/site repeatedly with:
+
+  * bs4          - a full BeautifulSoup(html, 'html.parser') tree, which is how
+                   _get_route_details handled every page
+  * bs4 + lxml   - the same extraction over a tree built by BeautifulSoup's lxml
+                   backend
+  * lxml targeted - parse_route_page: only the route body is cut out of the raw
+                   bytes and parsed, then read with precompiled XPath
+
+Every parser must produce the same record for every page before anything is
+timed. The fixture pages are hand-written after the site's layout, not saved
+from it: the timings show relative cost, and the selectors are unverified
+against the live site.
+
+Usage:
+    python benchmark.py [--rounds 20]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from route_parser import parse_route_page, parse_route_page_bs4
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "site"
+
+
+def parse_route_page_bs4_lxml(html: bytes, url: str):
+    return parse_route_page_bs4(html, url, features="lxml")
+
+
+def load_pages():
+    return [(path.read_bytes(), f"https://www.walkhighlands.co.uk/{path.relative_to(FIXTURES).as_posix()}")
+            for path in sorted(FIXTURES.glob("*/*.shtml"))]
+
+
+def timed(parse, pages, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for html, url in pages:
+            parse(html, url)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages()
+    for html, url in pages:
+        expected = parse_route_page_bs4(html, url)
+        assert parse_route_page(html, url) == expected, url
+        assert parse_route_page_bs4_lxml(html, url) == expected, url
+
+    total = len(pages) * args.rounds
+    size = sum(len(html) for html, _ in pages) / len(pages)
+    print(f"{len(pages)} fixture pages ({size / 1000:.0f} KB average), {args.rounds} rounds")
+    print(f"{'parser':<16}{'seconds':>10}{'pages/s':>10}{'ms/page':>10}")
+
+    results = {}
+    for name, parse in (("bs4", parse_route_page_bs4), ("bs4 + lxml", parse_route_page_bs4_lxml), ("lxml targeted", parse_route_page)):
+        elapsed = timed(parse, pages, args.rounds)
+        results[name] = elapsed
+        print(f"{name:<16}{elapsed:>10.2f}{total / elapsed:>10.1f}{elapsed / total * 1000:>10.2f}")
+
+    print(f"speedup: {results['bs4'] / results['lxml targeted']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
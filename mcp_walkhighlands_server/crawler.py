@@ -0,0 +1,367 @@
+"""Background crawler: keeps the route index in step with the site, away from the request path
+
+Route pages are enumerated from the sitemaps named in robots.txt, fetched concurrently within a
+per-host politeness budget and revalidated with ETag / If-Modified-Since, so an unchanged site
+costs one conditional GET per page - or nothing, when the sitemap lastmod hasn't moved. Parsed
+routes are written to the index as they arrive and the frontier lives in SQLite, so an
+interrupted crawl carries on where it stopped.
+
+Try it against the fixture site:
+
+    python -m http.server -d fixtures/site 8000
+    python crawler.py --base-url http://127.0.0.1:8000 --delay 0 --index /tmp/routes.db --state /tmp/crawl.db
+"""
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+import sqlite3
+import statistics
+import threading
+import time
+
+import httpx
+
+from route_index import BASE_URL, RouteIndex
+from route_parser import parse_route_page
+
+USER_AGENT = "Mozilla/5.0 (compatible; ScotlandAdventureBot/1.0; +route index refresh)"
+
+# Route pages sit one level down (/fortwilliam/bennevis.shtml); area index pages are skipped
+ROUTE_PATH = re.compile(r"^/[\w-]+/(?!index\.)[\w-]+\.shtml$")
+
+FRONTIER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    lastmod TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    status INTEGER,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    checked_at REAL,
+    changed_at REAL
+);
+CREATE INDEX IF NOT EXISTS pages_state ON pages(state);
+"""
+
+class CrawlFrontier:
+    """Every known route page with its validators and crawl state (pending, done, failed, gone)
+
+    Persisted in SQLite: a crawl that is interrupted leaves its unfinished pages pending, and the
+    next run fetches those before anything else changes.
+    """
+
+    def __init__(self, path: str = ":memory:", max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(FRONTIER_SCHEMA)
+        self._lock = threading.Lock()
+
+    def discover(self, entries: Iterable[Tuple[str, Optional[str]]], recheck_after: float) -> int:
+        """Queue new pages, pages whose sitemap lastmod moved, failed pages, and pages without
+        a lastmod that haven't been checked for recheck_after seconds; returns the queue length"""
+        stale = time.time() - recheck_after
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO pages (url, lastmod) VALUES (?, ?) ON CONFLICT(url) DO UPDATE SET "
+                "state = CASE "
+                "WHEN pages.state = 'failed' THEN 'pending' "
+                "WHEN pages.state IN ('done', 'gone') AND excluded.lastmod IS NOT pages.lastmod THEN 'pending' "
+                "WHEN pages.state = 'done' AND excluded.lastmod IS NULL AND pages.checked_at < ? THEN 'pending' "
+                "ELSE pages.state END, "
+                "attempts = CASE WHEN pages.state = 'failed' THEN 0 ELSE pages.attempts END, "
+                "lastmod = excluded.lastmod",
+                [(url, lastmod, stale) for url, lastmod in entries]
+            )
+            return self._db.execute("SELECT COUNT(*) FROM pages WHERE state = 'pending'").fetchone()[0]
+
+    def pending(self, limit: Optional[int] = None) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT url, etag, last_modified, content_hash FROM pages WHERE state = 'pending' ORDER BY url LIMIT ?",
+                (-1 if limit is None else limit,)
+            ).fetchall()
+
+    def record(self, url: str, status: int, etag: Optional[str] = None, last_modified: Optional[str] = None,
+               content_hash: Optional[str] = None, changed: bool = False, state: str = "done") -> None:
+        """Mark a page checked; validators are only replaced when the response carried new ones"""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE pages SET status = ?, state = ?, attempts = 0, checked_at = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), content_hash = COALESCE(?, content_hash), "
+                "changed_at = CASE WHEN ? THEN ? ELSE changed_at END WHERE url = ?",
+                (status, state, now, etag, last_modified, content_hash, changed, now, url)
+            )
+
+    def fail(self, url: str, status: Optional[int] = None) -> bool:
+        """Count a failed attempt; returns whether the page stays queued for another try"""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE pages SET status = ?, attempts = attempts + 1, "
+                "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END WHERE url = ?",
+                (status, self.max_attempts, url)
+            )
+            return self._db.execute("SELECT state FROM pages WHERE url = ?", (url,)).fetchone()[0] == "pending"
+
+    def freshness(self) -> Dict[str, Any]:
+        """How long since pages were last confirmed current, and how many are in each state"""
+        now = time.time()
+        with self._lock:
+            ages = [now - row[0] for row in self._db.execute("SELECT checked_at FROM pages WHERE state = 'done'")]
+            states = dict(self._db.execute("SELECT state, COUNT(*) FROM pages GROUP BY state").fetchall())
+        return {
+            "pages": sum(states.values()),
+            "states": states,
+            "median_age_hours": round(statistics.median(ages) / 3600, 2) if ages else None,
+            "oldest_age_hours": round(max(ages) / 3600, 2) if ages else None
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+class HostBudget:
+    """Politeness for one host: at most `concurrency` requests in flight, starting `delay` seconds apart"""
+
+    def __init__(self, concurrency: int = 2, delay: float = 1.0):
+        self.delay = delay
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def __aenter__(self) -> None:
+        await self._semaphore.acquire()
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._semaphore.release()
+
+    def back_off(self, seconds: float) -> None:
+        """Hold every further request to this host for a while (429 / 503 Retry-After)"""
+        self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+def retry_after(response: httpx.Response, default: float = 30.0) -> float:
+    value = response.headers.get("retry-after", "")
+    return min(float(value), 300.0) if value.isdigit() else default
+
+class Crawler:
+    """One crawl of the site into a RouteIndex: enumerate, diff against the frontier, refresh what changed"""
+
+    def __init__(self, index: RouteIndex, frontier: CrawlFrontier, base_url: str = BASE_URL, client: Optional[httpx.AsyncClient] = None,
+                 concurrency: int = 4, per_host: int = 2, delay: float = 1.0, recheck_after: float = 7 * 86400):
+        self.index = index
+        self.frontier = frontier
+        self.base_url = base_url.rstrip("/")
+        self.http = client or httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=concurrency),
+            follow_redirects=True
+        )
+        self._owns_client = client is None
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.delay = delay
+        self.recheck_after = recheck_after
+        self.budgets: Dict[str, HostBudget] = {}
+        self.robots = RobotFileParser()
+        self.metrics = dict.fromkeys(
+            ["discovered", "queued", "requests", "fetched", "not_modified", "unchanged", "updated", "not_routes", "gone", "retried", "failed", "bytes"], 0
+        )
+
+    def _budget(self, url: str) -> HostBudget:
+        host = urlparse(url).netloc
+        if host not in self.budgets:
+            self.budgets[host] = HostBudget(self.per_host, self.delay)
+        return self.budgets[host]
+
+    async def _get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        async with self._budget(url):
+            self.metrics["requests"] += 1
+            return await self.http.get(url, headers=headers)
+
+    async def _load_robots(self) -> List[str]:
+        """Apply robots.txt (disallow rules, crawl delay) and return the sitemaps it names"""
+        try:
+            response = await self._get(f"{self.base_url}/robots.txt")
+            lines = response.text.splitlines() if response.status_code == 200 else []
+        except httpx.HTTPError:
+            lines = []
+        self.robots.parse(lines)
+
+        crawl_delay = self.robots.crawl_delay(USER_AGENT)
+        if crawl_delay:
+            self.delay = max(self.delay, float(crawl_delay))
+            for budget in self.budgets.values():
+                budget.delay = self.delay
+        sitemaps = self.robots.site_maps() or ["/sitemap.xml"]
+        return [urljoin(f"{self.base_url}/", sitemap) for sitemap in sitemaps]
+
+    async def _sitemap_entries(self, url: str, depth: int = 0) -> List[Tuple[str, Optional[str]]]:
+        """(page URL, lastmod) for every crawlable route page in a sitemap, following sitemap indexes"""
+        response = await self._get(url)
+        response.raise_for_status()
+        content = response.content
+        if content[:2] == b"\x1f\x8b":
+            content = gzip.decompress(content)
+        root = ElementTree.fromstring(content)
+
+        entries = []
+        for node in root:
+            loc = (node.findtext("{*}loc") or "").strip()
+            if not loc:
+                continue
+            loc = urljoin(url, loc)
+            if root.tag.endswith("sitemapindex"):
+                if depth < 2:
+                    entries += await self._sitemap_entries(loc, depth + 1)
+            elif ROUTE_PATH.match(urlparse(loc).path) and self.robots.can_fetch(USER_AGENT, loc):
+                entries.append((loc, (node.findtext("{*}lastmod") or "").strip() or None))
+        return entries
+
+    async def _refresh(self, page: sqlite3.Row) -> bool:
+        """Revalidate one page and index it if it changed; returns whether it should be retried"""
+        url = page["url"]
+        headers = {}
+        if page["etag"]:
+            headers["If-None-Match"] = page["etag"]
+        if page["last_modified"]:
+            headers["If-Modified-Since"] = page["last_modified"]
+
+        try:
+            response = await self._get(url, headers)
+        except httpx.HTTPError as e:
+            print(f"Crawl request failed for {url}: {e}")
+            return self._retry(url)
+
+        status = response.status_code
+        if status == 304:
+            self.metrics["not_modified"] += 1
+            self.frontier.record(url, status)
+            return False
+        if status in (404, 410):
+            self.metrics["gone"] += 1
+            self.index.delete(url)
+            self.frontier.record(url, status, state="gone")
+            return False
+        if status in (429, 503):
+            self._budget(url).back_off(retry_after(response))
+            return self._retry(url, status)
+        if status != 200:
+            return self._retry(url, status)
+
+        self.metrics["fetched"] += 1
+        self.metrics["bytes"] += len(response.content)
+        etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+        # Servers without validators still send identical bytes for an unchanged page
+        content_hash = hashlib.sha1(response.content).hexdigest()
+        if content_hash == page["content_hash"]:
+            self.metrics["unchanged"] += 1
+            self.frontier.record(url, status, etag, last_modified)
+            return False
+
+        route = parse_route_page(response.content, url)
+        if route:
+            self.index.upsert(route)
+            self.metrics["updated"] += 1
+        else:
+            self.metrics["not_routes"] += 1
+        self.frontier.record(url, status, etag, last_modified, content_hash, changed=True)
+        return False
+
+    def _retry(self, url: str, status: Optional[int] = None) -> bool:
+        retry = self.frontier.fail(url, status)
+        self.metrics["retried" if retry else "failed"] += 1
+        return retry
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            page = await queue.get()
+            try:
+                if await self._refresh(page):
+                    queue.put_nowait(page)
+            except Exception as e:
+                print(f"Crawl failed for {page['url']}: {e}")
+                self._retry(page["url"])
+            finally:
+                queue.task_done()
+
+    async def run(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Crawl once and return throughput and freshness metrics; limit caps the pages refreshed"""
+        started = time.perf_counter()
+        entries: Dict[str, Optional[str]] = {}
+        for sitemap in await self._load_robots():
+            try:
+                entries.update(await self._sitemap_entries(sitemap))
+            except (httpx.HTTPError, ElementTree.ParseError) as e:
+                print(f"Sitemap failed for {sitemap}: {e}")
+        self.metrics["discovered"] = len(entries)
+        self.frontier.discover(entries.items(), self.recheck_after)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for page in self.frontier.pending(limit):
+            queue.put_nowait(page)
+        self.metrics["queued"] = queue.qsize()
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        elapsed = time.perf_counter() - started
+        return {
+            **self.metrics,
+            "seconds": round(elapsed, 2),
+            "requests_per_second": round(self.metrics["requests"] / elapsed, 1) if elapsed else None,
+            "freshness": self.frontier.freshness()
+        }
+
+    async def close(self) -> None:
+        if self._owns_client:
+            await self.http.aclose()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh the route index from Walkhighlands (or a fixture site)")
+    parser.add_argument("--base-url", default=BASE_URL, help="site to crawl")
+    parser.add_argument("--index", default="routes.db", help="route index database to update")
+    parser.add_argument("--state", default="crawl.db", help="crawl frontier database (makes crawls resumable)")
+    parser.add_argument("--concurrency", type=int, default=4, help="pages fetched at once")
+    parser.add_argument("--per-host", type=int, default=2, help="requests in flight per host")
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds between request starts per host (robots.txt Crawl-delay wins if longer)")
+    parser.add_argument("--recheck-days", type=float, default=7, help="revalidate pages without a sitemap lastmod after this long")
+    parser.add_argument("--limit", type=int, help="refresh at most this many pages")
+    args = parser.parse_args()
+
+    index, frontier = RouteIndex(args.index), CrawlFrontier(args.state)
+
+    async def crawl() -> Dict[str, Any]:
+        crawler = Crawler(index, frontier, args.base_url, concurrency=args.concurrency, per_host=args.per_host,
+                          delay=args.delay, recheck_after=args.recheck_days * 86400)
+        try:
+            return await crawler.run(args.limit)
+        finally:
+            await crawler.close()
+
+    try:
+        print(json.dumps(asyncio.run(crawl()), indent=2))
+    finally:
+        index.close()
+        frontier.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,75 @@
 import modal
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Optional
+import asyncio
 import json
-import requests
-from bs4 import BeautifulSoup
-import re
-from urllib.parse import urljoin, urlparse
-import time
+import httpx
+from urllib.parse import urljoin
+import os
+from route_index import RouteIndex
+from peak_table import PeakTable
+from route_parser import parse_route_page
+from scotland_common import MCPServer, build_http_client, create_app, get_gazetteer, get_geocoder, not_shipped
 
-class WalkHighlandsMCP:
-    def __init__(self):
-        self.base_url = "https://www.walkhighlands.co.uk"
-        self.search_url = f"{self.base_url}/walk-search.php"
-        self.session = requests.Session()
+class WalkHighlandsMCP(MCPServer):
+    def __init__(self, index_path: Optional[str] = None, read_only: bool = False,
+                 reload_volume: Optional[Callable[[], None]] = None, refresh_seconds: float = 15 * 60):
         # Add headers to appear more like a regular browser
-        self.session.headers.update({
+        super().__init__(build_http_client(max_connections=4, headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        }))
+        self.base_url = "https://www.walkhighlands.co.uk"
+        self.search_url = f"{self.base_url}/walk-search.php"
+        # Searches are answered from the local index; nothing on the request path touches the site
+        self.routes = RouteIndex(index_path or os.getenv("WALKHIGHLANDS_INDEX_PATH", ":memory:"), read_only=read_only)
+        # Replicas only read the index; the crawl writes it, and they pick up its commits by reloading
+        self.reload_volume = reload_volume
+        self.refresh_seconds = refresh_seconds
+        self._refresher: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        # Hill lists are bundled; the table only needs joining to whatever routes the index holds
+        self.peaks = PeakTable()
+        self.gazetteer = get_gazetteer()
+        self.geocoder = get_geocoder()
+    
+    async def startup(self) -> None:
+        await super().startup()
+        if not self.routes.read_only:
+            self.routes.seed()
+        self._prepare()
+        if self.reload_volume:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+    
+    async def shutdown(self) -> None:
+        if self._refresher:
+            self._refresher.cancel()
+        await super().shutdown()
+        self.routes.close()
+    
+    def _prepare(self) -> None:
+        """Build the trailhead tree and the peak-route join for the routes currently indexed"""
+        self.routes.prepare()
+        self.peaks.join_routes(self.routes.peak_listings())
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                # The volume won't reload with the database open, so the index closes around it
+                await asyncio.to_thread(self.routes.reopen, self.reload_volume)
+                await asyncio.to_thread(self._prepare)
+                self.refreshes += 1
+            except Exception as e:
+                print(f"Route index refresh failed: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "route_index": self.routes.stats(),
+            "index_refreshes": self.refreshes,
+            "peaks": self.peaks.stats(),
+            "gazetteer": self.gazetteer.stats(),
+            "geocoder": self.geocoder.stats() if self.geocoder else None
+        }
     
     def list_tools(self) -> Dict[str, Any]:
         return {
@@ -32,7 +86,7 @@ class WalkHighlandsMCP:
                             },
                             "region": {
                                 "type": "string",
-                                "description": "Scottish region to search in (e.g., 'Highlands', 'Southern Uplands', 'Borders', 'Trossachs')"
+                                "description": "Walk Highlands area to search in (e.g., 'Cairngorms', 'Glencoe', 'Isle of Skye', 'Trossachs')"
                             },
                             "difficulty": {
                                 "type": "integer",
@@ -71,18 +125,37 @@ class WalkHighlandsMCP:
                 },
                 {
                     "name": "get_routes_by_location",
-                    "description": "Find walking routes near a specific Scottish location or landmark.",
+                    "description": "Find walking routes starting nearest to a specific Scottish location, landmark or coordinate.",
                     "inputSchema": {
                         "type": "object",
                         "properties": {
                             "location": {
                                 "type": "string",
-                                "description": "Location name in Scotland (e.g., 'Stirling', 'Loch Lomond', 'Isle of Skye')"
+                                "description": "Location name in Scotland (e.g., 'Stirling', 'Loch Lomond', 'Isle of Skye') or 'lat,lon' coordinates"
+                            },
+                            "radius_km": {
+                                "type": "number",
+                                "description": "Only routes starting within this many km of the location (optional; default is simply the nearest)"
                             },
                             "max_distance": {
                                 "type": "number",
                                 "description": "Maximum walking distance in km (optional filter)"
                             },
+                            "region": {
+                                "type": "string",
+                                "description": "Only routes in this region (optional)"
+                            },
+                            "difficulty": {
+                                "type": "integer",
+                                "description": "Route difficulty level (1-5 scale, where 1=easy, 5=very difficult)",
+                                "minimum": 1,
+                                "maximum": 5
+                            },
+                            "hill_type": {
+                                "type": "string",
+                                "description": "Type of hills/peaks to include",
+                                "enum": ["munro", "corbett", "graham", "donald", "marilyn", "any"]
+                            },
                             "max_results": {
                                 "type": "integer",
                                 "description": "Maximum number of results to return (default: 10)",
@@ -94,166 +167,143 @@ class WalkHighlandsMCP:
                 },
                 {
                     "name": "get_munros_and_corbetts",
-                    "description": "Get information about specific Munros, Corbetts, or other Scottish peaks with available walking routes.",
+                    "description": "Get information about specific Munros, Corbetts, or other Scottish peaks with available walking routes. Look peaks up by name, list them by type, height and region (e.g. Corbetts over 900m in Torridon), or list the peaks a route climbs.",
                     "inputSchema": {
                         "type": "object",
                         "properties": {
                             "peak_name": {
                                 "type": "string",
-                                "description": "Name of the peak (e.g., 'Ben Nevis', 'Cairn Gorm', 'Ben Lomond')"
+                                "description": "Name or start of the name of the peak (e.g., 'Ben Nevis', 'Cairn Gorm', 'Ben Lomond')"
                             },
                             "peak_type": {
                                 "type": "string",
                                 "description": "Type of peak to search for",
                                 "enum": ["munro", "corbett", "graham", "donald", "any"],
                                 "default": "any"
+                            },
+                            "region": {
+                                "type": "string",
+                                "description": "Only peaks in this region (e.g., 'Torridon', 'Cairngorms', 'Isle of Skye')"
+                            },
+                            "min_height": {
+                                "type": "integer",
+                                "description": "Only peaks at least this high, in metres"
+                            },
+                            "max_height": {
+                                "type": "integer",
+                                "description": "Only peaks at most this high, in metres"
+                            },
+                            "route_url": {
+                                "type": "string",
+                                "description": "List the peaks climbed by this Walk Highlands route"
+                            },
+                            "max_results": {
+                                "type": "integer",
+                                "description": "Maximum number of peaks to return (default: 20)",
+                                "default": 20
                             }
-                        },
-                        "required": ["peak_name"]
+                        }
                     }
                 }
             ]
         }
     
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         try:
             if name == "search_routes":
-                return self._search_routes(arguments)
+                result = await self._search_routes(arguments)
             elif name == "get_route_details":
-                return self._get_route_details(arguments["route_url"])
+                result = await self._get_route_details(arguments["route_url"])
             elif name == "get_routes_by_location":
-                return self._get_routes_by_location(arguments)
+                result = await self._get_routes_by_location(arguments)
             elif name == "get_munros_and_corbetts":
-                return self._get_munros_and_corbetts(arguments)
+                result = await self._get_munros_and_corbetts(arguments)
             else:
-                return {"error": f"Unknown tool: {name}"}
+                result = {"error": f"Unknown tool: {name}"}
         except Exception as e:
-            return {"error": f"Error in {name}: {str(e)}"}
+            result = {"error": f"Error in {name}: {str(e)}"}
+        return self._record_call(name, result)
     
-    def _search_routes(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Search for routes on Walk Highlands"""
-        try:
-            # First, let's get the search page to understand its structure
-            response = self._safe_request(self.search_url)
-            if not response:
-                return {"error": "Could not access Walk Highlands search page"}
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # For now, let's try a basic search approach
-            # We'll improve this as we learn more about the site structure
-            search_term = params.get("search_term", "")
-            max_results = params.get("max_results", 10)
-            
-            # Try searching for routes using the site's search functionality
-            routes = self._perform_basic_search(search_term, max_results)
-            
-            if not routes:
-                return {
-                    "content": [{
-                        "type": "text",
-                        "text": f"No routes found for search term: '{search_term}'. Try searching for specific mountain names, regions like 'Highlands' or 'Cairngorms', or general terms like 'coastal walks'."
-                    }]
-                }
-            
-            # Format results
-            result_text = f"Found {len(routes)} walking routes:\n\n"
-            
-            for i, route in enumerate(routes, 1):
-                result_text += f"{i}. **{route['name']}**\n"
-                if route.get('region'):
-                    result_text += f"   📍 Region: {route['region']}\n"
-                if route.get('difficulty'):
-                    result_text += f"   ⭐ Difficulty: {route['difficulty']}/5\n"
-                if route.get('distance'):
-                    result_text += f"   📏 Distance: {route['distance']}\n"
-                if route.get('time'):
-                    result_text += f"   ⏱️ Time: {route['time']}\n"
-                if route.get('peaks'):
-                    result_text += f"   🏔️ Peaks: {route['peaks']}\n"
-                if route.get('short_description'):
-                    result_text += f"   📝 {route['short_description']}\n"
-                result_text += f"   🔗 URL: {route['url']}\n\n"
-            
+    async def _search_routes(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Search the local route index, ranked by BM25 relevance"""
+        search_term = params.get("search_term", "")
+        max_results = max(1, min(int(params.get("max_results", 10)), 50))
+        
+        routes = self.routes.search(
+            search_term,
+            region=params.get("region"),
+            difficulty=params.get("difficulty"),
+            hill_type=params.get("hill_type"),
+            limit=max_results
+        )
+        
+        if not routes:
             return {
                 "content": [{
                     "type": "text",
-                    "text": result_text
+                    "text": f"No routes found for search term: '{search_term}'. Try searching for specific mountain names, areas like 'Cairngorms' or 'Isle of Skye', or general terms like 'coastal walks'."
                 }]
             }
-            
-        except Exception as e:
-            return {"error": f"Error searching routes: {str(e)}"}
-    
-    def _perform_basic_search(self, search_term: str, max_results: int) -> List[Dict[str, Any]]:
-        """Perform a basic search - this is a starting implementation"""
-        routes = []
-        
-        # For now, let's return some example routes to test the structure
-        # In a real implementation, you would scrape the actual search results
-        
-        if search_term.lower() in ["ben nevis", "nevis"]:
-            routes.append({
-                "name": "Ben Nevis via Tourist Path",
-                "region": "Lochaber",
-                "difficulty": 4,
-                "distance": "17km",
-                "time": "7-9 hours",
-                "peaks": "Ben Nevis (1345m)",
-                "short_description": "The classic route up Scotland's highest mountain",
-                "url": f"{self.base_url}/route/example-ben-nevis"
-            })
         
-        if search_term.lower() in ["cairngorms", "cairn gorm"]:
-            routes.append({
-                "name": "Cairn Gorm from Ski Centre",
-                "region": "Cairngorms",
-                "difficulty": 3,
-                "distance": "12km",
-                "time": "5-6 hours",
-                "peaks": "Cairn Gorm (1245m)",
-                "short_description": "Popular Munro with excellent views",
-                "url": f"{self.base_url}/route/example-cairn-gorm"
-            })
+        # Format results
+        result_text = f"Found {len(routes)} walking routes:\n\n"
         
-        # This is where you would implement actual scraping
-        # For now, we return example data to test the system
+        for i, route in enumerate(routes, 1):
+            result_text += f"{i}. **{route['name']}**\n"
+            if route.get('region'):
+                result_text += f"   📍 Region: {route['region']}\n"
+            if route.get('difficulty'):
+                result_text += f"   ⭐ Difficulty: {route['difficulty']}/5\n"
+            if route.get('distance'):
+                result_text += f"   📏 Distance: {route['distance']}\n"
+            if route.get('time'):
+                result_text += f"   ⏱️ Time: {route['time']}\n"
+            if route.get('peaks'):
+                result_text += f"   🏔️ Peaks: {route['peaks']}\n"
+            if route.get('short_description'):
+                result_text += f"   📝 {route['short_description']}\n"
+            result_text += f"   🔗 URL: {route['url']}\n\n"
         
-        return routes[:max_results]
+        return {
+            "content": [{
+                "type": "text",
+                "text": result_text
+            }],
+            "structuredContent": {"routes": routes}
+        }
     
-    def _get_route_details(self, route_url: str) -> Dict[str, Any]:
-        """Get detailed information about a specific route"""
+    async def _get_route_details(self, route_url: str) -> Dict[str, Any]:
+        """Get detailed information about a specific route, from the index when the crawl has it"""
         try:
             if not route_url.startswith('http'):
                 route_url = urljoin(self.base_url, route_url)
             
-            response = self._safe_request(route_url)
-            if not response:
-                return {"error": f"Could not access route page: {route_url}"}
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract route details - this would need to be implemented based on
-            # the actual HTML structure of Walk Highlands route pages
-            route_details = self._parse_route_page(soup, route_url)
-            
-            if not route_details:
-                return {"error": "Could not parse route information from the page"}
+            # Crawled routes carry their full details; only pages the crawl hasn't reached are fetched
+            route_details = self.routes.get(route_url)
+            if not route_details or not route_details.get('stats'):
+                response = await self._safe_request(route_url)
+                if not response:
+                    return {"error": f"Could not access route page: {route_url}"}
+                
+                route_details = parse_route_page(response.content, route_url)
+                
+                if not route_details:
+                    return {"error": "Could not parse route information from the page"}
             
             # Format the detailed route information
             result_text = f"**{route_details['name']}**\n\n"
             
-            if route_details.get('summary'):
-                result_text += f"**Summary:** {route_details['summary']}\n\n"
+            if route_details.get('description'):
+                result_text += f"**Summary:** {route_details['description']}\n\n"
             
-            if route_details.get('details'):
+            if route_details.get('stats'):
                 result_text += "**Route Details:**\n"
-                for key, value in route_details['details'].items():
+                for key, value in route_details['stats'].items():
                     result_text += f"• {key}: {value}\n"
                 result_text += "\n"
             
-            if route_details.get('description'):
-                result_text += f"**Description:**\n{route_details['description']}\n\n"
+            if route_details.get('full_description'):
+                result_text += f"**Description:**\n{route_details['full_description']}\n\n"
             
             if route_details.get('gpx_url'):
                 result_text += f"**GPS Download:** {route_details['gpx_url']}\n\n"
@@ -264,108 +314,205 @@ class WalkHighlandsMCP:
                 "content": [{
                     "type": "text",
                     "text": result_text
-                }]
+                }],
+                "structuredContent": {"route": route_details}
             }
             
         except Exception as e:
             return {"error": f"Error getting route details: {str(e)}"}
     
-    def _parse_route_page(self, soup: BeautifulSoup, url: str) -> Optional[Dict[str, Any]]:
-        """Parse a route detail page - placeholder implementation"""
-        # This would need to be implemented based on actual HTML structure
-        # For now, return a basic structure
-        
-        title = soup.find('title')
-        route_name = title.get_text() if title else "Unknown Route"
+    def _locate(self, location: str) -> Optional[tuple]:
+        """(lat, lon) for 'lat,lon' or a place name, resolved offline: gazetteer, geocoder index, a route's own start, then typo matching"""
+        parts = location.split(',')
+        if len(parts) == 2:
+            try:
+                lat, lon = float(parts[0]), float(parts[1])
+                if -90 <= lat <= 90 and -180 <= lon <= 180:
+                    return (lat, lon)
+            except ValueError:
+                pass
         
-        return {
-            "name": route_name,
-            "summary": "Route details would be extracted from the actual page",
-            "details": {
-                "Distance": "TBD",
-                "Time": "TBD", 
-                "Difficulty": "TBD",
-                "Start Point": "TBD"
-            },
-            "description": "Full route description would be extracted here",
-            "gpx_url": None
-        }
+        coords = self.gazetteer.coordinates(location, fuzzy=self.gazetteer.fuzzy_first)
+        if coords:
+            return coords
+        hit = self.geocoder.lookup(location) if self.geocoder else None
+        if hit:
+            return (hit.lat, hit.lon)
+        # Landmarks the route index knows by name ("Old Man of Storr"), every word matched: one shared
+        # word is not a location ("Loch Hourn" is not Lochnagar)
+        for route in self.routes.search(location, limit=1, any_word=False):
+            if route.get('lat') is not None:
+                return (route['lat'], route['lon'])
+        # Nothing knows the name as written, so it's most likely a misspelt gazetteer place
+        return self.gazetteer.coordinates(location, fuzzy=True)
     
-    def _get_routes_by_location(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Find routes near a specific location"""
+    async def _get_routes_by_location(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Find routes starting near a location, from the trailhead spatial index"""
         location = params["location"]
-        max_results = params.get("max_results", 10)
+        radius_km = params.get("radius_km")
+        max_results = max(1, min(int(params.get("max_results", 10)), 50))
+        
+        coords = self._locate(location)
+        if not coords:
+            return {"error": f"Could not find location: {location}"}
+        
+        routes = self.routes.nearby(
+            coords[0], coords[1],
+            radius_km=radius_km,
+            region=params.get("region"),
+            difficulty=params.get("difficulty"),
+            hill_type=params.get("hill_type"),
+            max_distance_km=params.get("max_distance"),
+            limit=max_results
+        )
+        
+        if not routes:
+            within = f" within {radius_km:g} km" if radius_km else ""
+            return {
+                "content": [{
+                    "type": "text",
+                    "text": f"No routes found{within} of {location}. Try a larger radius or fewer filters."
+                }]
+            }
         
-        # This would implement location-based search
-        # For now, return a placeholder response
+        if radius_km:
+            result_text = f"Found {len(routes)} walking routes within {radius_km:g} km of {location}:\n\n"
+        else:
+            result_text = f"The {len(routes)} walking routes starting nearest to {location}:\n\n"
         
-        result_text = f"Routes near {location}:\n\n"
-        result_text += "🚧 Location-based search coming soon!\n"
-        result_text += "For now, try searching by region name using the 'search_routes' tool."
+        for i, route in enumerate(routes, 1):
+            result_text += f"{i}. **{route['name']}** ({route['km_away']:g} km away)\n"
+            if route.get('region'):
+                result_text += f"   📍 Region: {route['region']}\n"
+            if route.get('difficulty'):
+                result_text += f"   ⭐ Difficulty: {route['difficulty']}/5\n"
+            if route.get('distance'):
+                result_text += f"   📏 Distance: {route['distance']}\n"
+            if route.get('time'):
+                result_text += f"   ⏱️ Time: {route['time']}\n"
+            if route.get('peaks'):
+                result_text += f"   🏔️ Peaks: {route['peaks']}\n"
+            result_text += f"   🔗 URL: {route['url']}\n\n"
         
         return {
             "content": [{
-                "type": "text", 
+                "type": "text",
                 "text": result_text
-            }]
+            }],
+            "structuredContent": {
+                "location": {"name": location, "lat": coords[0], "lon": coords[1]},
+                "routes": routes
+            }
         }
     
-    def _get_munros_and_corbetts(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Get information about specific peaks"""
-        peak_name = params["peak_name"]
-        peak_type = params.get("peak_type", "any")
+    async def _get_munros_and_corbetts(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Get information about peaks from the in-memory peak table"""
+        peak_name = params.get("peak_name")
+        peak_type = params.get("peak_type") or "any"
+        region = params.get("region")
+        min_height = params.get("min_height")
+        max_height = params.get("max_height")
+        route_url = params.get("route_url")
+        max_results = max(1, min(int(params.get("max_results", 20)), 100))
+        
+        if route_url:
+            if not route_url.startswith('http'):
+                route_url = urljoin(self.base_url, route_url)
+            route = self.routes.get(route_url)
+            peaks = self.peaks.peaks_for_route(route_url)
+            heading = f"Peaks climbed by {route['name'] if route else route_url}"
+        elif peak_name:
+            peaks = self.peaks.find(peak_name) or self.peaks.prefix(peak_name, limit=max_results)
+            heading = f"Information about {peak_name}"
+        else:
+            peaks = self.peaks.query(peak_type, min_height, max_height, region, limit=max_results)
+            heading = f"{peak_type.title() + 's' if peak_type != 'any' else 'Peaks'}"
+            if min_height is not None:
+                heading += f" of {min_height}m or more"
+            if max_height is not None:
+                heading += f" up to {max_height}m"
+            if region:
+                heading += f" in {region}"
+        
+        # Filters not already applied by the bitmap query
+        peaks = [
+            peak for peak in peaks
+            if (peak_type == "any" or peak_type in peak.classifications)
+            and (min_height is None or peak.height >= min_height)
+            and (max_height is None or peak.height <= max_height)
+            and (not region or region.lower() in peak.region.lower())
+        ][:max_results]
+        
+        if not peaks:
+            return {
+                "content": [{
+                    "type": "text",
+                    "text": f"{heading}: no matching peaks found. Try a different spelling, a broader region or the 'search_routes' tool."
+                }]
+            }
         
-        # This would implement peak-specific search
-        result_text = f"Information about {peak_name}:\n\n"
-        result_text += "🚧 Peak-specific search coming soon!\n"
-        result_text += "For now, try searching by peak name using the 'search_routes' tool."
+        result_text = f"{heading} ({len(peaks)}):\n\n"
+        structured = []
+        for i, peak in enumerate(peaks, 1):
+            classifications = ", ".join(c.title() for c in peak.classifications)
+            result_text += f"{i}. **{peak.name}** ({peak.height}m) - {classifications}\n"
+            result_text += f"   📍 Region: {peak.region} ({peak.lat:.4f}, {peak.lon:.4f})\n"
+            routes = [self.routes.get(url) for url in self.peaks.routes_for(peak)]
+            routes = [route for route in routes if route]
+            for route in routes:
+                result_text += f"   🥾 {route['name']}: {route['url']}\n"
+            result_text += "\n"
+            structured.append({**peak._asdict(), "routes": [route['url'] for route in routes]})
         
         return {
             "content": [{
                 "type": "text",
                 "text": result_text
-            }]
+            }],
+            "structuredContent": {"peaks": structured}
         }
     
-    def _safe_request(self, url: str, delay: float = 1.0) -> Optional[requests.Response]:
+    async def _safe_request(self, url: str, delay: float = 1.0) -> Optional[httpx.Response]:
         """Make a safe HTTP request with rate limiting"""
         try:
-            time.sleep(delay)  # Be respectful to the website
-            response = self.session.get(url, timeout=10)
+            await asyncio.sleep(delay)  # Be respectful to the website
+            response = await self.http.get(url, timeout=10)
             response.raise_for_status()
             return response
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Request failed for {url}: {e}")
             return None
 
 app = modal.App("scotland-walkhighlands-mcp")
 
-@app.function(
-    image=modal.Image.debian_slim().pip_install("requests", "beautifulsoup4", "fastapi", "uvicorn", "lxml")
-)
-@modal.asgi_app()
-def fastapi_app():
-    from fastapi import FastAPI
-    
-    web_app = FastAPI()
+# The route index outlives containers: the scheduled crawl writes it, every replica reads it
+routes_volume = modal.Volume.from_name("walkhighlands-routes", create_if_missing=True)
 
-    @web_app.post("/mcp")
-    async def mcp_endpoint(request_dict: Dict[str, Any]) -> Dict[str, Any]:
-        mcp_server = WalkHighlandsMCP()
-        
-        method = request_dict.get("method")
-        
-        if method == "tools/list":
-            return mcp_server.list_tools()
-        elif method == "tools/call":
-            tool_name = request_dict.get("params", {}).get("name")
-            arguments = request_dict.get("params", {}).get("arguments", {})
-            return mcp_server.call_tool(tool_name, arguments)
-        else:
-            return {"error": f"Unsupported method: {method}"}
+image = modal.Image.debian_slim().pip_install("httpx", "beautifulsoup4", "fastapi", "uvicorn", "lxml").env({
+    "WALKHIGHLANDS_INDEX_PATH": "/data/routes.db"
+}).add_local_python_source("route_index", "route_parser", "spatial_index", "peaks", "peak_table", "crawler").add_local_python_source("scotland_common", ignore=not_shipped)
 
-    @web_app.get("/health")
-    async def health_check():
-        return {"status": "healthy", "service": "Scotland Walk Highlands MCP"}
+@app.function(image=image, volumes={"/data": routes_volume}, schedule=modal.Period(days=1), timeout=3600)
+async def crawl_routes() -> Dict[str, Any]:
+    """Refresh the route index off the request path; only new or changed pages are fetched"""
+    from crawler import Crawler, CrawlFrontier
     
-    return web_app
\ No newline at end of file
+    routes = RouteIndex(os.environ["WALKHIGHLANDS_INDEX_PATH"])
+    routes.seed()
+    frontier = CrawlFrontier("/data/crawl.db")
+    crawler = Crawler(routes, frontier)
+    try:
+        metrics = await crawler.run()
+    finally:
+        await crawler.close()
+        routes.close()
+        frontier.close()
+        routes_volume.commit()
+    print(json.dumps(metrics))
+    return metrics
+
+@app.function(image=image, volumes={"/data": routes_volume})
+@modal.asgi_app()
+def fastapi_app():
+    # One server per container: caches and pooled connections survive across requests
+    return create_app(WalkHighlandsMCP(read_only=True, reload_volume=routes_volume.reload), "Scotland Walk Highlands MCP")
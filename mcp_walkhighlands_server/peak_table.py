@@ -0,0 +1,174 @@
+"""Hill lookup table: Munros, Corbetts, Grahams and Donalds as flat arrays with bitmap filters and a name index"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Tuple
+import re
+import unicodedata
+
+from peaks import PEAKS
+from route_parser import PEAK
+
+CLASSIFICATIONS = {"M": "munro", "C": "corbett", "G": "graham", "D": "donald"}
+
+class Peak(NamedTuple):
+    name: str
+    classifications: Tuple[str, ...]
+    height: int
+    lat: float
+    lon: float
+    region: str
+
+class PeakTable:
+    """Munros, Corbetts, Grahams and Donalds in memory, loaded once per container
+
+    Rows are kept highest first in parallel arrays, so a minimum height is a row prefix. Each
+    classification and region is a bitmap over rows (a Python int), and a filtered query is a
+    few big-integer ANDs followed by a walk over the set bits, already in height order. Names and
+    aliases map to rows (several hills share a name), a sorted key list serves prefix lookups,
+    and join_routes() links peaks to the indexed routes that climb them, in both directions.
+    """
+
+    def __init__(self, text: str = PEAKS):
+        lines = [line.split("|") for line in text.strip().splitlines()]
+        lines.sort(key=lambda fields: -int(fields[2]))
+
+        self.names: List[str] = []
+        self.heights = array("H")
+        self.lats = array("d")
+        self.lons = array("d")
+        self.regions: List[str] = []
+        self.region_codes = bytearray()
+        self.bitmaps: Dict[str, int] = dict.fromkeys(CLASSIFICATIONS.values(), 0)
+        self.region_bitmaps: Dict[str, int] = {}
+        self.index: Dict[str, List[int]] = {}
+
+        for row, (name, classes, height, lat, lon, region, aliases) in enumerate(lines):
+            self.names.append(name)
+            self.heights.append(int(height))
+            self.lats.append(float(lat))
+            self.lons.append(float(lon))
+            if region not in self.region_bitmaps:
+                self.region_bitmaps[region] = 0
+                self.regions.append(region)
+            self.region_codes.append(self.regions.index(region))
+            self.region_bitmaps[region] |= 1 << row
+            for code in classes:
+                self.bitmaps[CLASSIFICATIONS[code]] |= 1 << row
+            for spelling in [name] + [alias for alias in aliases.split(";") if alias]:
+                key = self.normalize(spelling)
+                # "The Cobbler" is as often just "Cobbler", for lookups and prefixes alike
+                for key in (key, key[4:]) if key.startswith("the ") else (key,):
+                    rows = self.index.setdefault(key, [])
+                    if row not in rows:
+                        rows.append(row)
+
+        self.all = (1 << len(self.names)) - 1
+        # Negated heights ascend, so bisect finds the row boundary for a height threshold
+        self._descending = [-height for height in self.heights]
+        self._keys = sorted(self.index)
+
+        self.routes: Dict[int, List[str]] = {}
+        self.route_peaks: Dict[str, List[int]] = {}
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Lower-case, accents and apostrophes dropped, hyphens as spaces ("Sgùrr a' Mhàim" = "sgurr a mhaim")"""
+        name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+        name = name.lower().replace("'", "").replace("-", " ")
+        return " ".join(name.split())
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _peak(self, row: int) -> Peak:
+        classifications = tuple(c for c, bits in self.bitmaps.items() if bits >> row & 1)
+        return Peak(self.names[row], classifications, self.heights[row], self.lats[row], self.lons[row], self.regions[self.region_codes[row]])
+
+    def _rows(self, bits: int, limit: Optional[int] = None) -> List[int]:
+        rows = []
+        while bits and (limit is None or len(rows) < limit):
+            lowest = bits & -bits
+            rows.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        return rows
+
+    def _find_rows(self, name: str, height: Optional[int] = None) -> List[int]:
+        key = self.normalize(name)
+        rows = self.index.get(key)
+        if rows is None:
+            # "The Cobbler (Ben Arthur)": try the name and the bracketed alternative
+            bracketed = re.match(r"(.+?)\s*\((.+)\)$", key)
+            rows = (self.index.get(bracketed.group(1)) or self.index.get(bracketed.group(2)) or []) if bracketed else []
+            if not rows and key.startswith("the "):
+                rows = self.index.get(key[4:], [])
+        if height is not None:
+            rows = [row for row in rows if abs(self.heights[row] - height) <= 2]
+        return rows
+
+    def find(self, name: str, height: Optional[int] = None) -> List[Peak]:
+        """Hills with this name or alias, highest first; height (m) picks one of several namesakes"""
+        return [self._peak(row) for row in sorted(self._find_rows(name, height))]
+
+    def prefix(self, text: str, limit: int = 10) -> List[Peak]:
+        """Hills whose name or alias starts with text, highest first"""
+        key = self.normalize(text)
+        rows = set()
+        position = bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position].startswith(key):
+            rows.update(self.index[self._keys[position]])
+            position += 1
+        return [self._peak(row) for row in sorted(rows)[:limit]]
+
+    def query(self, classification: Optional[str] = None, min_height: Optional[int] = None, max_height: Optional[int] = None,
+              region: Optional[str] = None, limit: Optional[int] = None) -> List[Peak]:
+        """Hills matching every filter, highest first ("Corbetts over 900m in Torridon")"""
+        bits = self.all
+        if classification and classification != "any":
+            bits &= self.bitmaps.get(classification.lower(), 0)
+        if min_height is not None:
+            bits &= (1 << bisect_right(self._descending, -min_height)) - 1
+        if max_height is not None:
+            bits &= self.all ^ ((1 << bisect_left(self._descending, -max_height)) - 1)
+        if region:
+            bits &= self._any_region(region.lower())
+        return [self._peak(row) for row in self._rows(bits, limit)]
+
+    def _any_region(self, wanted: str) -> int:
+        bits = 0
+        for region, region_bits in self.region_bitmaps.items():
+            if wanted in region.lower():
+                bits |= region_bits
+        return bits
+
+    def join_routes(self, routes: Iterable[Tuple[str, str]]) -> int:
+        """Link peaks to routes from (route URL, peaks text like "Ben Nevis (1345m)") pairs; returns links made"""
+        # Built aside and swapped in whole, so lookups during a re-join never see it half done
+        peak_routes: Dict[int, List[str]] = {}
+        route_peaks: Dict[str, List[int]] = {}
+        links = 0
+        for url, peaks in routes:
+            for name, height in PEAK.findall(peaks or ""):
+                for row in self._find_rows(name, int(height))[:1]:
+                    peak_routes.setdefault(row, []).append(url)
+                    route_peaks.setdefault(url, []).append(row)
+                    links += 1
+        self.routes, self.route_peaks = peak_routes, route_peaks
+        return links
+
+    def routes_for(self, peak: Peak) -> List[str]:
+        """URLs of indexed routes that climb this hill"""
+        rows = self._find_rows(peak.name, peak.height)
+        return self.routes.get(rows[0], []) if rows else []
+
+    def peaks_for_route(self, url: str) -> List[Peak]:
+        """Listed hills a route climbs"""
+        return [self._peak(row) for row in self.route_peaks.get(url, [])]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "peaks": len(self.names),
+            "spellings": len(self.index),
+            **{f"{classification}s": bin(bits).count("1") for classification, bits in self.bitmaps.items()},
+            "peaks_with_routes": len(self.routes),
+            "routes_with_peaks": len(self.route_peaks)
+        }
@@ -0,0 +1,112 @@
+# Peak table source data, one hill per line:
+#   name | classifications | height (m) | lat | lon | region | aliases (";"-separated)
+# Classifications: M Munro, C Corbett, G Graham, D Donald (Lowland hills, so often C or G as well).
+# A selection of the best-walked hills rather than the complete lists; names and heights follow
+# the way Walkhighlands writes them so route pages join on name and height.
+PEAKS = """
+Ben Nevis|M|1345|56.7969|-5.0036|Fort William|
+Ben Macdui|M|1309|57.0704|-3.6691|Cairngorms|Beinn Macduibh
+Braeriach|M|1296|57.0781|-3.7286|Cairngorms|
+Cairn Toul|M|1291|57.0544|-3.7107|Cairngorms|
+Sgor an Lochain Uaine|M|1258|57.0583|-3.7253|Cairngorms|Angel's Peak
+Cairn Gorm|M|1245|57.1168|-3.6437|Cairngorms|Cairngorm
+Aonach Beag|M|1234|56.8003|-4.9542|Fort William|
+Aonach Mor|M|1221|56.8122|-4.9606|Fort William|
+Carn Mor Dearg|M|1220|56.8056|-4.9869|Fort William|
+Ben Lawers|M|1214|56.5450|-4.2211|Perthshire|
+Beinn a' Bhuird|M|1197|57.0875|-3.4997|Cairngorms|
+Carn Eige|M|1183|57.2875|-5.1153|Glen Affric|
+Beinn Mheadhoin|M|1182|57.0958|-3.6114|Cairngorms|
+Mam Sodhail|M|1181|57.2797|-5.1197|Glen Affric|
+Stob Choire Claurigh|M|1177|56.8236|-4.8497|Fort William|
+Ben More|M|1174|56.3856|-4.5406|Crianlarich|
+Ben Avon|M|1171|57.0989|-3.4358|Cairngorms|Leabaidh an Daimh Bhuidhe
+Stob Binnein|M|1165|56.3706|-4.5364|Crianlarich|
+Beinn Bhrotain|M|1157|57.0092|-3.7236|Cairngorms|
+Lochnagar|M|1155|56.9602|-3.2456|Royal Deeside|Cac Carn Beag
+Sgurr nan Ceathreamhnan|M|1151|57.2553|-5.2233|Glen Affric|
+Bidean nam Bian|M|1150|56.6428|-5.0294|Glen Coe|
+Ben Alder|M|1148|56.8139|-4.4653|Ben Alder|
+Ben Lui|M|1130|56.3972|-4.8108|Tyndrum|Beinn Laoigh
+Creag Meagaidh|M|1128|56.9525|-4.6028|Laggan|
+Ben Cruachan|M|1126|56.4264|-5.1319|Argyll|
+Carn nan Gabhar|M|1121|56.8392|-3.6886|Perthshire|Beinn a' Ghlo
+Beinn Ghlas|M|1103|56.5364|-4.2361|Perthshire|
+Sgurr a' Mhaim|M|1099|56.7556|-5.0042|Fort William|
+Bynack More|M|1090|57.1386|-3.5856|Cairngorms|
+Beinn Dearg|M|1084|57.7856|-4.9292|Ullapool|
+Schiehallion|M|1083|56.6667|-4.1000|Perthshire|
+Bidein a' Ghlas Thuill|M|1062|57.8067|-5.2519|Ullapool|An Teallach
+Sgurr Fiona|M|1060|57.8000|-5.2564|Ullapool|
+Spidean a' Choire Leith|M|1055|57.5647|-5.4644|Torridon|Liathach
+Ben Wyvis|M|1046|57.6786|-4.5789|Easter Ross|Glas Leathad Mor
+Meall nan Tarmachan|M|1044|56.5217|-4.3000|Perthshire|
+Sgurr na Ciche|M|1040|57.0133|-5.4542|Knoydart|
+Mullach an Rathain|M|1023|57.5678|-5.4914|Torridon|
+Stob Dearg|M|1022|56.6456|-4.9006|Glen Coe|Buachaille Etive Mor
+Ladhar Bheinn|M|1020|57.0753|-5.5917|Knoydart|
+Beinn Ime|M|1011|56.2367|-4.8178|Arrochar Alps|
+Ruadh-stac Mor|M|1010|57.5947|-5.4222|Torridon|Beinn Eighe
+Beinn Dearg|M|1008|56.8786|-3.8833|Perthshire|
+Ben More Assynt|M|998|58.1389|-4.8583|Sutherland|
+Spidean Coire nan Clach|M|993|57.5814|-5.4042|Torridon|
+Sgurr Alasdair|M|992|57.2064|-6.2242|Isle of Skye|
+Sgurr Mhor|M|986|57.5878|-5.5711|Torridon|Beinn Alligin
+Sgurr Dearg|M|986|57.2133|-6.2350|Isle of Skye|Inaccessible Pinnacle;In Pinn
+Ben Vorlich|M|985|56.3431|-4.2186|Perthshire|
+Ben Lomond|M|974|56.1903|-4.6326|Loch Lomond|
+Ben More|M|966|56.4247|-6.0136|Isle of Mull|
+Sgurr nan Gillean|M|964|57.2489|-6.1942|Isle of Skye|
+Bruach na Frithe|M|958|57.2461|-6.2100|Isle of Skye|
+Stob Dubh|M|958|56.6383|-4.9608|Glen Coe|Buachaille Etive Beag
+Stob na Broige|M|956|56.6258|-4.9400|Glen Coe|
+Driesh|M|947|56.8464|-3.1942|Angus|
+Mount Keen|M|939|56.9700|-2.9733|Royal Deeside|
+Ben Chonzie|M|931|56.4536|-3.9922|Perthshire|
+Bla Bheinn|M|928|57.2197|-6.0939|Isle of Skye|Blaven
+Mayar|M|928|56.8506|-3.2453|Angus|
+Ben Hope|M|927|58.4133|-4.6086|Sutherland|
+Beinn Narnain|M|926|56.2214|-4.7878|Arrochar Alps|
+Tom na Gruagaich|M|922|57.5783|-5.5797|Torridon|
+Ben Vane|M|915|56.2497|-4.7822|Arrochar Alps|
+Beinn Dearg|C|914|57.5867|-5.5306|Torridon|
+Foinaven|C|911|58.4117|-4.8861|Sutherland|Ganu Mor
+Streap|C|909|56.9133|-5.3992|Lochaber|
+Ben Tee|C|904|57.0358|-4.8689|Lochaber|
+Beinn Damh|C|903|57.4925|-5.5311|Torridon|
+Beinn Bhan|C|896|57.4200|-5.6931|Applecross|
+Sgurr Dhomhnuill|C|888|56.7464|-5.4486|Ardgour|
+Garbh Bheinn|C|885|56.7069|-5.4247|Ardgour|
+The Cobbler|C|884|56.2188|-4.8081|Arrochar Alps|Ben Arthur
+Ben Ledi|C|879|56.2603|-4.3222|Trossachs|
+Baosbheinn|C|875|57.6222|-5.5936|Torridon|
+Goatfell|C|874|55.6253|-5.1917|Isle of Arran|Goat Fell
+Beinn a' Chrulaiste|C|857|56.6628|-4.8256|Glen Coe|
+Beinn an Eoin|C|855|57.6158|-5.5425|Torridon|
+Cul Mor|C|849|58.0575|-5.1175|Coigach|
+Ben Donich|C|847|56.1992|-4.8583|Arrochar Alps|
+Merrick|CD|843|55.1386|-4.4686|Galloway|The Merrick
+Ben Vrackie|C|841|56.7438|-3.7225|Perthshire|
+Ben Rinnes|C|840|57.4044|-3.2453|Moray|
+Broad Law|CD|840|55.4978|-3.3519|Borders|
+White Coomb|CD|821|55.4217|-3.3253|Borders|
+Corserine|CD|814|55.1553|-4.3617|Galloway|
+Meall a' Bhuachaille|C|810|57.1814|-3.6669|Cairngorms|
+Hart Fell|CD|808|55.4083|-3.3989|Borders|
+Sail Gharbh|C|808|58.2133|-5.0800|Sutherland|Quinag
+Cairnsmore of Carsphairn|CD|797|55.2506|-4.2161|Galloway|
+Arkle|C|787|58.3661|-4.8728|Sutherland|
+The Brack|C|787|56.2228|-4.8447|Arrochar Alps|
+Glamaig|C|775|57.2969|-6.1236|Isle of Skye|
+Shalloch on Minnoch|CD|775|55.1867|-4.4842|Galloway|
+Ben Loyal|C|764|58.4042|-4.4361|Sutherland|
+Culter Fell|GD|748|55.5503|-3.5069|Lanarkshire|
+Suilven|G|731|58.1163|-5.1374|Sutherland|Caisteal Liath
+Ben Venue|G|729|56.2286|-4.4528|Trossachs|
+The Storr|G|719|57.5067|-6.1861|Isle of Skye|Storr
+Tinto|GD|711|55.5914|-3.6619|Lanarkshire|
+Cairnsmore of Fleet|GD|711|54.9769|-4.3453|Galloway|
+Morven|G|706|58.2283|-3.6953|Caithness|
+Meall Fuar-mhonaidh|G|699|57.2697|-4.6042|Loch Ness|
+Stac Pollaidh|G|612|58.0425|-5.2084|Coigach|Stac Polly
+"""
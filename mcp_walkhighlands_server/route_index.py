@@ -0,0 +1,342 @@
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from spatial_index import KDTree
+
+BASE_URL = "https://www.walkhighlands.co.uk"
+
+# Well-known routes so a fresh index answers the common questions before the first crawl
+SEED_ROUTES = [
+    {"name": "Ben Nevis via the Mountain Track", "region": "Fort William", "difficulty": 4, "distance_km": 17.0, "time": "7-9 hours",
+     "peaks": "Ben Nevis (1345m)", "hill_types": "munro", "lat": 56.7969, "lon": -5.0037, "url": f"{BASE_URL}/fortwilliam/bennevis.shtml",
+     "description": "The classic route up Scotland's highest mountain on the well-made Mountain Track (Tourist Path) from Glen Nevis. Long and relentless, with a boulder-strewn summit plateau where navigation in mist is critical."},
+    {"name": "Cairn Gorm from the Ski Centre", "region": "Cairngorms", "difficulty": 3, "distance_km": 10.5, "time": "4-5 hours",
+     "peaks": "Cairn Gorm (1245m)", "hill_types": "munro", "lat": 57.1168, "lon": -3.6437, "url": f"{BASE_URL}/cairngorms/cairngorm.shtml",
+     "description": "Popular Munro climbed from the Cairngorm Mountain car park via the Fiacaill a' Choire Chais ridge, with wide views over the arctic plateau and Strathspey."},
+    {"name": "Ben Macdui from the Cairngorm Ski Centre", "region": "Cairngorms", "difficulty": 4, "distance_km": 18.0, "time": "6.5-8 hours",
+     "peaks": "Ben Macdui (1309m)", "hill_types": "munro", "lat": 57.0704, "lon": -3.6691, "url": f"{BASE_URL}/cairngorms/benmacdui.shtml",
+     "description": "Britain's second highest mountain, reached across the vast Cairngorm plateau past Lochan Buidhe. Serious in poor weather; home of the legendary Grey Man."},
+    {"name": "Ben Lomond by the Tourist Path", "region": "Loch Lomond", "difficulty": 3, "distance_km": 12.0, "time": "4.5-6 hours",
+     "peaks": "Ben Lomond (974m)", "hill_types": "munro", "lat": 56.1903, "lon": -4.6326, "url": f"{BASE_URL}/lochlomond/benlomond.shtml",
+     "description": "Scotland's most southerly Munro from Rowardennan, on a clear path with superb views over Loch Lomond and its islands. Return via the Ptarmigan ridge for a circuit."},
+    {"name": "Schiehallion from Braes of Foss", "region": "Perthshire", "difficulty": 3, "distance_km": 10.0, "time": "4-5 hours",
+     "peaks": "Schiehallion (1083m)", "hill_types": "munro", "lat": 56.6667, "lon": -4.1000, "url": f"{BASE_URL}/perthshire/schiehallion.shtml",
+     "description": "The Fairy Hill of the Caledonians, a shapely cone climbed on a rebuilt path from Braes of Foss, finishing along a long bouldery ridge."},
+    {"name": "Ben Lawers and Beinn Ghlas", "region": "Perthshire", "difficulty": 3, "distance_km": 11.0, "time": "4.5-6 hours",
+     "peaks": "Beinn Ghlas (1103m), Ben Lawers (1214m)", "hill_types": "munro", "lat": 56.5450, "lon": -4.2211, "url": f"{BASE_URL}/perthshire/benlawers.shtml",
+     "description": "Two Munros above Loch Tay from the Ben Lawers nature reserve, known for rare arctic-alpine flowers. The highest mountain in the southern Highlands."},
+    {"name": "Lochnagar from Glen Muick", "region": "Royal Deeside", "difficulty": 4, "distance_km": 19.5, "time": "6-8 hours",
+     "peaks": "Lochnagar (1155m)", "hill_types": "munro", "lat": 56.9602, "lon": -3.2456, "url": f"{BASE_URL}/cairngorms/lochnagar.shtml",
+     "description": "Dramatic Munro above Balmoral from the Spittal of Glenmuick, climbing past the famous northern corrie cliffs and the lochan below them."},
+    {"name": "Buachaille Etive Mor: Stob Dearg and Stob na Broige", "region": "Glencoe", "difficulty": 5, "distance_km": 13.0, "time": "7-9 hours",
+     "peaks": "Stob Dearg (1022m), Stob na Broige (956m)", "hill_types": "munro", "lat": 56.6456, "lon": -4.9006, "url": f"{BASE_URL}/glencoe/buachailleetivemor.shtml",
+     "description": "The great sentinel at the head of Glen Coe via Coire na Tulaich, a steep loose gully exit, then along the ridge. Requires scrambling skills in winter."},
+    {"name": "The Cobbler (Ben Arthur)", "region": "Arrochar Alps", "difficulty": 4, "distance_km": 11.0, "time": "5-6 hours",
+     "peaks": "The Cobbler (884m)", "hill_types": "corbett", "lat": 56.2176, "lon": -4.8096, "url": f"{BASE_URL}/lochlomond/thecobbler.shtml",
+     "description": "Scotland's most distinctive rocky peak above Arrochar. The true summit requires threading the exposed rock window known as Threading the Needle."},
+    {"name": "Ben Vrackie from Pitlochry", "region": "Perthshire", "difficulty": 3, "distance_km": 10.0, "time": "3.5-4.5 hours",
+     "peaks": "Ben Vrackie (841m)", "hill_types": "corbett", "lat": 56.7438, "lon": -3.7225, "url": f"{BASE_URL}/perthshire/benvrackie.shtml",
+     "description": "Rugged Corbett rising straight from Pitlochry through birch woods and past Loch a' Choire, with a stiff final pull to a fine viewpoint."},
+    {"name": "Suilven from Glencanisp", "region": "Sutherland", "difficulty": 5, "distance_km": 21.0, "time": "8-10 hours",
+     "peaks": "Suilven (731m)", "hill_types": "graham", "lat": 58.1163, "lon": -5.1374, "url": f"{BASE_URL}/ullapool/suilven.shtml",
+     "description": "Long walk-in from Lochinver to Assynt's iconic sugarloaf, climbed by a steep gully to the exposed crest of Caisteal Liath."},
+    {"name": "Stac Pollaidh circuit", "region": "Coigach", "difficulty": 3, "distance_km": 4.5, "time": "2-3 hours",
+     "peaks": "Stac Pollaidh (612m)", "hill_types": "graham", "lat": 58.0425, "lon": -5.2084, "url": f"{BASE_URL}/ullapool/stacpollaidh.shtml",
+     "description": "A short but spectacular circuit around the pinnacled ridge of Stac Pollaidh above Loch Lurgainn; the true summit is a difficult scramble."},
+    {"name": "The Merrick from Glen Trool", "region": "Galloway", "difficulty": 3, "distance_km": 13.0, "time": "5-6 hours",
+     "peaks": "The Merrick (843m)", "hill_types": "corbett,donald", "lat": 55.1386, "lon": -4.4686, "url": f"{BASE_URL}/dumfries/merrick.shtml",
+     "description": "The highest hill in the Southern Uplands from the Bruce's Stone car park in Galloway Forest Park, via Benyellary and the Neive of the Spit."},
+    {"name": "The Old Man of Storr", "region": "Isle of Skye", "difficulty": 2, "distance_km": 3.8, "time": "1.5-2 hours",
+     "peaks": "", "hill_types": "", "lat": 57.5073, "lon": -6.1832, "url": f"{BASE_URL}/skye/oldmanofstorr.shtml",
+     "description": "A steep path on Trotternish leading to the famous basalt pinnacle beneath the Storr cliffs, one of the most photographed spots on Skye."},
+    {"name": "The Quiraing", "region": "Isle of Skye", "difficulty": 3, "distance_km": 6.8, "time": "2-3 hours",
+     "peaks": "", "hill_types": "", "lat": 57.6320, "lon": -6.2930, "url": f"{BASE_URL}/skye/quiraing.shtml",
+     "description": "Circuit through the weird landslip scenery of the Quiraing on Trotternish, past the Needle, the Table and the Prison, with sea views to the mainland."},
+    {"name": "Conic Hill from Balmaha", "region": "Loch Lomond", "difficulty": 2, "distance_km": 4.0, "time": "1.5-2.5 hours",
+     "peaks": "Conic Hill (361m)", "hill_types": "", "lat": 56.0940, "lon": -4.5300, "url": f"{BASE_URL}/lochlomond/conichill.shtml",
+     "description": "Short climb on the West Highland Way above Balmaha to a ridge on the Highland Boundary Fault, looking along the islands of Loch Lomond."},
+    {"name": "Ben A'an", "region": "Trossachs", "difficulty": 2, "distance_km": 3.6, "time": "1.5-2.5 hours",
+     "peaks": "Ben A'an (454m)", "hill_types": "", "lat": 56.2293, "lon": -4.3893, "url": f"{BASE_URL}/lochlomond/benaan.shtml",
+     "description": "The mountain in miniature: a steep woodland path to a rocky summit with a classic view down Loch Katrine in the heart of the Trossachs."},
+    {"name": "Arthur's Seat", "region": "Edinburgh", "difficulty": 1, "distance_km": 4.5, "time": "1.5-2 hours",
+     "peaks": "Arthur's Seat (251m)", "hill_types": "", "lat": 55.9441, "lon": -3.1618, "url": f"{BASE_URL}/lothian/arthursseat.shtml",
+     "description": "An extinct volcano in Holyrood Park in the middle of Edinburgh, climbed from Holyrood Palace past Salisbury Crags with views over the city and Firth of Forth."},
+    {"name": "Steall Falls and the Nevis Gorge", "region": "Fort William", "difficulty": 2, "distance_km": 3.5, "time": "1.5-2 hours",
+     "peaks": "", "hill_types": "", "lat": 56.7767, "lon": -4.9711, "url": f"{BASE_URL}/fortwilliam/steallfalls.shtml",
+     "description": "Family favourite at the head of Glen Nevis through a dramatic wooded gorge to the meadows beneath Steall waterfall, with an optional wire bridge."},
+    {"name": "An Teallach from Corrie Hallie", "region": "Ullapool", "difficulty": 5, "distance_km": 24.0, "time": "9-11 hours",
+     "peaks": "Bidein a' Ghlas Thuill (1062m), Sgurr Fiona (1060m)", "hill_types": "munro", "lat": 57.8060, "lon": -5.2554, "url": f"{BASE_URL}/ullapool/anteallach.shtml",
+     "description": "One of Scotland's finest ridge traverses above Dundonnell, over the Corrag Bhuidhe pinnacles. Exposed grade 3 scrambling that can be bypassed on paths."}
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS routes (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    region TEXT NOT NULL DEFAULT '',
+    difficulty INTEGER,
+    distance_km REAL,
+    time TEXT NOT NULL DEFAULT '',
+    peaks TEXT NOT NULL DEFAULT '',
+    hill_types TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    lat REAL,
+    lon REAL,
+    details TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS routes_region ON routes(region COLLATE NOCASE);
+CREATE VIRTUAL TABLE IF NOT EXISTS routes_fts USING fts5(
+    name, region, peaks, description,
+    content='routes', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS routes_ai AFTER INSERT ON routes BEGIN
+    INSERT INTO routes_fts(rowid, name, region, peaks, description) VALUES (new.id, new.name, new.region, new.peaks, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS routes_ad AFTER DELETE ON routes BEGIN
+    INSERT INTO routes_fts(routes_fts, rowid, name, region, peaks, description) VALUES ('delete', old.id, old.name, old.region, old.peaks, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS routes_au AFTER UPDATE ON routes BEGIN
+    INSERT INTO routes_fts(routes_fts, rowid, name, region, peaks, description) VALUES ('delete', old.id, old.name, old.region, old.peaks, old.description);
+    INSERT INTO routes_fts(rowid, name, region, peaks, description) VALUES (new.id, new.name, new.region, new.peaks, new.description);
+END;
+"""
+
+COLUMNS = ("url", "name", "region", "difficulty", "distance_km", "time", "peaks", "hill_types", "description", "lat", "lon")
+TEXT_COLUMNS = {"region", "time", "peaks", "hill_types", "description"}
+# Route page fields only route details shows, kept together as JSON in the details column
+DETAIL_FIELDS = ("stats", "start", "grid_ref", "ascent", "full_description", "gpx_url")
+
+# bm25() weights per FTS column: a hit in the route name counts far more than one in the description
+BM25_WEIGHTS = (10.0, 4.0, 6.0, 1.0)
+
+class RouteIndex:
+    """Walking routes in SQLite with an FTS5 index, searched by BM25 with structured filters
+
+    One connection per process, guarded by a lock; searches are a single indexed query and take
+    a few milliseconds. The file persists between containers, and seed() fills an empty index.
+    A read_only index never writes the file, so it can serve from a copy another process updates;
+    reopen() picks up the new copy.
+    """
+
+    def __init__(self, path: str = ":memory:", read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self._db = self._connect()
+        self._lock = threading.Lock()
+        # Trailhead KD-tree and the filter columns it needs, rebuilt after the routes change
+        self._trailheads: Optional[Tuple[KDTree, List[tuple]]] = None
+        self.searches = 0
+        self.search_seconds = 0.0
+        self.nearby_searches = 0
+        self.nearby_seconds = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self.read_only:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.executescript(SCHEMA)
+            # Indexes written before route details were kept gain the column; the next crawl fills it
+            if "details" not in {row[1] for row in db.execute("PRAGMA table_info(routes)")}:
+                db.execute("ALTER TABLE routes ADD COLUMN details TEXT NOT NULL DEFAULT ''")
+        elif os.path.exists(self.path):
+            db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            # Nothing written yet: serve the seed routes from memory rather than an empty index
+            db = sqlite3.connect(":memory:", check_same_thread=False)
+            db.executescript(SCHEMA)
+            self._write(db, SEED_ROUTES)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def reopen(self, swap: Optional[Callable[[], None]] = None) -> None:
+        """Close and reopen the file, calling swap() while it is closed (e.g. to reload a volume)"""
+        with self._lock:
+            self._db.close()
+            try:
+                if swap:
+                    swap()
+            finally:
+                self._db = self._connect()
+                self._trailheads = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM routes").fetchone()[0]
+
+    @staticmethod
+    def _write(db: sqlite3.Connection, routes: List[Dict[str, Any]]) -> int:
+        now = time.time()
+        rows = []
+        for route in routes:
+            details = {field: route[field] for field in DETAIL_FIELDS if route.get(field)}
+            rows.append(
+                tuple(route.get(column) if route.get(column) is not None or column not in TEXT_COLUMNS else "" for column in COLUMNS)
+                + (json.dumps(details) if details else "", now)
+            )
+        with db:
+            db.executemany(
+                f"INSERT INTO routes ({', '.join(COLUMNS)}, details, updated_at) VALUES ({', '.join('?' * (len(COLUMNS) + 2))}) "
+                f"ON CONFLICT(url) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in COLUMNS[1:])}, "
+                f"details = excluded.details, updated_at = excluded.updated_at",
+                rows
+            )
+        return len(rows)
+
+    def upsert_many(self, routes: List[Dict[str, Any]]) -> int:
+        """Insert or update routes keyed by URL; returns how many were written"""
+        with self._lock:
+            self._trailheads = None
+            return self._write(self._db, routes)
+
+    def upsert(self, route: Dict[str, Any]) -> None:
+        self.upsert_many([route])
+
+    def seed(self) -> int:
+        """Load SEED_ROUTES into an empty index; a populated one is left alone"""
+        return self.upsert_many(SEED_ROUTES) if len(self) == 0 else 0
+
+    @staticmethod
+    def _match_expression(text: str, any_term: bool = False) -> Optional[str]:
+        """FTS5 query from free text: each word quoted (so punctuation can't break the syntax) and prefix-matched"""
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return None
+        return (" OR " if any_term else " ").join(f'"{word}"*' for word in words)
+
+    def search(self, text: str = "", region: Optional[str] = None, difficulty: Optional[int] = None, hill_type: Optional[str] = None,
+               max_distance_km: Optional[float] = None, limit: int = 10, any_word: bool = True) -> List[Dict[str, Any]]:
+        """Routes matching text (all words, falling back to any word unless any_word=False), best BM25 score first, after filters"""
+        filters, arguments = [], []
+        if region:
+            filters.append("(r.region LIKE ? OR r.name LIKE ?)")
+            arguments += [f"%{region}%"] * 2
+        if difficulty:
+            filters.append("r.difficulty = ?")
+            arguments.append(int(difficulty))
+        if hill_type and hill_type != "any":
+            filters.append("(',' || r.hill_types || ',') LIKE ?")
+            arguments.append(f"%,{hill_type.lower()},%")
+        if max_distance_km:
+            filters.append("r.distance_km <= ?")
+            arguments.append(float(max_distance_km))
+
+        start = time.perf_counter()
+        with self._lock:
+            rows = []
+            for any_term in (False, True) if any_word else (False,):
+                expression = self._match_expression(text, any_term)
+                if expression is None:
+                    where = " AND ".join(filters) or "1"
+                    rows = self._db.execute(
+                        f"SELECT r.* FROM routes r WHERE {where} ORDER BY r.difficulty, r.name LIMIT ?", arguments + [limit]
+                    ).fetchall()
+                    break
+                where = " AND ".join(["routes_fts MATCH ?"] + filters)
+                rows = self._db.execute(
+                    f"SELECT r.*, bm25(routes_fts, {', '.join(map(str, BM25_WEIGHTS))}) AS score "
+                    f"FROM routes_fts JOIN routes r ON r.id = routes_fts.rowid WHERE {where} ORDER BY score LIMIT ?",
+                    [expression] + arguments + [limit]
+                ).fetchall()
+                if rows:
+                    break
+            self.searches += 1
+            self.search_seconds += time.perf_counter() - start
+        return [self._route(row) for row in rows]
+
+    def _trailhead_tree(self) -> Tuple[KDTree, List[tuple]]:
+        if self._trailheads is None:
+            rows = self._db.execute(
+                "SELECT id, lat, lon, lower(name), lower(region), difficulty, ',' || lower(hill_types) || ',', distance_km "
+                "FROM routes WHERE lat IS NOT NULL AND lon IS NOT NULL"
+            ).fetchall()
+            self._trailheads = (KDTree([(row[1], row[2]) for row in rows]), rows)
+        return self._trailheads
+
+    def prepare(self) -> None:
+        """Build the trailhead tree now, so the first nearby() doesn't pay for it"""
+        with self._lock:
+            self._trailhead_tree()
+
+    def nearby(self, lat: float, lon: float, radius_km: Optional[float] = None, region: Optional[str] = None, difficulty: Optional[int] = None,
+               hill_type: Optional[str] = None, max_distance_km: Optional[float] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Routes starting nearest to a point (within radius_km if given), after the same filters as search()
+
+        Each route gains km_away, the straight-line distance to its start.
+        """
+        region = region.lower() if region else None
+        difficulty = int(difficulty) if difficulty else None
+        hill_type = f",{hill_type.lower()}," if hill_type and hill_type != "any" else None
+
+        start = time.perf_counter()
+        with self._lock:
+            tree, rows = self._trailhead_tree()
+
+            def accept(i: int) -> bool:
+                _, _, _, name, route_region, route_difficulty, hill_types, distance_km = rows[i]
+                return ((region is None or region in route_region or region in name)
+                        and (difficulty is None or route_difficulty == difficulty)
+                        and (hill_type is None or hill_type in hill_types)
+                        and (max_distance_km is None or (distance_km is not None and distance_km <= max_distance_km)))
+
+            filtered = region or difficulty or hill_type or max_distance_km
+            hits = tree.nearest(lat, lon, k=limit, radius_km=radius_km, accept=accept if filtered else None)
+            ids = [rows[i][0] for i, _ in hits]
+            found = {row["id"]: row for row in self._db.execute(
+                f"SELECT * FROM routes WHERE id IN ({', '.join('?' * len(ids))})", ids
+            )}
+            self.nearby_searches += 1
+            self.nearby_seconds += time.perf_counter() - start
+
+        routes = []
+        for (i, km), route_id in zip(hits, ids):
+            route = self._route(found[route_id])
+            route["km_away"] = round(km, 1)
+            routes.append(route)
+        return routes
+
+    def peak_listings(self) -> List[Tuple[str, str]]:
+        """(url, peaks) for every route that lists summits, for joining against the peak table"""
+        with self._lock:
+            return [tuple(row) for row in self._db.execute("SELECT url, peaks FROM routes WHERE peaks != ''")]
+
+    def delete(self, url: str) -> bool:
+        """Drop a route (the page has gone); returns whether it was indexed"""
+        with self._lock, self._db:
+            self._trailheads = None
+            return self._db.execute("DELETE FROM routes WHERE url = ?", (url,)).rowcount > 0
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM routes WHERE url = ?", (url,)).fetchone()
+        return self._route(row) if row else None
+
+    def _route(self, row: sqlite3.Row) -> Dict[str, Any]:
+        route = {column: row[column] for column in COLUMNS}
+        # Display fields in the shape the tool output has always used
+        route["distance"] = f"{row['distance_km']:g}km" if row["distance_km"] is not None else ""
+        route["short_description"] = row["description"].split(". ")[0].rstrip(".") if row["description"] else ""
+        # A replica may still be reading a file from before the details column
+        if "details" in row.keys() and row["details"]:
+            route.update(json.loads(row["details"]))
+        return route
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            oldest = self._db.execute("SELECT MIN(updated_at) FROM routes").fetchone()[0]
+        return {
+            "routes": len(self),
+            "oldest_update_hours": round((time.time() - oldest) / 3600, 1) if oldest else None,
+            "searches": self.searches,
+            "mean_search_ms": round(self.search_seconds / self.searches * 1000, 2) if self.searches else None,
+            "nearby_searches": self.nearby_searches,
+            "mean_nearby_ms": round(self.nearby_seconds / self.nearby_searches * 1000, 3) if self.nearby_searches else None
+        }
+
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,158 @@
+"""Route page parsing: a Walkhighlands route page in, a route record out
+
+parse_route_page is the fast path: the route body is cut out of the raw bytes (skipping the
+navigation, walk reports and footer that make up most of a page) and only that fragment is
+parsed by lxml, then read with precompiled XPath. parse_route_page_bs4 builds the full
+BeautifulSoup tree and is kept as the reference implementation; benchmark.py checks the two agree.
+
+The pages under fixtures/site were written by hand after the site's layout, not saved from it,
+so both parsers' selectors are unverified against the live site until real pages replace them.
+"""
+from typing import Dict, Any, List, Optional
+from urllib.parse import urljoin
+import re
+
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+# Walk statistics labels that list summits, and the hill type each one records
+HILL_LABELS = {"munros": "munro", "corbetts": "corbett", "grahams": "graham", "donalds": "donald"}
+
+DISTANCE = re.compile(r"([\d.]+)\s*km")
+GRADE = re.compile(r"(\d)")
+PEAK = re.compile(r"\s*(.+?)\s*\((\d+)m\)(?:,|$)")  # "The Cobbler (Ben Arthur) (884m), ..."
+
+# The route body runs from the breadcrumbs to the walk reports
+BODY_START = re.compile(rb'<div id="(?:crumbs|col)"')
+BODY_END = re.compile(rb'<div id="(?:comments|footer)"')
+GEO = re.compile(rb'<meta name="geo\.position" content="([^"]*)"')
+
+# The site is served as UTF-8; a fragment has no <meta charset> for lxml to go on
+FRAGMENT_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+HEADING = etree.XPath("string(//div[@id='col']/h1)")
+CRUMBS = etree.XPath("//div[@id='crumbs']/a")
+STAT_TERMS = etree.XPath(f"//div[{_has_class('walkstats')}]/dl/dt")
+GRADE_ALT = etree.XPath("string(.//img/@alt)")
+INTRO = etree.XPath(f"string(//div[@id='col']/p[{_has_class('intro')}])")
+DESCRIPTION = etree.XPath(f"//div[{_has_class('description')}]/p")
+GPX = etree.XPath(f"string((//div[{_has_class('walkstats')}]//a[contains(@href, '.gpx')]/@href)[1])")
+
+def _text(value: str) -> str:
+    return " ".join(value.split())
+
+def build_record(url: str, name: str, region: str, stats: Dict[str, str], geo: str, intro: str,
+                 description: List[str], gpx_url: str) -> Dict[str, Any]:
+    """Route record from the raw text pulled off a page, whichever parser pulled it
+
+    The route index columns come first; the rest (walk statistics as shown, start, grid
+    reference, ascent, full description, GPX link) is for route details.
+    """
+    fields = {label.rstrip(":").lower(): value for label, value in stats.items()}
+    peaks: List[str] = []
+    hill_types = []
+    for label, hill_type in HILL_LABELS.items():
+        if label in fields:
+            hill_types.append(hill_type)
+            for peak, height in PEAK.findall(fields[label]):
+                if f"{peak} ({height}m)" not in peaks:
+                    peaks.append(f"{peak} ({height}m)")
+
+    distance = DISTANCE.search(fields.get("distance", ""))
+    difficulty = GRADE.search(fields.get("grade", ""))
+    lat, lon = None, None
+    if ";" in geo:
+        lat, lon = (float(value) for value in geo.split(";", 1))
+
+    return {
+        "name": name,
+        "region": region,
+        "difficulty": int(difficulty.group(1)) if difficulty else None,
+        "distance_km": float(distance.group(1)) if distance else None,
+        "time": re.sub(r"\s*-\s*", "-", fields.get("time", "")),
+        "peaks": ", ".join(peaks),
+        "hill_types": ",".join(hill_types),
+        "lat": lat,
+        "lon": lon,
+        "url": url,
+        "description": intro,
+        "stats": {label.rstrip(":"): value for label, value in stats.items()},
+        "start": fields.get("start/end") or fields.get("start", ""),
+        "grid_ref": fields.get("grid ref", ""),
+        "ascent": fields.get("ascent", ""),
+        "full_description": "\n\n".join(description),
+        "gpx_url": urljoin(url, gpx_url) if gpx_url else None
+    }
+
+def parse_route_page(html: bytes, url: str) -> Optional[Dict[str, Any]]:
+    """Route record for a route page, or None when the page has no walk statistics (area pages, errors)"""
+    start = BODY_START.search(html)
+    end = BODY_END.search(html, start.end()) if start else None
+    fragment = html[start.start():end.start() if end else len(html)] if start else html
+    try:
+        root = etree.fromstring(fragment, FRAGMENT_PARSER)
+    except etree.ParserError:  # nothing to parse
+        return None
+    if root is None:
+        return None
+
+    name = _text(HEADING(root))
+    terms = STAT_TERMS(root)
+    if not name or not terms:
+        return None
+
+    stats = {}
+    for term in terms:
+        value = term.getnext()
+        if value is None or value.tag != "dd":
+            continue
+        label = _text(term.text_content())
+        # The grade is an image of boots; its alt text carries the number
+        stats[label] = _text(value.text_content()) or _text(GRADE_ALT(value))
+
+    crumbs = CRUMBS(root)
+    geo = GEO.search(html, 0, start.start() if start else len(html))
+    gpx_url = GPX(root)
+    return build_record(
+        url,
+        name,
+        _text(crumbs[-1].text_content()) if len(crumbs) > 1 else "",
+        stats,
+        geo.group(1).decode() if geo else "",
+        _text(INTRO(root)),
+        [_text(p.text_content()) for p in DESCRIPTION(root)],
+        gpx_url
+    )
+
+def parse_route_page_bs4(html: bytes, url: str, features: str = "html.parser") -> Optional[Dict[str, Any]]:
+    """parse_route_page over a full BeautifulSoup tree built by `features`: slower, kept as the reference"""
+    soup = BeautifulSoup(html, features)
+    heading = soup.select_one("#col h1")
+    stats_list = soup.select_one("div.walkstats dl")
+    if heading is None or stats_list is None:
+        return None
+
+    stats = {}
+    for term in stats_list.find_all("dt"):
+        value = term.find_next_sibling("dd")
+        if value is None:
+            continue
+        stats[term.get_text(" ", strip=True)] = value.get_text(" ", strip=True) or (value.img.get("alt", "") if value.img else "")
+
+    crumbs = soup.select("#crumbs a")
+    geo = soup.find("meta", attrs={"name": "geo.position"})
+    intro = soup.select_one("#col p.intro")
+    gpx = soup.select_one("div.walkstats a[href*='.gpx']")
+    return build_record(
+        url,
+        heading.get_text(" ", strip=True),
+        crumbs[-1].get_text(" ", strip=True) if len(crumbs) > 1 else "",
+        stats,
+        geo.get("content", "") if geo else "",
+        intro.get_text(" ", strip=True) if intro else "",
+        [p.get_text(" ", strip=True) for p in soup.select("div.description > p")],
+        gpx.get("href", "") if gpx else ""
+    )
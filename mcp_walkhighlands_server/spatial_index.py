@@ -0,0 +1,89 @@
+"""Trailhead spatial index: a static KD-tree over route start points for nearest and radius queries"""
+from array import array
+from typing import Callable, List, Optional, Sequence, Tuple
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+def unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    """Point on the unit sphere (earth-centred axes): straight-line distance then orders points
+    exactly as great-circle distance does, with no special cases at the poles or the antimeridian"""
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+def km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+def chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+class KDTree:
+    """Balanced 3-d tree over unit vectors, laid out implicitly in flat arrays
+
+    The node for positions [lo, hi) is the median at (lo + hi) // 2, split on the axis of widest
+    spread, so there are no node objects and no pointers. A query only descends into a subtree
+    when its splitting plane is nearer than the current bound, so its cost follows the size of
+    the answer rather than the size of the catalogue.
+    """
+
+    def __init__(self, points: Sequence[Tuple[float, float]]):
+        vectors = [unit_vector(lat, lon) for lat, lon in points]
+        order = list(range(len(vectors)))
+        self.size = len(order)
+        self.axes = bytearray(self.size)
+
+        stack = [(0, self.size)]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= 1:
+                continue
+            members = order[lo:hi]
+            spans = [max(vectors[i][axis] for i in members) - min(vectors[i][axis] for i in members) for axis in range(3)]
+            axis = spans.index(max(spans))
+            order[lo:hi] = sorted(members, key=lambda i: vectors[i][axis])
+            mid = (lo + hi) // 2
+            self.axes[mid] = axis
+            stack += [(lo, mid), (mid + 1, hi)]
+
+        # Tree position -> caller's position, and the coordinates in tree order
+        self.ids = array("I", order)
+        self.coords = tuple(array("d", (vectors[i][axis] for i in order)) for axis in range(3))
+
+    def nearest(self, lat: float, lon: float, k: Optional[int] = 10, radius_km: Optional[float] = None,
+                accept: Optional[Callable[[int], bool]] = None) -> List[Tuple[int, float]]:
+        """(position, km) of the k nearest points within radius_km that accept() lets through, nearest first
+
+        k=None returns every point within the radius; k <= 0 returns none.
+        """
+        if k is not None and k <= 0:
+            return []
+        query = unit_vector(lat, lon)
+        qx, qy, qz = query
+        xs, ys, zs = self.coords
+        bound = km_to_chord(radius_km) ** 2 if radius_km is not None else math.inf
+        best: List[Tuple[float, int]] = []  # max-heap of (-squared chord, position)
+
+        stack = [(0, self.size, 0.0)]
+        while stack:
+            lo, hi, plane = stack.pop()
+            limit = -best[0][0] if k and len(best) == k else bound
+            if lo >= hi or plane > limit:
+                continue
+            mid = (lo + hi) // 2
+            d2 = (xs[mid] - qx) ** 2 + (ys[mid] - qy) ** 2 + (zs[mid] - qz) ** 2
+            if d2 <= limit and (accept is None or accept(self.ids[mid])):
+                if k and len(best) == k:
+                    heapq.heapreplace(best, (-d2, mid))
+                else:
+                    heapq.heappush(best, (-d2, mid))
+            if hi - lo == 1:
+                continue
+            axis = self.axes[mid]
+            diff = query[axis] - self.coords[axis][mid]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Far side first so the near side is searched first and tightens the bound
+            stack.append((*far, diff * diff))
+            stack.append((*near, 0.0))
+
+        return [(self.ids[position], chord_to_km(math.sqrt(-d2))) for d2, position in sorted(best, reverse=True)]
@@ -0,0 +1,46 @@
+import math
+import random
+
+from spatial_index import KDTree, chord_to_km, unit_vector
+
+def brute_force(points, lat, lon, k=10, radius_km=None, accept=None):
+    """Every point's great-circle distance, filtered and sorted: what nearest() must return"""
+    query = unit_vector(lat, lon)
+    hits = []
+    for i, point in enumerate(points):
+        km = chord_to_km(math.dist(query, unit_vector(*point)))
+        if (radius_km is None or km <= radius_km) and (accept is None or accept(i)):
+            hits.append((km, i))
+    hits.sort()
+    return [(i, km) for km, i in (hits[:k] if k else hits)]
+
+def assert_same(points, got, expected):
+    # Duplicate points tie, in either order, so hits are compared by location rather than position
+    assert [points[i] for i, _ in got] == [points[i] for i, _ in expected]
+    assert all(math.isclose(a, b, abs_tol=1e-6) for (_, a), (_, b) in zip(got, expected))
+
+def test_matches_brute_force():
+    rng = random.Random(24)
+    # Scotland-sized spread of trailheads, plus some duplicates
+    points = [(rng.uniform(54.6, 60.9), rng.uniform(-8.0, -0.7)) for _ in range(1500)]
+    points += points[:20]
+    tree = KDTree(points)
+    for _ in range(300):
+        lat, lon = rng.uniform(54.0, 61.5), rng.uniform(-9.0, 0.0)
+        k = rng.choice([None, 1, 5, 25])
+        radius_km = rng.choice([None, 5.0, 30.0, 150.0])
+        accept = (lambda i: points[i][0] * 1000 % 3 < 1) if rng.random() < 0.3 else None
+        if k is None and radius_km is None:
+            radius_km = 50.0
+        assert_same(points, tree.nearest(lat, lon, k=k, radius_km=radius_km, accept=accept),
+                    brute_force(points, lat, lon, k=k, radius_km=radius_km, accept=accept))
+
+def test_edges():
+    assert KDTree([]).nearest(57.0, -4.0) == []
+    tree = KDTree([(57.0, -4.0), (57.1, -4.0)])
+    assert tree.nearest(57.0, -4.0, k=0) == []
+    assert tree.nearest(57.0, -4.0, k=-1) == []
+    assert [i for i, _ in tree.nearest(57.2, -4.0, k=1)] == [1]
+    # Across the antimeridian, nearest by the globe rather than by longitude
+    tree = KDTree([(0.0, 179.9), (0.0, 170.0)])
+    assert [i for i, _ in tree.nearest(0.0, -179.9, k=1)] == [0]
@@ -0,0 +1,139 @@
+"""
+Throughput benchmark for the weather MCP server's async request path.
+
+Starts a local stub of the Open-Meteo geocoding and forecast APIs that adds a
+fixed latency to every response, then drives SimpleWeatherMCP.call_tool
+against it twice:
+
+  * sequential - one tool call at a time, which is how the server behaved when
+    blocking HTTP calls stalled the event loop
+  * concurrent - many tool calls in flight on one event loop, sharing the
+    pooled async client
+
+Every call uses a distinct place name and grid cell so the caches never hit
+and each call costs a real geocode + forecast round trip.
+
+Usage:
+    python benchmark.py [--calls 200] [--concurrency 64] [--latency-ms 50]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+import sys
+
+# Run as a script, so the shared package at the repository root isn't on the path by itself
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from deploy import SimpleWeatherMCP
+
+CURRENT = {
+    "time": "2024-07-15T12:00",
+    "temperature_2m": 14.2,
+    "relative_humidity_2m": 78,
+    "apparent_temperature": 12.9,
+    "weather_code": 2,
+    "wind_speed_10m": 18.4,
+    "wind_direction_10m": 240,
+    "pressure_msl": 1012.3
+}
+
+
+class StubOpenMeteoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    wbufsize = 1 << 16  # send headers and body in one segment (avoids Nagle/delayed-ACK stalls)
+    latency = 0.05
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path.endswith("/search"):
+            # Derive a unique, deterministic position from "Place N"
+            index = int(query["name"][0].split()[-1])
+            body = {"results": [{
+                "name": query["name"][0],
+                "latitude": 55.0 + (index % 40) * 0.1,
+                "longitude": -6.0 + (index // 40) * 0.1,
+                "country": "United Kingdom",
+                "admin1": "Scotland"
+            }]}
+        else:
+            count = len(query["latitude"][0].split(","))
+            body = [{"current": CURRENT}] * count if count > 1 else {"current": CURRENT}
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default backlog of 5 drops bursts of concurrent connects
+
+
+def start_stub(latency: float) -> ThreadingHTTPServer:
+    StubOpenMeteoHandler.latency = latency
+    server = StubServer(("127.0.0.1", 0), StubOpenMeteoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run(calls: int, concurrency: int, base_url: str, sequential: bool, offset: int) -> float:
+    mcp_server = SimpleWeatherMCP()
+    mcp_server.base_url = base_url
+    mcp_server.geocoding_url = base_url
+    await mcp_server.startup()
+
+    semaphore = asyncio.Semaphore(1 if sequential else concurrency)
+
+    async def one(i):
+        async with semaphore:
+            result = await mcp_server.call_tool("get_weather", {"location": f"Place {offset + i}"})
+            assert "content" in result, result
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+
+    await mcp_server.shutdown()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    stub = start_stub(args.latency_ms / 1000)
+    base_url = f"http://127.0.0.1:{stub.server_address[1]}/v1"
+
+    print(f"{args.calls} get_weather calls, 2 upstream round trips each, {args.latency_ms:.0f} ms stub latency")
+    print(f"{'mode':<12}{'in flight':>10}{'seconds':>10}{'calls/s':>10}")
+
+    # Distinct place names per run so the second run can't hit the first run's caches
+    results = {}
+    for mode, sequential, offset in (("sequential", True, 0), ("concurrent", False, args.calls)):
+        elapsed = asyncio.run(run(args.calls, args.concurrency, base_url, sequential, offset))
+        results[mode] = elapsed
+        in_flight = 1 if sequential else args.concurrency
+        print(f"{mode:<12}{in_flight:>10}{elapsed:>10.2f}{args.calls / elapsed:>10.1f}")
+
+    print(f"speedup: {results['sequential'] / results['concurrent']:.1f}x")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,254 @@
 import modal
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+import asyncio
 import json
-import requests
+import re
+import threading
+import time
+import httpx
+from scotland_common import MCPServer, create_app, get_gazetteer, get_geocoder, not_shipped
+
+WEATHER_DESCRIPTIONS = {
+    0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Depositing rime fog",
+    51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+    56: "Light freezing drizzle", 57: "Dense freezing drizzle",
+    61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
+    66: "Light freezing rain", 67: "Heavy freezing rain",
+    71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
+    77: "Snow grains", 80: "Slight rain showers", 81: "Moderate rain showers",
+    82: "Violent rain showers", 85: "Slight snow showers", 86: "Heavy snow showers",
+    95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
+}
+
+class GeocodeCache:
+    """Bounded LRU cache of resolved locations with TTL and negative caching"""
+
+    # Sentinel stored for lookups that returned no usable result
+    NOT_FOUND = object()
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 7 * 24 * 3600, negative_ttl: float = 10 * 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize a location query so trivial variations share one entry"""
+        return re.sub(r"\s+", " ", query.strip().lower())
+
+    def get(self, query: str):
+        """Return the cached value, NOT_FOUND for a cached miss, or None if absent/expired"""
+        key = self.normalize(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if entry[1] is self.NOT_FOUND:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry[1]
+
+    def put(self, query: str, value) -> None:
+        """Store a resolved location, or NOT_FOUND to remember a failed lookup"""
+        key = self.normalize(query)
+        ttl = self.negative_ttl if value is self.NOT_FOUND else self.ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0
+        }
+
+class ForecastCache:
+    """Forecast responses keyed on model grid cell and requested variables, with stale-while-revalidate"""
+
+    # Open-Meteo refreshes "current" conditions every 15 minutes and model output hourly
+    CURRENT_CADENCE = 15 * 60
+    MODEL_CADENCE = 60 * 60
+
+    def __init__(self, grid_step: float = 0.1, max_entries: int = 1024,
+                 refresh_offset: float = 5 * 60, max_stale: float = 60 * 60):
+        self.grid_step = grid_step
+        self.max_entries = max_entries
+        # New model data appears shortly after each cadence boundary, not exactly on it
+        self.refresh_offset = refresh_offset
+        self.max_stale = max_stale
+        self._entries = OrderedDict()  # key -> (fresh_until, stale_until, data)
+        self._refreshing = set()
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def snap(self, lat: float, lon: float) -> tuple:
+        """Snap a point to the centre of its grid cell so nearby places share an entry"""
+        step = self.grid_step
+        return (round(round(lat / step) * step, 4), round(round(lon / step) * step, 4))
+
+    def make_key(self, lat: float, lon: float, params: Dict[str, Any]) -> tuple:
+        variables = tuple(sorted(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in params.items()
+        ))
+        return self.snap(lat, lon) + (variables,)
+
+    def next_refresh(self, cadence: float, now: float) -> float:
+        """Wall-clock time at which the next model update should be available"""
+        boundary = (now - self.refresh_offset) // cadence * cadence + cadence
+        return boundary + self.refresh_offset
+
+    async def get_many(self, keys: list, fetch_many, cadence: float) -> list:
+        """Resolve several keys at once; await fetch_many(keys) must return one result per key, in order"""
+        now = time.time()
+        found = {}
+        missing = []
+        stale = []
+        with self._lock:
+            for key in keys:
+                if key in found or key in missing:
+                    continue
+                entry = self._entries.get(key)
+                if entry is not None and now < entry[1]:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[2]
+                    if now < entry[0]:
+                        self.hits += 1
+                        continue
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        stale.append(key)
+                else:
+                    self.misses += 1
+                    missing.append(key)
+        
+        if stale:
+            # Hold a reference so the refresh task isn't garbage collected mid-flight
+            task = asyncio.create_task(self._refresh(stale, fetch_many, cadence))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        
+        if missing:
+            for key, data in zip(missing, await fetch_many(missing)):
+                self._store(key, data, cadence)
+                found[key] = data
+        
+        return [found[key] for key in keys]
+
+    async def _refresh(self, keys: list, fetch_many, cadence: float) -> None:
+        try:
+            for key, data in zip(keys, await fetch_many(keys)):
+                self._store(key, data, cadence)
+            self.refreshes += 1
+        except Exception:
+            # Keep serving the stale copies until they age out
+            self.refresh_failures += 1
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    def _store(self, key: tuple, data, cadence: float) -> None:
+        fresh_until = self.next_refresh(cadence, time.time())
+        with self._lock:
+            self._entries[key] = (fresh_until, fresh_until + self.max_stale, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "grid_step": self.grid_step,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+        }
 
 # Copy the SimpleWeatherMCP class directly into this file to avoid import issues
-class SimpleWeatherMCP:
-    def __init__(self):
+class SimpleWeatherMCP(MCPServer):
+    def __init__(self, geocode_cache_size: int = 2048, geocode_ttl: float = 7 * 24 * 3600,
+                 geocode_negative_ttl: float = 10 * 60, forecast_grid_step: float = 0.1):
+        super().__init__()
         self.base_url = "https://api.open-meteo.com/v1"
         self.geocoding_url = "https://geocoding-api.open-meteo.com/v1"
+        # Canonical names, aliases and coordinates for Scottish places (and clashing English ones)
+        self.gazetteer = get_gazetteer()
+        # Memory-mapped index of every Scottish place name, when one has been built
+        self.geocoder = get_geocoder()
+        # Place names don't move, so resolved coordinates can be kept for a long time.
+        # Failed lookups are remembered briefly so typos don't hammer the geocoder.
+        self.geocode_cache = GeocodeCache(
+            max_entries=geocode_cache_size,
+            ttl=geocode_ttl,
+            negative_ttl=geocode_negative_ttl
+        )
+        # Forecasts only change when the model runs, and points a few km apart fall
+        # in the same model cell, so responses are shared per cell until the next run.
+        self.forecast_cache = ForecastCache(grid_step=forecast_grid_step)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "geocode_cache": self.geocode_cache.stats(),
+            "forecast_cache": self.forecast_cache.stats(),
+            "gazetteer": self.gazetteer.stats(),
+            "geocoder": self.geocoder.stats() if self.geocoder else None
+        }
     
     def list_tools(self) -> Dict[str, Any]:
+        batch_schema = {
+            "type": "object",
+            "properties": {
+                "locations": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Location names or coordinates, e.g. ['Glencoe', 'Fort William', 'Isle of Skye']",
+                    "minItems": 1,
+                    "maxItems": 20
+                },
+                "days": {
+                    "type": "integer",
+                    "description": "Optional number of forecast days (1-7). Omit for current conditions.",
+                    "minimum": 1,
+                    "maximum": 7
+                }
+            },
+            "required": ["locations"]
+        }
         return {
             "tools": [
                 {
@@ -46,234 +285,318 @@ class SimpleWeatherMCP:
                         },
                         "required": ["location"]
                     }
+                },
+                {
+                    "name": "get_weather_batch",
+                    "description": "Get current weather (or a daily forecast) for several locations in one call - ideal for comparing places on a road trip. Results are returned in the same order as the locations.",
+                    "inputSchema": batch_schema
+                },
+                {
+                    "name": "compare_weather",
+                    "description": "Compare weather across several locations side by side (same as get_weather_batch). Results are returned in the same order as the locations.",
+                    "inputSchema": batch_schema
                 }
             ]
         }
     
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        if name == "get_weather":
-            return self._get_weather(arguments["location"])
-        elif name == "get_forecast":
-            days = arguments.get("days", 3)  # Default to 3 days
-            return self._get_forecast(arguments["location"], days)
-        else:
-            return {"error": f"Unknown tool: {name}"}
-    #
-    def _get_weather(self, location: str) -> Dict[str, Any]:
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            coords = self._get_coordinates(location)
+            if name == "get_weather":
+                result = await self._get_weather(arguments["location"])
+            elif name == "get_forecast":
+                days = self._forecast_days(arguments.get("days", 3))  # Default to 3 days
+                result = await self._get_forecast(arguments["location"], days)
+            elif name in ("get_weather_batch", "compare_weather"):
+                days = arguments.get("days")
+                days = self._forecast_days(days) if days is not None else None
+                result = await self._get_weather_batch(arguments["locations"][:20], days)
+            else:
+                result = {"error": f"Unknown tool: {name}"}
+        except Exception as e:
+            result = {"error": f"Error in {name}: {str(e)}"}
+        return self._record_call(name, result)
+    
+    def _forecast_days(self, days: Any) -> int:
+        """Validated forecast length: Open-Meteo's forecast_days, limited to the 1-7 the tools advertise"""
+        days = int(days)
+        if not 1 <= days <= 7:
+            raise ValueError("Forecast days must be between 1 and 7")
+        return days
+    
+    async def _get_weather(self, location: str) -> Dict[str, Any]:
+        try:
+            coords = await self._get_coordinates(location)
             if not coords:
                 return {"error": f"Could not find location: {location}"}
             
             lat, lon, display_name = coords
             
-            url = f"{self.base_url}/forecast"
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "current": [
-                    "temperature_2m",
-                    "relative_humidity_2m", 
-                    "apparent_temperature",
-                    "weather_code",
-                    "wind_speed_10m",
-                    "wind_direction_10m",
-                    "pressure_msl"
-                ],
-                "timezone": "Europe/London"
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            current = data["current"]
-            
-            weather_descriptions = {
-                0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-                45: "Fog", 48: "Depositing rime fog",
-                51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-                56: "Light freezing drizzle", 57: "Dense freezing drizzle",
-                61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
-                66: "Light freezing rain", 67: "Heavy freezing rain",
-                71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
-                77: "Snow grains", 80: "Slight rain showers", 81: "Moderate rain showers",
-                82: "Violent rain showers", 85: "Slight snow showers", 86: "Heavy snow showers",
-                95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
-            }
-            
-            weather_desc = weather_descriptions.get(current["weather_code"], "Unknown")
-            wind_dir = current["wind_direction_10m"]
-            wind_compass = self._wind_direction_to_compass(wind_dir)
-            
-            summary = f"""Current weather in {display_name}:
-            - Temperature: {current['temperature_2m']}°C (feels like {current['apparent_temperature']}°C)
-            - Conditions: {weather_desc}
-            - Humidity: {current['relative_humidity_2m']}%
-            - Wind: {current['wind_speed_10m']} km/h from {wind_compass}
-            - Pressure: {current['pressure_msl']} hPa
-            - Last updated: {current['time']}"""
+            data = await self._fetch_forecast(lat, lon, self._current_params(), ForecastCache.CURRENT_CADENCE)
             
             return {
                 "content": [
                     {
                         "type": "text",
-                        "text": summary
+                        "text": self._format_current(display_name, data)
                     }
                 ]
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {"error": f"Failed to fetch weather data: {str(e)}"}
         except KeyError as e:
             return {"error": f"Unexpected weather data format: {str(e)}"}
     
-    def _get_forecast(self, location: str, days: int = 3) -> Dict[str, Any]:
+    async def _get_forecast(self, location: str, days: int = 3) -> Dict[str, Any]:
         """Get multi-day weather forecast for trip planning"""
         try:
-            coords = self._get_coordinates(location)
+            coords = await self._get_coordinates(location)
             if not coords:
                 return {"error": f"Could not find location: {location}"}
             
             lat, lon, display_name = coords
             
-            url = f"{self.base_url}/forecast"
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "daily": [
-                    "temperature_2m_max",
-                    "temperature_2m_min", 
-                    "weather_code",
-                    "precipitation_sum",
-                    "wind_speed_10m_max",
-                    "wind_gusts_10m_max"
-                ],
-                "timezone": "Europe/London",
-                "forecast_days": days
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Validate response structure
-            if "daily" not in data:
-                return {"error": "No daily forecast data available"}
-                
-            daily = data["daily"]
-            
-            # Validate required fields exist
-            required_fields = ["time", "temperature_2m_max", "temperature_2m_min", "weather_code"]
-            for field in required_fields:
-                if field not in daily:
-                    return {"error": f"Missing required field: {field}"}
-            
-            # Weather code descriptions
-            weather_descriptions = {
-                0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-                45: "Fog", 48: "Depositing rime fog",
-                51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-                56: "Light freezing drizzle", 57: "Dense freezing drizzle",
-                61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
-                66: "Light freezing rain", 67: "Heavy freezing rain",
-                71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
-                77: "Snow grains", 80: "Slight rain showers", 81: "Moderate rain showers",
-                82: "Violent rain showers", 85: "Slight snow showers", 86: "Heavy snow showers",
-                95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
-            }
-            
-            # Get the number of days we actually have data for
-            num_days = len(daily["time"])
-            days_to_process = min(days, num_days)
-            
-            # Build forecast summary
-            forecast_lines = [f"{days_to_process}-day weather forecast for {display_name}:"]
-            forecast_lines.append("")
-            
-            for i in range(days_to_process):
-                try:
-                    date = daily["time"][i]
-                    temp_max = daily["temperature_2m_max"][i]
-                    temp_min = daily["temperature_2m_min"][i] 
-                    weather_code = daily["weather_code"][i]
-                    
-                    # Safely access optional fields
-                    precipitation = 0
-                    if "precipitation_sum" in daily and len(daily["precipitation_sum"]) > i:
-                        precipitation = daily["precipitation_sum"][i] or 0
-                    
-                    wind_max = 0
-                    if "wind_speed_10m_max" in daily and len(daily["wind_speed_10m_max"]) > i:
-                        wind_max = daily["wind_speed_10m_max"][i] or 0
-                    
-                    wind_gusts = 0
-                    if "wind_gusts_10m_max" in daily and len(daily["wind_gusts_10m_max"]) > i:
-                        wind_gusts = daily["wind_gusts_10m_max"][i] or 0
-                    
-                    weather_desc = weather_descriptions.get(weather_code, "Unknown")
-                    
-                    # Format the day name safely
-                    try:
-                        from datetime import datetime
-                        date_obj = datetime.fromisoformat(str(date))
-                        day_name = date_obj.strftime("%a, %b %d")
-                    except:
-                        day_name = f"Day {i+1}"
-                    
-                    # Build day summary
-                    day_summary = f"📅 {day_name}: {weather_desc}"
-                    day_summary += f"\n   🌡️  {temp_min}°C to {temp_max}°C"
-                    
-                    if precipitation > 0:
-                        day_summary += f"\n   🌧️  Rain: {precipitation}mm"
-                    
-                    if wind_max > 20:
-                        day_summary += f"\n   💨 Wind: {wind_max} km/h"
-                        if wind_gusts > 0:
-                            day_summary += f" (gusts {wind_gusts} km/h)"
-                    elif wind_max > 0:
-                        day_summary += f"\n   💨 Wind: {wind_max} km/h"
-                    
-                    # Adventure suitability hint
-                    if weather_code in [0, 1, 2] and wind_max < 25 and precipitation == 0:
-                        day_summary += "\n   ✅ Great for outdoor activities!"
-                    elif weather_code in [61, 63, 65] or precipitation > 5:
-                        day_summary += "\n   ⚠️  Wet weather - plan indoor alternatives"
-                    elif wind_max > 40:
-                        day_summary += "\n   ⚠️  Very windy - avoid exposed areas"
-                    
-                    forecast_lines.append(day_summary)
-                    forecast_lines.append("")
-                    
-                except Exception as day_error:
-                    forecast_lines.append(f"📅 Day {i+1}: Error processing day data")
-                    forecast_lines.append("")
-                    continue
-            
-            summary = "\n".join(forecast_lines)
+            data = await self._fetch_forecast(lat, lon, self._forecast_params(days), ForecastCache.MODEL_CADENCE)
             
             return {
                 "content": [
                     {
                         "type": "text",
-                        "text": summary
+                        "text": self._format_forecast(display_name, data, days)
                     }
                 ]
             }
             
-        except requests.exceptions.RequestException as e:
+        except ValueError as e:
+            return {"error": str(e)}
+        except httpx.HTTPError as e:
             return {"error": f"Failed to fetch forecast data: {str(e)}"}
         except Exception as e:
             return {"error": f"Error processing forecast: {str(e)}"}
+    
+    async def _get_weather_batch(self, locations: list, days: Optional[int] = None) -> Dict[str, Any]:
+        """Get current weather (or a daily forecast) for several locations with one forecast request"""
+        if not locations:
+            return {"error": "No locations provided"}
+        
+        try:
+            # Geocoding has no batch endpoint, so resolve cache misses concurrently
+            resolved = await asyncio.gather(*(self._get_coordinates(location) for location in locations))
+            
+            found = [coords for coords in resolved if coords]
+            if days:
+                params, cadence = self._forecast_params(days), ForecastCache.MODEL_CADENCE
+            else:
+                params, cadence = self._current_params(), ForecastCache.CURRENT_CADENCE
+            
+            datasets = iter(await self._fetch_forecasts([(lat, lon) for lat, lon, _ in found], params, cadence))
+            
+            content = []
+            for location, coords in zip(locations, resolved):
+                if not coords:
+                    text = f"❌ Could not find location: {location}"
+                else:
+                    display_name = coords[2]
+                    data = next(datasets)
+                    try:
+                        if days:
+                            text = self._format_forecast(display_name, data, days)
+                        else:
+                            text = self._format_current(display_name, data)
+                    except (KeyError, ValueError) as e:
+                        text = f"❌ Unexpected weather data for {display_name}: {str(e)}"
+                content.append({"type": "text", "text": text})
+            
+            return {"content": content}
+            
+        except httpx.HTTPError as e:
+            return {"error": f"Failed to fetch weather data: {str(e)}"}
+    
+    def _current_params(self) -> Dict[str, Any]:
+        return {
+            "current": [
+                "temperature_2m",
+                "relative_humidity_2m", 
+                "apparent_temperature",
+                "weather_code",
+                "wind_speed_10m",
+                "wind_direction_10m",
+                "pressure_msl"
+            ],
+            "timezone": "Europe/London"
+        }
+    
+    def _forecast_params(self, days: int) -> Dict[str, Any]:
+        return {
+            "daily": [
+                "temperature_2m_max",
+                "temperature_2m_min", 
+                "weather_code",
+                "precipitation_sum",
+                "wind_speed_10m_max",
+                "wind_gusts_10m_max"
+            ],
+            "timezone": "Europe/London",
+            "forecast_days": days
+        }
+    
+    def _format_current(self, display_name: str, data: Dict[str, Any]) -> str:
+        """Render current conditions from an Open-Meteo forecast response"""
+        current = data["current"]
+        
+        weather_desc = WEATHER_DESCRIPTIONS.get(current["weather_code"], "Unknown")
+        wind_dir = current["wind_direction_10m"]
+        wind_compass = self._wind_direction_to_compass(wind_dir)
+        
+        return f"""Current weather in {display_name}:
+            - Temperature: {current['temperature_2m']}°C (feels like {current['apparent_temperature']}°C)
+            - Conditions: {weather_desc}
+            - Humidity: {current['relative_humidity_2m']}%
+            - Wind: {current['wind_speed_10m']} km/h from {wind_compass}
+            - Pressure: {current['pressure_msl']} hPa
+            - Last updated: {current['time']}"""
+    
+    def _format_forecast(self, display_name: str, data: Dict[str, Any], days: int) -> str:
+        """Render a multi-day forecast, raising ValueError if the response is incomplete"""
+        # Validate response structure
+        if "daily" not in data:
+            raise ValueError("No daily forecast data available")
+            
+        daily = data["daily"]
+        
+        # Validate required fields exist
+        required_fields = ["time", "temperature_2m_max", "temperature_2m_min", "weather_code"]
+        for field in required_fields:
+            if field not in daily:
+                raise ValueError(f"Missing required field: {field}")
+        
+        # Get the number of days we actually have data for
+        num_days = len(daily["time"])
+        days_to_process = min(days, num_days)
+        
+        # Build forecast summary
+        forecast_lines = [f"{days_to_process}-day weather forecast for {display_name}:"]
+        forecast_lines.append("")
         
-    def _get_coordinates(self, location: str) -> tuple:
+        for i in range(days_to_process):
+            try:
+                date = daily["time"][i]
+                temp_max = daily["temperature_2m_max"][i]
+                temp_min = daily["temperature_2m_min"][i] 
+                weather_code = daily["weather_code"][i]
+                
+                # Safely access optional fields
+                precipitation = 0
+                if "precipitation_sum" in daily and len(daily["precipitation_sum"]) > i:
+                    precipitation = daily["precipitation_sum"][i] or 0
+                
+                wind_max = 0
+                if "wind_speed_10m_max" in daily and len(daily["wind_speed_10m_max"]) > i:
+                    wind_max = daily["wind_speed_10m_max"][i] or 0
+                
+                wind_gusts = 0
+                if "wind_gusts_10m_max" in daily and len(daily["wind_gusts_10m_max"]) > i:
+                    wind_gusts = daily["wind_gusts_10m_max"][i] or 0
+                
+                weather_desc = WEATHER_DESCRIPTIONS.get(weather_code, "Unknown")
+                
+                # Format the day name safely
+                try:
+                    from datetime import datetime
+                    date_obj = datetime.fromisoformat(str(date))
+                    day_name = date_obj.strftime("%a, %b %d")
+                except:
+                    day_name = f"Day {i+1}"
+                
+                # Build day summary
+                day_summary = f"📅 {day_name}: {weather_desc}"
+                day_summary += f"\n   🌡️  {temp_min}°C to {temp_max}°C"
+                
+                if precipitation > 0:
+                    day_summary += f"\n   🌧️  Rain: {precipitation}mm"
+                
+                if wind_max > 20:
+                    day_summary += f"\n   💨 Wind: {wind_max} km/h"
+                    if wind_gusts > 0:
+                        day_summary += f" (gusts {wind_gusts} km/h)"
+                elif wind_max > 0:
+                    day_summary += f"\n   💨 Wind: {wind_max} km/h"
+                
+                # Adventure suitability hint
+                if weather_code in [0, 1, 2] and wind_max < 25 and precipitation == 0:
+                    day_summary += "\n   ✅ Great for outdoor activities!"
+                elif weather_code in [61, 63, 65] or precipitation > 5:
+                    day_summary += "\n   ⚠️  Wet weather - plan indoor alternatives"
+                elif wind_max > 40:
+                    day_summary += "\n   ⚠️  Very windy - avoid exposed areas"
+                
+                forecast_lines.append(day_summary)
+                forecast_lines.append("")
+                
+            except Exception as day_error:
+                forecast_lines.append(f"📅 Day {i+1}: Error processing day data")
+                forecast_lines.append("")
+                continue
+        
+        return "\n".join(forecast_lines)
+        
+    async def _fetch_forecast(self, lat: float, lon: float, params: Dict[str, Any], cadence: float) -> Dict[str, Any]:
+        """Fetch forecast data for the grid cell containing (lat, lon), via the forecast cache"""
+        return (await self._fetch_forecasts([(lat, lon)], params, cadence))[0]
+    
+    async def _fetch_forecasts(self, points: list, params: Dict[str, Any], cadence: float) -> list:
+        """Fetch forecast data for several (lat, lon) points, requesting all uncached cells in one call"""
+        if not points:
+            return []
+        
+        keys = [self.forecast_cache.make_key(lat, lon, params) for lat, lon in points]
+        
+        async def fetch_many(cell_keys):
+            # Open-Meteo accepts comma-separated coordinates and returns one result per pair
+            response = await self.http.get(
+                f"{self.base_url}/forecast",
+                params={
+                    "latitude": ",".join(str(key[0]) for key in cell_keys),
+                    "longitude": ",".join(str(key[1]) for key in cell_keys),
+                    **params
+                }
+            )
+            response.raise_for_status()
+            data = response.json()
+            return data if isinstance(data, list) else [data]
+        
+        return await self.forecast_cache.get_many(keys, fetch_many, cadence)
+        
+    async def _get_coordinates(self, location: str) -> tuple:
         """Smart geocoding using Open-Meteo's geocoding API with Scottish place prioritization"""
         try:
             # Handle direct coordinates first
             if self._is_coordinate_input(location):
                 return self._parse_coordinates(location)
             
+            # Places the gazetteer pins down need no geocoding at all
+            place = self.gazetteer.resolve(location)
+            if place and place.lat is not None:
+                return self._place_coordinates(place)
+            
+            # The offline index and typo matching only know Scotland, so they answer for queries pinned
+            # there ("Houston, Scotland, UK"); bare worldwide names ("Houston") go to the geocoder first
+            if re.search(r"\b(scotland|uk|united kingdom)\b", location.lower()):
+                hit = self.geocoder.lookup(location) if self.geocoder else None
+                if hit:
+                    return (hit.lat, hit.lon, f"{hit.name}, {hit.region}, United Kingdom")
+                # Without the index to rule out a real place ("Tarbet"), typos wait for the geocoder to miss
+                place = self.gazetteer.resolve(location, fuzzy=True) if self.gazetteer.fuzzy_first else None
+                if place and place.lat is not None:
+                    return self._place_coordinates(place)
+            
+            # Cached entries already hold the scored best match (or a remembered miss)
+            cached = self.geocode_cache.get(location)
+            if cached is GeocodeCache.NOT_FOUND:
+                return None
+            if cached is not None:
+                return cached
+            
             # Use Open-Meteo's geocoding API
             url = f"{self.geocoding_url}/search"
             params = {
@@ -283,11 +606,18 @@ class SimpleWeatherMCP:
                 "format": "json"
             }
             
-            response = requests.get(url, params=params)
+            response = await self.http.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             
             if not data.get("results"):
+                # A misspelt Scottish name ("Pitlochery") still resolves locally rather than failing
+                place = self.gazetteer.resolve(location, fuzzy=True)
+                if place and place.lat is not None:
+                    coords = self._place_coordinates(place)
+                    self.geocode_cache.put(location, coords)
+                    return coords
+                self.geocode_cache.put(location, GeocodeCache.NOT_FOUND)
                 return None
                 
             results = data["results"]
@@ -296,12 +626,16 @@ class SimpleWeatherMCP:
             best_result = self._score_and_select_location(location, results)
             
             if not best_result:
+                self.geocode_cache.put(location, GeocodeCache.NOT_FOUND)
                 return None
                 
             display_name = self._build_display_name(best_result)
-            return (best_result["latitude"], best_result["longitude"], display_name)
+            coords = (best_result["latitude"], best_result["longitude"], display_name)
+            self.geocode_cache.put(location, coords)
+            return coords
             
         except Exception as e:
+            # Transient network/API errors are not cached so the next call retries
             return None
     
     def _wind_direction_to_compass(self, degrees: float) -> str:
@@ -319,137 +653,8 @@ class SimpleWeatherMCP:
         if not results:
             return None
             
-        # Known ambiguous place names with preferred countries (prioritize Scotland/UK)
-        PLACE_PREFERENCES = {
-            # Scottish places that often conflict with other countries
-            "aberdeen": ["united kingdom", "scotland"],
-            "alexandria": ["united kingdom", "scotland"],
-            "alloa": ["united kingdom", "scotland"],
-            "annan": ["united kingdom", "scotland"],
-            "arbroath": ["united kingdom", "scotland"],
-            "ayr": ["united kingdom", "scotland"],
-            "banff": ["united kingdom", "scotland"],
-            "bathgate": ["united kingdom", "scotland"],
-            "bearsden": ["united kingdom", "scotland"],
-            "bellshill": ["united kingdom", "scotland"],
-            "berwick": ["united kingdom", "scotland"],
-            "brechin": ["united kingdom", "scotland"],
-            "buchanan": ["united kingdom", "scotland"],
-            "callander": ["united kingdom", "scotland"],
-            "campbeltown": ["united kingdom", "scotland"],
-            "carlisle": ["united kingdom", "england"],  # Actually in England but close to Scotland
-            "carnoustie": ["united kingdom", "scotland"],
-            "clydebank": ["united kingdom", "scotland"],
-            "coatbridge": ["united kingdom", "scotland"],
-            "cumbernauld": ["united kingdom", "scotland"],
-            "dalkeith": ["united kingdom", "scotland"],
-            "denny": ["united kingdom", "scotland"],
-            "dumbarton": ["united kingdom", "scotland"],
-            "dumfries": ["united kingdom", "scotland"],
-            "dunbar": ["united kingdom", "scotland"],
-            "dunblane": ["united kingdom", "scotland"],
-            "dundee": ["united kingdom", "scotland"],
-            "dunfermline": ["united kingdom", "scotland"],
-            "duns": ["united kingdom", "scotland"],
-            "east kilbride": ["united kingdom", "scotland"],
-            "edinburgh": ["united kingdom", "scotland"],
-            "elgin": ["united kingdom", "scotland"],
-            "falkirk": ["united kingdom", "scotland"],
-            "forfar": ["united kingdom", "scotland"],
-            "fort william": ["united kingdom", "scotland"],
-            "fraserburgh": ["united kingdom", "scotland"],
-            "galashiels": ["united kingdom", "scotland"],
-            "glasgow": ["united kingdom", "scotland"],
-            "glenrothes": ["united kingdom", "scotland"],
-            "gourock": ["united kingdom", "scotland"],
-            "grangemouth": ["united kingdom", "scotland"],
-            "greenock": ["united kingdom", "scotland"],
-            "hamilton": ["united kingdom", "scotland"],
-            "hawick": ["united kingdom", "scotland"],
-            "helensburgh": ["united kingdom", "scotland"],
-            "huntly": ["united kingdom", "scotland"],
-            "inveraray": ["united kingdom", "scotland"],
-            "inverness": ["united kingdom", "scotland"],
-            "irvine": ["united kingdom", "scotland"],
-            "johnstone": ["united kingdom", "scotland"],
-            "kelso": ["united kingdom", "scotland"],
-            "kilmarnock": ["united kingdom", "scotland"],
-            "kilwinning": ["united kingdom", "scotland"],
-            "kirkcaldy": ["united kingdom", "scotland"],
-            "kirkintilloch": ["united kingdom", "scotland"],
-            "kirkwall": ["united kingdom", "scotland"],
-            "lanark": ["united kingdom", "scotland"],
-            "largo": ["united kingdom", "scotland"],
-            "lerwick": ["united kingdom", "scotland"],
-            "linlithgow": ["united kingdom", "scotland"],
-            "livingston": ["united kingdom", "scotland"],
-            "lochgelly": ["united kingdom", "scotland"],
-            "melrose": ["united kingdom", "scotland"],
-            "montrose": ["united kingdom", "scotland"],
-            "motherwell": ["united kingdom", "scotland"],
-            "nairn": ["united kingdom", "scotland"],
-            "newburgh": ["united kingdom", "scotland"],
-            "newton stewart": ["united kingdom", "scotland"],
-            "oban": ["united kingdom", "scotland"],
-            "paisley": ["united kingdom", "scotland"],
-            "peebles": ["united kingdom", "scotland"],
-            "perth": ["united kingdom", "scotland"],
-            "peterhead": ["united kingdom", "scotland"],
-            "pitlochry": ["united kingdom", "scotland"],
-            "prestwick": ["united kingdom", "scotland"],
-            "renfrew": ["united kingdom", "scotland"],
-            "rothesay": ["united kingdom", "scotland"],
-            "rutherglen": ["united kingdom", "scotland"],
-            "selkirk": ["united kingdom", "scotland"],
-            "st. andrews": ["united kingdom", "scotland"],
-            "st andrews": ["united kingdom", "scotland"],  # Handle both with and without period
-            "stirling": ["united kingdom", "scotland"],
-            "stonehaven": ["united kingdom", "scotland"],
-            "stornoway": ["united kingdom", "scotland"],
-            "stranraer": ["united kingdom", "scotland"],
-            "strathaven": ["united kingdom", "scotland"],
-            "troon": ["united kingdom", "scotland"],
-            "wick": ["united kingdom", "scotland"],
-            "wishaw": ["united kingdom", "scotland"],
-            
-            # English places that often conflict
-            "cambridge": ["united kingdom", "england"],
-            "birmingham": ["united kingdom", "england"], 
-            "manchester": ["united kingdom", "england"],
-            "oxford": ["united kingdom", "england"],
-            "york": ["united kingdom", "england"],
-            "bath": ["united kingdom", "england"],
-            "winchester": ["united kingdom", "england"],
-            "exeter": ["united kingdom", "england"],
-            "lancaster": ["united kingdom", "england"],
-            "newcastle": ["united kingdom", "england"],
-            "richmond": ["united kingdom", "england"],
-            "kingston": ["united kingdom", "england"],
-            "plymouth": ["united kingdom", "england"],
-            "bristol": ["united kingdom", "england"],
-            "london": ["united kingdom", "england"],
-            "windsor": ["united kingdom", "england"],
-            "dover": ["united kingdom", "england"],
-            "canterbury": ["united kingdom", "england"],
-
-            "canna": ["united kingdom", "scotland"],
-            "easdale": ["united kingdom", "scotland"],
-            "iona": ["united kingdom", "scotland"],
-            "mull": ["united kingdom", "scotland"],
-            "skye": ["united kingdom", "scotland"],
-            "harris": ["united kingdom", "scotland"],
-            "lewis": ["united kingdom", "scotland"],
-            "barra": ["united kingdom", "scotland"],
-            "uist": ["united kingdom", "scotland"],
-            "orkney": ["united kingdom", "scotland"],
-            "shetland": ["united kingdom", "scotland"],
-            "arran": ["united kingdom", "scotland"],
-            "bute": ["united kingdom", "scotland"],
-            "islay": ["united kingdom", "scotland"],
-            "jura": ["united kingdom", "scotland"],
-            
-            # Add more as you discover conflicts
-        }
+        # Known ambiguous place names carry their preferred countries (Scotland/UK first)
+        place = self.gazetteer.resolve(query)
         
         query_lower = query.lower().strip()
         
@@ -464,8 +669,8 @@ class SimpleWeatherMCP:
                 score += 100
             
             # Check if this is a known ambiguous place
-            if query_lower in PLACE_PREFERENCES:
-                preferred_countries = PLACE_PREFERENCES[query_lower]
+            if place:
+                preferred_countries = place.preferred_countries
                 for i, pref_country in enumerate(preferred_countries):
                     if pref_country in country or pref_country in admin1:
                         # Much higher score for preferred countries
@@ -514,6 +719,10 @@ class SimpleWeatherMCP:
         lat, lon = float(parts[0]), float(parts[1])
         return (lat, lon, f"Coordinates: {lat:.4f}, {lon:.4f}")
 
+    def _place_coordinates(self, place) -> tuple:
+        """(lat, lon, display name) for a gazetteer place, shaped like a geocoding result"""
+        return (place.lat, place.lon, f"{place.name}, {place.country.title()}, United Kingdom")
+    
     def _build_display_name(self, result: dict) -> str:
         """Build a descriptive display name from geocoding result"""
         display_name = result["name"]
@@ -535,31 +744,9 @@ class SimpleWeatherMCP:
 app = modal.App("scotland-weather-mcp")
 
 @app.function(
-    image=modal.Image.debian_slim().pip_install("requests", "fastapi", "uvicorn")
+    image=modal.Image.debian_slim().pip_install("httpx", "fastapi", "uvicorn").add_local_python_source("scotland_common", ignore=not_shipped)
 )
 @modal.asgi_app()
 def fastapi_app():
-    from fastapi import FastAPI
-    
-    web_app = FastAPI()
-
-    @web_app.post("/mcp")
-    async def mcp_endpoint(request_dict: Dict[str, Any]) -> Dict[str, Any]:
-        mcp_server = SimpleWeatherMCP()
-        
-        method = request_dict.get("method")
-        
-        if method == "tools/list":
-            return mcp_server.list_tools()
-        elif method == "tools/call":
-            tool_name = request_dict.get("params", {}).get("name")
-            arguments = request_dict.get("params", {}).get("arguments", {})
-            return mcp_server.call_tool(tool_name, arguments)
-        else:
-            return {"error": f"Unsupported method: {method}"}
-
-    @web_app.get("/health")
-    async def health_check():
-        return {"status": "healthy", "service": "Scotland Weather MCP"}
-    
-    return web_app
\ No newline at end of file
+    # One server per container: caches and pooled connections survive across requests
+    return create_app(SimpleWeatherMCP(), "Scotland Weather MCP")
@@ -0,0 +1,9 @@
+from pathlib import Path
+
+from .gazetteer import Gazetteer, Place, get_gazetteer
+from .geocoder import GeocodeHit, OfflineGeocoder, build_index, get_geocoder
+from .server import MCPServer, build_http_client, create_app
+
+def not_shipped(path: Path) -> bool:
+    """Modal ignore filter for add_local_python_source: ship the code and the geocoder index"""
+    return path.suffix not in (".py", ".idx")
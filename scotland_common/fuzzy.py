@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+class Suggestion(NamedTuple):
+    term: str
+    value: Any
+    distance: int
+    frequency: float
+
+def osa_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (edits plus adjacent swaps), or limit + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+class SymSpell:
+    """Symmetric-delete spelling index: typo lookups cost a few dict probes, not a scan of every term
+
+    Every term is indexed under all strings reachable by deleting up to max_distance characters
+    from its first prefix_length characters. A query generates its own deletes the same way; any
+    term sharing a delete is a candidate, confirmed with a bounded edit distance.
+    """
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.terms: Dict[str, tuple] = {}  # term -> (value, frequency)
+        self.deletes: Dict[str, List[str]] = {}
+
+    def _deletes(self, term: str, max_distance: int) -> Set[str]:
+        edits = {term[:self.prefix_length]}
+        frontier = set(edits)
+        for _ in range(max_distance):
+            frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+            edits |= frontier
+        return edits
+
+    def add(self, term: str, value: Any, frequency: float = 0) -> None:
+        if term in self.terms:
+            return
+        self.terms[term] = (value, frequency)
+        for delete in self._deletes(term, self.max_distance):
+            self.deletes.setdefault(delete, []).append(term)
+
+    def lookup(self, query: str, max_distance: Optional[int] = None) -> List[Suggestion]:
+        """Terms within max_distance of query, closest first, then most frequent"""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        seen = set()
+        suggestions = []
+        for delete in self._deletes(query, max_distance):
+            for term in self.deletes.get(delete, ()):
+                if term in seen:
+                    continue
+                seen.add(term)
+                distance = osa_distance(query, term, max_distance)
+                if distance <= max_distance:
+                    value, frequency = self.terms[term]
+                    suggestions.append(Suggestion(term, value, distance, frequency))
+        suggestions.sort(key=lambda s: (s.distance, -s.frequency, s.term))
+        return suggestions
+
+    def stats(self) -> Dict[str, Any]:
+        return {"terms": len(self.terms), "deletes": len(self.deletes)}
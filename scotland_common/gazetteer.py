@@ -0,0 +1,226 @@
+from array import array
+from functools import lru_cache
+from typing import Dict, Any, List, NamedTuple, Optional, Set, Tuple
+import math
+import re
+import sys
+import threading
+
+from .fuzzy import SymSpell
+from .places import PLACES
+
+# Country codes stored per place; the index is what the compact arrays hold
+COUNTRIES = ("scotland", "england")
+
+# Qualifiers callers append to place names ("Oban, Scotland, UK"); stripped before lookup
+QUALIFIERS = re.compile(r"(?:,\s*(?:scotland|england|uk|united kingdom|gb|great britain))+$")
+
+class Place(NamedTuple):
+    name: str
+    country: str
+    lat: Optional[float]
+    lon: Optional[float]
+
+    @property
+    def query(self) -> str:
+        """Unambiguous geocoder query, e.g. "Isle of Skye, Scotland, UK\""""
+        return f"{self.name}, {self.country.title()}, UK"
+
+    @property
+    def preferred_countries(self) -> List[str]:
+        """Countries to favour, best first, when scoring geocoder results"""
+        return ["united kingdom", self.country]
+
+class Gazetteer:
+    """Canonical Scottish (and a few clashing English) place names, loaded once per process
+
+    Places live in parallel arrays - interned names, a country code byte and float64 lat/lon
+    (NaN when unknown) - and every spelling (name or alias, normalized) maps to a row index.
+    Lookups are memoized per normalized query and counted, so stats() shows the hit rate.
+    Misspelled names ("Pitlochery") can be resolved through a SymSpell index over every spelling,
+    ranked by edit distance, then population (from the offline geocoder when built), then usage.
+    """
+
+    def __init__(self, text: str = PLACES, memo_size: int = 4096):
+        self.names: List[str] = []
+        self.countries = bytearray()
+        self.lats = array("d")
+        self.lons = array("d")
+        self.index: Dict[str, int] = {}
+        # Spellings safe to spot in free text, mapped to their row
+        self.spottable: Dict[str, int] = {}
+        # Normalized spellings that are only ever resolved ("w" names, "~" aliases)
+        self._lookup_only: Set[str] = set()
+
+        for line in text.strip().splitlines():
+            name, country, lat, lon, flags, aliases = line.split("|")
+            row = len(self.names)
+            self.names.append(sys.intern(name))
+            self.countries.append(COUNTRIES.index(country))
+            self.lats.append(float(lat) if lat else math.nan)
+            self.lons.append(float(lon) if lon else math.nan)
+
+            spellings = [(name, "w" not in flags)]
+            spellings += [(alias.lstrip("~"), not alias.startswith("~")) for alias in aliases.split(";") if alias]
+            for spelling, spottable in spellings:
+                key = sys.intern(self.normalize(spelling))
+                if key in self.index:
+                    raise ValueError(f"Duplicate gazetteer spelling: {spelling}")
+                self.index[key] = row
+                if spottable:
+                    self.spottable[spelling.lower()] = row
+                else:
+                    self._lookup_only.add(key)
+
+        # Hits per place, the popularity tie-break for fuzzy matches when no population is known
+        self.usage = array("I", bytes(4 * len(self.names)))
+        self._spelling_index: Optional[SymSpell] = None
+
+        self.memo_size = memo_size
+        self._memo: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.memo_hits = 0
+        self.fuzzy_hits = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lower-case, drop full stops and country qualifiers, collapse whitespace and hyphens"""
+        key = " ".join(query.lower().replace(".", "").replace("-", " ").split())
+        return QUALIFIERS.sub("", key).strip()
+
+    @staticmethod
+    def allowed_distance(key: str) -> int:
+        """Edits tolerated for a name this long: none for short names ("Ayr" vs "air"), two for long ones"""
+        return 0 if len(key) <= 4 else 1 if len(key) <= 8 else 2
+
+    def _geocoder(self):
+        # Imported here as the geocoder module imports this one
+        from .geocoder import get_geocoder
+        return get_geocoder()
+
+    def _spellings(self) -> SymSpell:
+        if self._spelling_index is None:
+            # Built on first fuzzy lookup
+            geocoder = self._geocoder()
+            index = SymSpell(max_distance=2)
+            for key, row in self.index.items():
+                hits = geocoder.exact(self.names[row]) if geocoder else []
+                index.add(key, row, hits[0].population if hits else 0)
+            self._spelling_index = index
+        return self._spelling_index
+
+    @property
+    def fuzzy_first(self) -> bool:
+        """Whether typo matching may run before a network geocoder has had its say
+
+        Only with the offline index loaded: it is what tells a real place ("Corrie" on Arran) from a
+        typo of a gazetteer one ("Comrie"). Without it, fuzzy lookups belong after a geocoder miss.
+        """
+        return self._geocoder() is not None
+
+    def _fuzzy_row(self, key: str, spottable_only: bool = False) -> int:
+        distance = self.allowed_distance(key)
+        # A real place the offline index knows ("Corrie" on Arran) is not a typo of a gazetteer one ("Comrie")
+        geocoder = self._geocoder()
+        if not distance or (geocoder and geocoder.exact(key)):
+            return -1
+        suggestions = self._spellings().lookup(key, distance)
+        if spottable_only:
+            suggestions = [s for s in suggestions if s.term not in self._lookup_only]
+        if not suggestions:
+            return -1
+        best = [s for s in suggestions if (s.distance, s.frequency) == (suggestions[0].distance, suggestions[0].frequency)]
+        return max(best, key=lambda s: self.usage[s.value]).value
+
+    def _row(self, query: str, fuzzy: bool = False, spotting: bool = False) -> int:
+        memo_key = f"!{query}" if spotting else f"~{query}" if fuzzy else query
+        with self._lock:
+            self.lookups += 1
+            row = self._memo.get(memo_key)
+            if row is not None:
+                self.memo_hits += 1
+            else:
+                key = self.normalize(query)
+                row = self.index.get(key, -1)
+                if spotting:
+                    # Spottable exact spellings are the place matcher's; the rest are everyday words
+                    row = -1 if row >= 0 else self._fuzzy_row(key, spottable_only=True)
+                    self.fuzzy_hits += row >= 0
+                elif row < 0 and fuzzy:
+                    row = self._fuzzy_row(key)
+                    self.fuzzy_hits += row >= 0
+                if len(self._memo) >= self.memo_size:
+                    self._memo.clear()
+                self._memo[memo_key] = row
+            if row >= 0:
+                self.hits += 1
+                self.usage[row] += 1
+            return row
+
+    def _place(self, row: int) -> Place:
+        lat, lon = self.lats[row], self.lons[row]
+        known = not math.isnan(lat)
+        return Place(self.names[row], COUNTRIES[self.countries[row]], lat if known else None, lon if known else None)
+
+    def resolve(self, query: str, fuzzy: bool = False) -> Optional[Place]:
+        """The place a name or alias refers to ("fort bill", "Skye, Scotland, UK"), or None
+
+        With fuzzy, a name with no exact match resolves to the closest spelling within
+        allowed_distance() edits ("Tobermorey" -> Tobermory).
+        """
+        row = self._row(query, fuzzy)
+        return self._place(row) if row >= 0 else None
+
+    def spot(self, text: str) -> Optional[Place]:
+        """The place a misspelt name in free text refers to ("Pitlochery"), or None
+
+        Unlike resolve(fuzzy=True), an exact spelling never matches - an exact spottable spelling
+        was already found by the place matcher, and any other one is an everyday word ("Keith and
+        I", "The Fort") - and typos only resolve to spottable spellings.
+        """
+        row = self._row(text, spotting=True)
+        return self._place(row) if row >= 0 else None
+
+    def clarify(self, query: str, fuzzy: bool = False) -> str:
+        """Geocoder-ready query: canonical for known places, otherwise pinned to Scotland unless already qualified"""
+        place = self.resolve(query, fuzzy)
+        if place:
+            return place.query
+        if not any(keyword in query.lower() for keyword in ["scotland", "uk", "united kingdom"]):
+            return f"{query}, Scotland, UK"
+        return query
+
+    def coordinates(self, query: str, fuzzy: bool = False) -> Optional[Tuple[float, float]]:
+        """(lat, lon) for known places with a single point location"""
+        place = self.resolve(query, fuzzy)
+        if place and place.lat is not None:
+            return (place.lat, place.lon)
+        return None
+
+    def spellings(self, country: Optional[str] = None) -> Dict[str, str]:
+        """Spellings worth spotting in free text (everyday words excluded), mapped to canonical names"""
+        code = None if country is None else COUNTRIES.index(country)
+        return {
+            spelling: self.names[row] for spelling, row in self.spottable.items()
+            if code is None or self.countries[row] == code
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "places": len(self.names),
+            "spellings": len(self.index),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else None,
+            "memo_entries": len(self._memo),
+            "memo_hits": self.memo_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "spelling_index": self._spelling_index.stats() if self._spelling_index else None
+        }
+
+@lru_cache(maxsize=None)
+def get_gazetteer() -> Gazetteer:
+    """The process-wide gazetteer, built on first use"""
+    return Gazetteer()
@@ -0,0 +1,258 @@
+"""Offline geocoder: a build step that turns a GeoNames extract into a memory-mapped index
+
+Build once (GB.txt from https://download.geonames.org/export/dump/GB.zip):
+
+    python -m scotland_common.geocoder GB.txt
+
+and every server resolves Scottish places from the index before going to the network.
+"""
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, NamedTuple, Optional
+import argparse
+import mmap
+import os
+import struct
+import threading
+
+from .gazetteer import Gazetteer
+
+# Layout: header, then uint32 key/name offsets, float32 lat/lon, uint32 population,
+# one byte each of feature class and region, then the UTF-8 key and name blobs.
+# Rows are sorted by key, most populous first within a key, so lookups are binary searches.
+MAGIC = b"SCOTGEO1"
+HEADER = struct.Struct("<8sIII")  # magic, rows, key blob size, name blob size
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent / "data" / "geocoder.idx"
+
+# GeoNames admin1 codes for the United Kingdom, stored as a region byte per row
+REGIONS = {"SCT": "Scotland", "ENG": "England", "WLS": "Wales", "NIR": "Northern Ireland"}
+REGION_NAMES = tuple(REGIONS.values())
+
+# Populated places, hills/islands, water, parks/areas and administrative areas
+DEFAULT_FEATURE_CLASSES = "PTHLA"
+
+class GeocodeHit(NamedTuple):
+    name: str
+    lat: float
+    lon: float
+    population: int
+    feature_class: str  # GeoNames class: P town, T hill/island, H water, L area, A admin
+    region: str
+
+def index_key(name: str) -> str:
+    """Lookup key: the gazetteer's normalization, with apostrophes dropped ("John O'Groats" = "john ogroats")"""
+    return Gazetteer.normalize(name).replace("'", "").replace("’", "")
+
+def build_index(source: str, destination: str = str(DEFAULT_INDEX_PATH), regions: Optional[List[str]] = None, feature_classes: str = DEFAULT_FEATURE_CLASSES) -> int:
+    """Ingest a GeoNames dump (tab-separated, no header) and write the index; returns the row count
+
+    Each place is indexed under its name, ASCII name and any ASCII alternate names.
+    """
+    regions = regions or ["SCT"]
+    rows = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 15 or fields[8] != "GB" or fields[10] not in regions or fields[6] not in feature_classes:
+                continue
+            name, ascii_name, alternates = fields[1], fields[2], fields[3]
+            lat, lon = float(fields[4]), float(fields[5])
+            population = int(fields[14] or 0)
+            region = REGION_NAMES.index(REGIONS[fields[10]])
+
+            keys = {index_key(name), index_key(ascii_name)}
+            keys.update(index_key(alt) for alt in alternates.split(",") if alt and alt.isascii() and not alt.startswith("http"))
+            for key in keys:
+                if key:
+                    rows.append((key, -population, name, lat, lon, fields[6], region))
+
+    rows.sort()
+    key_blob, name_blob = bytearray(), bytearray()
+    key_offsets, name_starts, name_ends = [0], [], []
+    name_spans: Dict[str, tuple] = {}
+    for key, _, name, *_ in rows:
+        key_blob += key.encode("utf-8")
+        key_offsets.append(len(key_blob))
+        # A place indexed under several keys stores its display name once
+        if name not in name_spans:
+            encoded = name.encode("utf-8")
+            name_spans[name] = (len(name_blob), len(name_blob) + len(encoded))
+            name_blob += encoded
+        name_starts.append(name_spans[name][0])
+        name_ends.append(name_spans[name][1])
+
+    n = len(rows)
+    Path(destination).parent.mkdir(parents=True, exist_ok=True)
+    temporary = f"{destination}.tmp"
+    with open(temporary, "wb") as out:
+        out.write(HEADER.pack(MAGIC, n, len(key_blob), len(name_blob)))
+        out.write(struct.pack(f"<{n + 1}I", *key_offsets))
+        out.write(struct.pack(f"<{n}I", *name_starts))
+        out.write(struct.pack(f"<{n}I", *name_ends))
+        out.write(struct.pack(f"<{n}f", *(row[3] for row in rows)))
+        out.write(struct.pack(f"<{n}f", *(row[4] for row in rows)))
+        out.write(struct.pack(f"<{n}I", *(min(-row[1], 2 ** 32 - 1) for row in rows)))
+        out.write(bytes(ord(row[5]) for row in rows))
+        out.write(bytes(row[6] for row in rows))
+        out.write(key_blob)
+        out.write(name_blob)
+    os.replace(temporary, destination)
+    return n
+
+class _Keys:
+    """Sequence view of the sorted key blob, so bisect can search it without decoding every key"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+class OfflineGeocoder:
+    """Exact, prefix and normalized lookups over a memory-mapped index built by build_index()
+
+    Nothing is parsed at startup: the arrays are views straight onto the mapped file, so opening
+    is instant and the pages are shared between processes on the same host.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, n, key_size, name_size = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a geocoder index")
+
+        position = HEADER.size
+
+        def take(size, fmt=None):
+            nonlocal position
+            chunk = view[position:position + size]
+            position += size
+            return chunk.cast(fmt) if fmt else chunk
+
+        self.rows = n
+        key_offsets = take(4 * (n + 1), "I")
+        self._name_starts = take(4 * n, "I")
+        self._name_ends = take(4 * n, "I")
+        self._lats = take(4 * n, "f")
+        self._lons = take(4 * n, "f")
+        self._populations = take(4 * n, "I")
+        self._classes = take(n)
+        self._regions = take(n)
+        self._keys = _Keys(key_offsets, take(key_size))
+        self._names = take(name_size)
+
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.prefix_queries = 0
+
+    def _hit(self, row: int) -> GeocodeHit:
+        return GeocodeHit(
+            bytes(self._names[self._name_starts[row]:self._name_ends[row]]).decode("utf-8"),
+            round(self._lats[row], 5),
+            round(self._lons[row], 5),
+            self._populations[row],
+            chr(self._classes[row]),
+            REGION_NAMES[self._regions[row]]
+        )
+
+    def _rows(self, key: str) -> range:
+        encoded = key.encode("utf-8")
+        start = bisect_left(self._keys, encoded)
+        end = start
+        while end < self.rows and self._keys[end] == encoded:
+            end += 1
+        return range(start, end)
+
+    def exact(self, query: str, feature_classes: Optional[str] = None) -> List[GeocodeHit]:
+        """Every place indexed under this (normalized) name, most populous first"""
+        return [
+            self._hit(row) for row in self._rows(index_key(query))
+            if feature_classes is None or chr(self._classes[row]) in feature_classes
+        ]
+
+    def prefix(self, prefix: str, limit: int = 10, feature_classes: Optional[str] = None, scan_limit: int = 2000) -> List[GeocodeHit]:
+        """Places whose name starts with prefix (for autocomplete), most populous first"""
+        with self._lock:
+            self.prefix_queries += 1
+        encoded = index_key(prefix).encode("utf-8")
+        row = bisect_left(self._keys, encoded)
+        matches = []
+        while row < self.rows and len(matches) < scan_limit and self._keys[row].startswith(encoded):
+            if feature_classes is None or chr(self._classes[row]) in feature_classes:
+                matches.append(row)
+            row += 1
+        matches.sort(key=lambda r: -self._populations[r])
+
+        hits, seen = [], set()
+        for row in matches:
+            hit = self._hit(row)
+            if (hit.name, hit.lat, hit.lon) not in seen:
+                seen.add((hit.name, hit.lat, hit.lon))
+                hits.append(hit)
+                if len(hits) == limit:
+                    break
+        return hits
+
+    def lookup(self, query: str, feature_classes: Optional[str] = None) -> Optional[GeocodeHit]:
+        """Best single match: the exact name, then common variants ("Isle of X" / "X", "Saint" / "St")"""
+        key = index_key(query)
+        variants = [key]
+        for prefix in ("isle of ", "the "):
+            if key.startswith(prefix):
+                variants.append(key[len(prefix):])
+        variants.append(f"isle of {key}")
+        if key.startswith("saint "):
+            variants.append("st " + key[len("saint "):])
+
+        hit = None
+        for variant in variants:
+            hits = self.exact(variant, feature_classes)
+            if hits:
+                hit = hits[0]
+                break
+        with self._lock:
+            self.lookups += 1
+            self.hits += hit is not None
+        return hit
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "bytes": len(self._mmap),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else None,
+            "prefix_queries": self.prefix_queries
+        }
+
+@lru_cache(maxsize=None)
+def get_geocoder() -> Optional[OfflineGeocoder]:
+    """The process-wide offline geocoder, or None when no index has been built"""
+    path = os.getenv("SCOTLAND_GEOCODER_INDEX", str(DEFAULT_INDEX_PATH))
+    if not os.path.exists(path):
+        return None
+    return OfflineGeocoder(path)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the offline geocoder index from a GeoNames extract")
+    parser.add_argument("source", help="GeoNames dump, e.g. GB.txt")
+    parser.add_argument("-o", "--output", default=str(DEFAULT_INDEX_PATH), help="index file to write")
+    parser.add_argument("--regions", default="SCT", help="comma-separated GeoNames admin1 codes (SCT,ENG,WLS,NIR)")
+    parser.add_argument("--feature-classes", default=DEFAULT_FEATURE_CLASSES, help="GeoNames feature classes to keep")
+    args = parser.parse_args()
+
+    rows = build_index(args.source, args.output, args.regions.split(","), args.feature_classes)
+    print(f"Wrote {rows} rows to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
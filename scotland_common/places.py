@@ -0,0 +1,246 @@
+# Gazetteer source data, one place per line:
+#   canonical name | country | lat | lon | flags | aliases (";"-separated)
+# Coordinates are left blank where a name is ambiguous on the ground (e.g. two Tarberts) or
+# covers a wide area; those still get clarified and disambiguated but are geocoded upstream.
+# Flags: "w" - the name is also an everyday word, so it is only resolved, never spotted in free
+# text. An alias starting with "~" is lookup-only in the same way.
+PLACES = """
+Aberdeen|scotland|57.1497|-2.0943||
+Dundee|scotland|56.4620|-2.9707||
+Perth|scotland|56.3956|-3.4309||
+Hamilton|scotland|55.7772|-4.0390||
+Glasgow|scotland|55.8642|-4.2518||
+Edinburgh|scotland|55.9533|-3.1883||
+Stirling|scotland|56.1165|-3.9369||
+Inverness|scotland|57.4778|-4.2247||
+Paisley|scotland|55.8456|-4.4239||
+Greenock|scotland|55.9486|-4.7644||
+Ayr|scotland|55.4586|-4.6292||
+Kilmarnock|scotland|55.6111|-4.4957||
+Dumfries|scotland|55.0700|-3.6050||
+Falkirk|scotland|56.0019|-3.7839||
+Livingston|scotland|55.9029|-3.5226||
+Kirkcaldy|scotland|56.1107|-3.1674||
+Dunfermline|scotland|56.0719|-3.4393||
+Alexandria|scotland|55.9930|-4.5810||
+Bearsden|scotland|55.9150|-4.3330||
+Bellshill|scotland|55.8170|-4.0260||
+Clydebank|scotland|55.9010|-4.4050||
+Coatbridge|scotland|55.8620|-4.0270||
+Cumbernauld|scotland|55.9460|-3.9920||
+Dalkeith|scotland|55.8940|-3.0680||
+Dumbarton|scotland|55.9440|-4.5700||
+Dunblane|scotland|56.1870|-3.9650||
+East Kilbride|scotland|55.7640|-4.1770||
+Glenrothes|scotland|56.1950|-3.1730||
+Gourock|scotland|55.9580|-4.8170||
+Irvine|scotland|55.6190|-4.6580||
+Johnstone|scotland|55.8290|-4.5140||
+Kilwinning|scotland|55.6530|-4.7070||
+Kirkintilloch|scotland|55.9390|-4.1530||
+Lanark|scotland|55.6730|-3.7800||
+Lochgelly|scotland|56.1350|-3.3120||
+Motherwell|scotland|55.7890|-3.9910||
+Prestwick|scotland|55.4950|-4.6150||
+Renfrew|scotland|55.8730|-4.3920||
+Rutherglen|scotland|55.8300|-4.2140||
+Strathaven|scotland|55.6770|-4.0650||
+Troon|scotland|55.5430|-4.6610||
+Wishaw|scotland|55.7740|-3.9180||
+Buchanan|scotland|||w|
+Largo|scotland|||w|
+Newburgh|scotland||||
+Isle of Mull|scotland|56.4504|-5.8037||mull
+Isle of Skye|scotland|57.2740|-6.2149||skye
+Isle of Arran|scotland|55.5836|-5.2489||arran
+Isle of Harris|scotland|57.8800|-6.8500||harris
+Isle of Lewis|scotland|58.2200|-6.5500||lewis
+Orkney Islands|scotland|59.0000|-3.0000||orkney
+Shetland Islands|scotland|60.3000|-1.2500||shetland
+Isle of Islay|scotland|55.7800|-6.2200||islay
+Isle of Jura|scotland|55.9500|-5.9000||jura
+Isle of Bute|scotland|55.8300|-5.0800||bute
+Isle of Iona|scotland|56.3300|-6.4100||iona
+Isle of Tiree|scotland|56.5000|-6.8800||tiree
+Isle of Coll|scotland|56.6400|-6.5800||~coll
+Isle of Muck|scotland|56.8300|-6.2500||~muck
+Isle of Eigg|scotland|56.9000|-6.1600||eigg
+Isle of Rum|scotland|57.0000|-6.3300||~rum;rhum
+Isle of Canna|scotland|57.0600|-6.5500||canna
+Isle of Staffa|scotland|56.4350|-6.3400||staffa
+Isle of Ulva|scotland|56.4800|-6.2000||ulva
+Easdale|scotland|56.2900|-5.6600||
+Isle of Barra|scotland|56.9800|-7.4700||barra
+Uist|scotland||||
+Kirkwall|scotland|58.9810|-2.9600||
+Lerwick|scotland|60.1550|-1.1450||
+Stornoway|scotland|58.2090|-6.3870||
+Fort William|scotland|56.8198|-5.1052||fort bill;~the fort
+Aviemore|scotland|57.1952|-3.8263||
+Oban|scotland|56.4154|-5.4713||
+Pitlochry|scotland|56.7028|-3.7340||
+Callander|scotland|56.2440|-4.2150||
+Balloch|scotland|56.0030|-4.5830||
+Helensburgh|scotland|56.0030|-4.7330||
+Mallaig|scotland|57.0067|-5.8283||~malky
+Kyle of Lochalsh|scotland|57.2785|-5.7127||kyle
+Portree|scotland|57.4123|-6.1956||
+Tobermory|scotland|56.6229|-6.0679||~toby
+Tarbert|scotland||||
+Campbeltown|scotland|55.4250|-5.6050||
+Stranraer|scotland|54.9030|-5.0240||
+Newton Stewart|scotland|54.9580|-4.4820||
+Thurso|scotland|58.5944|-3.5267||
+Wick|scotland|58.4394|-3.0956||
+Dornoch|scotland|57.8800|-4.0290||
+Golspie|scotland|57.9710|-3.9800||
+Brora|scotland|58.0100|-3.8520||
+Ullapool|scotland|57.8952|-5.1587||
+Gairloch|scotland|57.7280|-5.6960||
+Kinlochewe|scotland|57.6040|-5.3020||
+Torridon|scotland|57.5450|-5.5130||
+Applecross|scotland|57.4330|-5.8130||
+Plockton|scotland|57.3370|-5.6450||
+Lochinver|scotland|58.1480|-5.2430||
+Durness|scotland|58.5667|-4.7167||
+Tongue|scotland|58.4780|-4.4180||
+Bettyhill|scotland|58.5290|-4.2330||
+John O'Groats|scotland|58.6400|-3.0700||john o groats;john ogroats
+Kelso|scotland|55.5980|-2.4330||
+Jedburgh|scotland|55.4780|-2.5550||
+Hawick|scotland|55.4220|-2.7870||
+Galashiels|scotland|55.6170|-2.8070||
+Selkirk|scotland|55.5470|-2.8390||
+Melrose|scotland|55.5980|-2.7190||
+Peebles|scotland|55.6520|-3.1880||
+Duns|scotland|55.7770|-2.3430|w|
+Biggar|scotland|55.6230|-3.5260||
+Moffat|scotland|55.3330|-3.4410||
+Sanquhar|scotland|55.3660|-3.9240||
+Langholm|scotland|55.1510|-2.9990||
+Annan|scotland|54.9870|-3.2610||
+Gretna|scotland|54.9950|-3.0650||
+Gretna Green|scotland|55.0010|-3.0640||
+Lockerbie|scotland|55.1210|-3.3540||
+St Andrews|scotland|56.3398|-2.7967||saint andrews
+Cupar|scotland|56.3200|-3.0100||
+Anstruther|scotland|56.2230|-2.7000||
+Crail|scotland|56.2590|-2.6290||
+Elie|scotland|56.1890|-2.8200||
+Pittenweem|scotland|56.2130|-2.7280||
+North Berwick|scotland|56.0580|-2.7170||
+Dunbar|scotland|56.0030|-2.5170||
+Haddington|scotland|55.9560|-2.7810||
+Linlithgow|scotland|55.9760|-3.6000||
+Bathgate|scotland|55.9020|-3.6430||
+Armadale|scotland|55.8980|-3.7010||
+Stonehaven|scotland|56.9630|-2.2110||
+Montrose|scotland|56.7080|-2.4670||
+Arbroath|scotland|56.5630|-2.5830||
+Carnoustie|scotland|56.5010|-2.7140||
+Forfar|scotland|56.6440|-2.8890||
+Brechin|scotland|56.7300|-2.6560||
+Kirriemuir|scotland|56.6750|-3.0030||
+Blairgowrie|scotland|56.5910|-3.3400||
+Crieff|scotland|56.3760|-3.8420||
+Aberfeldy|scotland|56.6200|-3.8660||
+Dunkeld|scotland|56.5650|-3.5850||
+Birnam|scotland|56.5590|-3.5780||
+Rothesay|scotland|55.8360|-5.0550||
+Dunoon|scotland|55.9500|-4.9260||
+Inveraray|scotland|56.2310|-5.0730||
+Lochgilphead|scotland|56.0380|-5.4330||
+Ardrishaig|scotland|56.0150|-5.4490||
+Crinan|scotland|56.0900|-5.5600||
+Kilmartin|scotland|56.1330|-5.4880||
+Dalmally|scotland|56.4010|-4.9710||
+Tyndrum|scotland|56.4350|-4.7130||
+Crianlarich|scotland|56.3910|-4.6170||
+Killin|scotland|56.4670|-4.3190||
+Lochearnhead|scotland|56.3880|-4.2890||
+St Fillans|scotland|56.3930|-4.1100||
+Comrie|scotland|56.3750|-3.9900||
+Auchterarder|scotland|56.2960|-3.7010||
+Gleneagles|scotland|56.2840|-3.7450||
+Bridge of Allan|scotland|56.1540|-3.9450||
+Alloa|scotland|56.1160|-3.7930||
+Clackmannan|scotland|56.1070|-3.7520||
+Tillicoultry|scotland|56.1530|-3.7420||
+Dollar|scotland|56.1620|-3.6710|w|
+Alva|scotland|56.1530|-3.8010||
+Menstrie|scotland|56.1480|-3.8530||
+Denny|scotland|56.0200|-3.9100|w|
+Bonnybridge|scotland|55.9990|-3.8880||
+Larbert|scotland|56.0220|-3.8300||
+Stenhousemuir|scotland|56.0290|-3.8120||
+Grangemouth|scotland|56.0120|-3.7170||
+Bo'ness|scotland|56.0170|-3.6080||boness
+Blackness|scotland|56.0000|-3.5170||
+South Queensferry|scotland|55.9900|-3.3960||queensferry
+Ben Nevis|scotland|56.7969|-5.0037||
+Ben Lomond|scotland|56.1900|-4.6330||
+Ben More|scotland||||
+Cairngorms|scotland|57.0833|-3.6667||
+Glencoe|scotland|56.6756|-5.1019||glen coe
+Loch Lomond|scotland|56.1000|-4.6000||
+Loch Ness|scotland|57.3229|-4.4244||
+Loch Katrine|scotland|56.2500|-4.5000||
+Loch Earn|scotland|56.3850|-4.2000||
+Loch Tay|scotland|56.5100|-4.1700||
+Loch Tummel|scotland|56.7100|-3.8600||
+Loch Rannoch|scotland|56.6850|-4.3300||
+Loch Awe|scotland|56.3000|-5.2700||
+Loch Fyne|scotland|56.0500|-5.3000||
+Loch Long|scotland|56.1000|-4.8500||
+Loch Goil|scotland|56.1200|-4.9000||
+The Trossachs|scotland|56.2300|-4.4200||trossachs
+Queen Elizabeth Forest Park|scotland|56.1800|-4.4000||
+Cairngorms National Park|scotland|57.1952|-3.8263||
+Loch Lomond and Trossachs National Park|scotland|56.2500|-4.5500||
+Highlands|scotland||||the highlands;scottish highlands
+Scottish Borders|scotland||||borders;the borders
+Galloway|scotland||||dumfries and galloway
+Elgin|scotland|57.6490|-3.3180||
+Forres|scotland|57.6090|-3.6190||
+Nairn|scotland|57.5860|-3.8690||
+Grantown-on-Spey|scotland|57.3290|-3.6080||grantown
+Kingussie|scotland|57.0800|-4.0530||
+Newtonmore|scotland|57.0640|-4.1210||
+Dalwhinnie|scotland|56.9350|-4.2430||
+Carrbridge|scotland|57.2830|-3.8130||
+Boat of Garten|scotland|57.2500|-3.7500||
+Tomintoul|scotland|57.2500|-3.3800||
+Aberlour|scotland|57.4700|-3.2260||
+Dufftown|scotland|57.4470|-3.1290||
+Keith|scotland|57.5430|-2.9530|w|
+Huntly|scotland|57.4470|-2.7870||
+Inverurie|scotland|57.2840|-2.3750||
+Banff|scotland|57.6650|-2.5230||
+Fraserburgh|scotland|57.6930|-2.0050||
+Peterhead|scotland|57.5050|-1.7940||
+Turriff|scotland|57.5390|-2.4610||
+Ballater|scotland|57.0490|-3.0390||
+Braemar|scotland|57.0060|-3.3980||
+Lairg|scotland|58.0240|-4.4000||
+Helmsdale|scotland|58.1170|-3.6500||
+Berwick-upon-Tweed|england|55.7710|-2.0070||berwick
+Carlisle|england|54.8930|-2.9330||
+Cambridge|england|52.2053|0.1218||
+Birmingham|england|52.4862|-1.8904||
+Manchester|england|53.4808|-2.2426||
+Oxford|england|51.7520|-1.2577||
+York|england|53.9590|-1.0815||
+Bath|england|51.3811|-2.3590|w|
+Winchester|england|51.0632|-1.3080||
+Exeter|england|50.7184|-3.5339||
+Lancaster|england|54.0466|-2.8007||
+Newcastle upon Tyne|england|54.9783|-1.6178||newcastle
+Richmond|england||||
+Kingston|england||||
+Plymouth|england|50.3755|-4.1427||
+Bristol|england|51.4545|-2.5879||
+London|england|51.5074|-0.1278||
+Windsor|england|51.4839|-0.6044||
+Dover|england|51.1279|1.3134||
+Canterbury|england|51.2802|1.0789||
+"""
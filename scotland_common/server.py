@@ -0,0 +1,84 @@
+"""Plumbing every MCP server shares: the pooled HTTP client, lifecycle hooks, /health counters and the web app
+
+Each server keeps one instance per container, so caches and pooled connections survive across
+requests; subclasses extend startup(), shutdown() and stats() with their own state.
+"""
+from typing import Dict, Any, Callable, Optional
+import time
+
+import httpx
+
+def build_http_client(max_connections: int = 64, headers: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+    """Create a pooled keep-alive async client shared by every request in the container"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 2),
+        timeout=httpx.Timeout(15.0, connect=5.0),
+        headers=headers,
+        # requests followed redirects by default; httpx doesn't, and raise_for_status() fails on a 301
+        follow_redirects=True
+    )
+
+class MCPServer:
+    """Base for the tool servers: owns the HTTP client and counts tool calls for /health"""
+
+    def __init__(self, http: Optional[httpx.AsyncClient] = None):
+        self.http = http or build_http_client()
+        self.started_at = time.time()
+        self.tool_calls: Dict[str, int] = {}
+        self.tool_errors = 0
+
+    async def startup(self) -> None:
+        """Called once when the container starts serving requests"""
+        self.started_at = time.time()
+
+    async def shutdown(self) -> None:
+        """Called once when the container stops; releases pooled connections"""
+        await self.http.aclose()
+
+    def _record_call(self, name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        self.tool_calls[name] = self.tool_calls.get(name, 0) + 1
+        if "error" in result:
+            self.tool_errors += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-container counters exposed on /health"""
+        return {
+            "uptime_seconds": round(time.time() - self.started_at),
+            "tool_calls": dict(self.tool_calls),
+            "tool_errors": self.tool_errors
+        }
+
+def create_app(mcp_server: MCPServer, service: str, on_shutdown: Optional[Callable[[], None]] = None):
+    """FastAPI app serving one server's /mcp and /health, with its startup/shutdown on the app lifespan"""
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await mcp_server.startup()
+        yield
+        await mcp_server.shutdown()
+        if on_shutdown:
+            on_shutdown()
+
+    web_app = FastAPI(lifespan=lifespan)
+
+    @web_app.post("/mcp")
+    async def mcp_endpoint(request_dict: Dict[str, Any]) -> Dict[str, Any]:
+        method = request_dict.get("method")
+
+        if method == "tools/list":
+            return mcp_server.list_tools()
+        elif method == "tools/call":
+            tool_name = request_dict.get("params", {}).get("name")
+            arguments = request_dict.get("params", {}).get("arguments", {})
+            return await mcp_server.call_tool(tool_name, arguments)
+        else:
+            return {"error": f"Unsupported method: {method}"}
+
+    @web_app.get("/health")
+    async def health_check():
+        return {"status": "healthy", "service": service, "stats": mcp_server.stats()}
+
+    return web_app